@@ -6,6 +6,7 @@ from typing import List, Callable
 
 from rka.components.concurrency import logger
 from rka.components.concurrency.rkathread import RKAThread
+from rka.components.concurrency.timing_stats import TimingStats
 
 
 class RKAClock(RKAThread):
@@ -17,6 +18,7 @@ class RKAClock(RKAThread):
         self.__keep_running = True
         self.__paused = False
         self.__lock = threading.Condition()
+        self.__timing_stats = TimingStats(name)
         self.start()
 
     def __ticker(self):
@@ -37,16 +39,20 @@ class RKAClock(RKAThread):
                     last_slack_notify = started_at
                     ticks = 0
             sleep(next_wait)
+            tick_scheduled_at = started_at + self.__tick_duration * (ticks + 1)
             remove_listeners: List[Callable] = list()
             for listener_cb in self.__listeners:
+                listener_started_at = time.time()
                 # noinspection PyBroadException
                 try:
                     listener_cb()
-                    pass
                 except Exception as e:
                     logger.error(f'scheduler ticker listener {listener_cb} cause exception {e}')
                     traceback.print_exc()
                     remove_listeners.append(listener_cb)
+                finally:
+                    self.__timing_stats.record(TimingStats.get_callback_name(listener_cb), listener_started_at - tick_scheduled_at,
+                                               time.time() - listener_started_at)
             for listener_cb in remove_listeners:
                 self.__listeners.remove(listener_cb)
             ticks += 1
@@ -79,6 +85,9 @@ class RKAClock(RKAThread):
         self.__listeners.remove(listener_cb)
         return True
 
+    def get_timing_stats(self) -> TimingStats:
+        return self.__timing_stats
+
     def pause(self):
         with self.__lock:
             self.__paused = True
@@ -92,4 +101,6 @@ class RKAClock(RKAThread):
         with self.__lock:
             self.__keep_running = False
             self.__lock.wait(2 * self.__tick_duration)
+        if self.__timing_stats.get_callback_names():
+            logger.info(self.__timing_stats.get_report())
         super().close()
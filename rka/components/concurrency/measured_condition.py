@@ -0,0 +1,62 @@
+import threading
+import time
+
+from rka.components.concurrency.timing_stats import TimingHistogram
+
+
+# condition which records how long threads wait to acquire its lock, including re-acquiring it after wait()
+class MeasuredCondition(threading.Condition):
+    def __init__(self, name: str):
+        threading.Condition.__init__(self, threading.RLock())
+        self.__name = name
+        self.__stats_lock = threading.Lock()
+        self.__acquire_waits = TimingHistogram()
+        self.__total_wait = 0.0
+        self.__since = time.perf_counter()
+        # threading.Condition binds these from the lock in its constructor; wait() uses them to release and re-acquire
+        lock_acquire_restore = self._acquire_restore
+
+        def acquire_restore(state):
+            start = time.perf_counter()
+            lock_acquire_restore(state)
+            self.__record_wait(time.perf_counter() - start)
+
+        self._acquire_restore = acquire_restore
+        self.acquire = self.__timed_acquire
+
+    def __record_wait(self, duration: float):
+        with self.__stats_lock:
+            self.__acquire_waits.record(duration)
+            self.__total_wait += duration
+
+    def __timed_acquire(self, blocking=True, timeout=-1) -> bool:
+        start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        if acquired:
+            self.__record_wait(time.perf_counter() - start)
+        return acquired
+
+    def __enter__(self):
+        return self.__timed_acquire()
+
+    def get_name(self) -> str:
+        return self.__name
+
+    # share of wall time spent waiting for the lock, summed over all threads
+    def get_contention(self) -> float:
+        with self.__stats_lock:
+            elapsed = time.perf_counter() - self.__since
+            return self.__total_wait / elapsed if elapsed > 0.0 else 0.0
+
+    def get_report(self) -> str:
+        contention = self.get_contention()
+        with self.__stats_lock:
+            waits = self.__acquire_waits
+            return (f'{self.__name}: {waits.get_count()} acquisitions, waited {self.__total_wait * 1000.0:.1f}ms ({contention * 100.0:.1f}%), '
+                    f'mean {waits.get_mean() * 1000.0:.3f}ms, p99 {waits.get_percentile(99.0) * 1000.0:.3f}ms, max {waits.get_max() * 1000.0:.3f}ms')
+
+    def clear(self):
+        with self.__stats_lock:
+            self.__acquire_waits = TimingHistogram()
+            self.__total_wait = 0.0
+            self.__since = time.perf_counter()
@@ -1,23 +1,25 @@
 from __future__ import annotations
 
-import heapq
 import time
 import traceback
 from threading import Condition
-from typing import List, Callable
+from typing import Callable, Optional
 
 from rka.components.cleanup import Closeable
 from rka.components.concurrency import logger
 from rka.components.concurrency.rkathread import RKAThread
-from rka.components.concurrency.workthread import RKAFuture
+from rka.components.concurrency.timer_queues import ITimerQueue, HeapTimerQueue, TimerWheel
+from rka.components.concurrency.timing_stats import TimingStats
+from rka.components.concurrency.workthread import RKAFuture, RKAWorkerThreadPool
 
 
 class RKASchedulerFuture(RKAFuture):
-    def __init__(self, action, scheduler: RKAScheduler, item_id: int, run_at: float):
+    def __init__(self, action, scheduler: RKAScheduler, item_id: int, run_at: float, name: Optional[str] = None):
         RKAFuture.__init__(self, action)
         self.__scheduler = scheduler
         self.item_id = item_id
         self.run_at = run_at
+        self.name = name if name else TimingStats.get_callback_name(action)
 
     def __lt__(self, other):
         return self.run_at < other.run_at
@@ -37,14 +39,39 @@ class RKASchedulerFuture(RKAFuture):
 
 
 class RKAScheduler(Closeable):
-    def __init__(self, name):
+    def __init__(self, name, executor_pool_size=0, use_timer_wheel=False):
         Closeable.__init__(self, explicit_close=False)
-        self.__task_queue: List[RKASchedulerFuture] = list()
+        self.__name = name
+        self.__timing_stats = TimingStats(name)
+        # timer wheel has O(1) insert and cancel, which pays off with many thousands pending timers
+        self.__task_queue: ITimerQueue = TimerWheel() if use_timer_wheel else HeapTimerQueue()
         self.__next_id = 1
         self.__lock = Condition()
         self.__running = True
+        # time until which the scheduler thread sleeps; a new task due earlier has to wake it up
+        self.__wakeup_at = 0.0
+        # ready tasks are handed over to the pool, so that a slow task does not delay other timers
+        self.__executor: Optional[RKAWorkerThreadPool] = None
+        if executor_pool_size > 0:
+            self.__executor = RKAWorkerThreadPool(f'{name} executor', pool_size=executor_pool_size)
         RKAThread(name=name, target=self.__main_loop).start()
 
+    def __execute_task(self, task: RKASchedulerFuture):
+        start = time.time()
+        try:
+            task.complete()
+        except Exception as e:
+            logger.warn(f'scheduler job error: {e}')
+            traceback.print_exc()
+        finally:
+            self.__timing_stats.record(task.name, start - task.run_at, time.time() - start)
+
+    def __run_task(self, task: RKASchedulerFuture):
+        if self.__executor is not None:
+            self.__executor.post_task(lambda: self.__execute_task(task))
+            return
+        self.__execute_task(task)
+
     def __main_loop(self):
         error_safety_wait = 2.0
         # loop executing ready tasks
@@ -53,54 +80,53 @@ class RKAScheduler(Closeable):
             with self.__lock:
                 # loop until a ready task is found
                 while self.__running:
-                    # loop until there is any task
-                    while not self.__task_queue and self.__running:
-                        # wakeup periodically for error safety
-                        self.__lock.wait(error_safety_wait)
-                    if not self.__running:
-                        break
-                    # task found on heap
-                    _task = self.__task_queue[0]
-                    run_at_time = _task.run_at
                     now = time.time()
-                    if run_at_time <= now:
-                        heapq.heappop(self.__task_queue)
+                    task = self.__task_queue.pop_ready(now)
+                    if task is not None:
                         # let the task complete in the outer loop and outside crit section
-                        task = _task
                         break
-                    # task is not ready, wait until it is
-                    wait_time = min(error_safety_wait, max(0.0, run_at_time - now))
+                    # task is not ready or there is no task; wakeup periodically for error safety
+                    next_run_at = self.__task_queue.get_next_run_at()
+                    wait_time = error_safety_wait if next_run_at is None else min(error_safety_wait, max(0.0, next_run_at - now))
+                    self.__wakeup_at = now + wait_time
                     self.__lock.wait(wait_time)
+                self.__wakeup_at = 0.0
             if not self.__running:
                 break
             # task can be none if the loop is being terminated
             if task is not None:
-                try:
-                    task.complete()
-                except Exception as e:
-                    logger.warn(f'scheduler job error: {e}')
-                    traceback.print_exc()
+                self.__run_task(task)
 
     def cancel_future_by_id(self, item_id: int) -> bool:
         with self.__lock:
-            for i, item in enumerate(self.__task_queue):
-                future = item
-                if future.item_id == item_id:
-                    self.__task_queue.pop(i)
-                    return True
-        return False
-
-    def schedule(self, action: Callable, delay: float) -> RKASchedulerFuture:
+            return self.__task_queue.remove(item_id)
+
+    # name groups timing stats, by default it is the qualified name of the action
+    def schedule(self, action: Callable, delay: float, name: Optional[str] = None) -> RKASchedulerFuture:
         with self.__lock:
             run_at_time = time.time() + delay
-            future = RKASchedulerFuture(action, self, self.__next_id, run_at_time)
-            heapq.heappush(self.__task_queue, future)
+            item_id = self.__next_id
             self.__next_id += 1
-            self.__lock.notify()
+            future = RKASchedulerFuture(action, self, item_id, run_at_time, name)
+            self.__task_queue.add(item_id, run_at_time, future)
+            # wake up only when the new task is due before the scheduler thread would wake up anyway
+            if run_at_time < self.__wakeup_at:
+                self.__lock.notify()
             return future
 
+    def get_pending_count(self) -> int:
+        with self.__lock:
+            return len(self.__task_queue)
+
+    def get_timing_stats(self) -> TimingStats:
+        return self.__timing_stats
+
     def close(self):
         with self.__lock:
             self.__running = False
             self.__lock.notify_all()
+        if self.__executor is not None:
+            self.__executor.close()
+        if self.__timing_stats.get_callback_names():
+            logger.info(self.__timing_stats.get_report())
         super().close()
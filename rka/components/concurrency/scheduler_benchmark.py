@@ -0,0 +1,146 @@
+import argparse
+import random
+import threading
+import time
+from typing import Callable
+
+from rka.components.cleanup import cleanup_manager
+from rka.components.concurrency.clock import RKAClock
+from rka.components.concurrency.rkascheduler import RKAScheduler
+from rka.components.concurrency.timer_queues import ITimerQueue, HeapTimerQueue, TimerWheel
+from rka.components.concurrency.timing_stats import TimingStats
+from rka.util.benchmark import format_rate
+
+CALLBACK_NAMES = ['trigger action', 'combat status', 'screen poll', 'ability expiry']
+QUEUE_TYPES = {'heap': HeapTimerQueue, 'wheel': TimerWheel}
+
+
+def report_lateness(timing_stats: TimingStats, max_p99_ms: float, report: Callable[[str], None]) -> bool:
+    report(timing_stats.get_report())
+    p99 = timing_stats.get_total_lateness_percentile(99.0) * 1000.0
+    report(f'  total lateness p99: {p99:.2f}ms (limit {max_p99_ms:.2f}ms)')
+    if p99 > max_p99_ms:
+        report('  FAILED: p99 lateness above limit')
+        return False
+    return True
+
+
+def compare_queues(pending_timers: int, max_delay: float, report: Callable[[str], None] = print):
+    rng = random.Random(pending_timers)
+    delays = [rng.uniform(0.0, max_delay) for _ in range(pending_timers)]
+    cancelled_ids = rng.sample(range(pending_timers), pending_timers // 2)
+    report(f'timer queues: {pending_timers} pending timers over {max_delay:.0f}s, half of them cancelled')
+    for queue_name, queue_type in QUEUE_TYPES.items():
+        queue: ITimerQueue = queue_type()
+        now = time.time()
+        start = time.perf_counter()
+        for item_id, delay in enumerate(delays):
+            queue.add(item_id, now + delay, (now + delay, item_id))
+        added = time.perf_counter()
+        for item_id in cancelled_ids:
+            queue.remove(item_id)
+        cancelled = time.perf_counter()
+        # drain in steps of 10ms of simulated time, as the scheduler thread would
+        fired = 0
+        max_lateness = 0.0
+        step_time = now
+        while len(queue):
+            step_time += 0.01
+            while (entry := queue.pop_ready(step_time)) is not None:
+                fired += 1
+                max_lateness = max(max_lateness, step_time - entry[0])
+        drained = time.perf_counter()
+        report(f'  {queue_name}: add {format_rate(pending_timers, added - start, "timers")}, '
+               f'cancel {format_rate(len(cancelled_ids), cancelled - added, "timers")}, '
+               f'fire {format_rate(fired, drained - cancelled, "timers")}, max lateness {max_lateness * 1000.0:.2f}ms')
+
+
+def run_scheduler(timers: int, max_delay: float, slow_every: int, slow_duration: float, executor_pool_size: int, use_timer_wheel: bool,
+                  max_p99_ms: float, report: Callable[[str], None] = print) -> bool:
+    queue_name = 'wheel' if use_timer_wheel else 'heap'
+    scheduler = RKAScheduler(f'benchmark scheduler ({queue_name}, pool {executor_pool_size})', executor_pool_size=executor_pool_size,
+                             use_timer_wheel=use_timer_wheel)
+    all_fired = threading.Event()
+    fired = [0]
+    fired_lock = threading.Lock()
+
+    def on_timer():
+        with fired_lock:
+            fired[0] += 1
+            if fired[0] == timers:
+                all_fired.set()
+
+    def on_slow_timer():
+        time.sleep(slow_duration)
+        on_timer()
+
+    rng = random.Random(timers)
+    start = time.time()
+    for i in range(timers):
+        if slow_every and i % slow_every == 0:
+            scheduler.schedule(on_slow_timer, rng.uniform(0.0, max_delay), name='slow callback')
+        else:
+            scheduler.schedule(on_timer, rng.uniform(0.0, max_delay), name=CALLBACK_NAMES[i % len(CALLBACK_NAMES)])
+    scheduled = time.time()
+    all_fired.wait(max_delay + timers * slow_duration + 10.0)
+    finished = time.time()
+    report(f'scheduler, {queue_name}, executor pool {executor_pool_size}: {timers} timers over {max_delay:.1f}s, slow every {slow_every}')
+    report(f'  scheduling: {format_rate(timers, scheduled - start, "timers")}, fired {fired[0]} in {finished - start:.2f}s')
+    passed = report_lateness(scheduler.get_timing_stats(), max_p99_ms, report)
+    if fired[0] != timers:
+        report('  FAILED: not all timers fired')
+        passed = False
+    scheduler.close()
+    return passed
+
+
+def run_clock(tick_duration: float, duration: float, max_p99_ms: float, report: Callable[[str], None] = print) -> bool:
+    clock = RKAClock('benchmark clock', tick_duration)
+    ticks = [0]
+
+    def on_tick():
+        ticks[0] += 1
+
+    clock.add_listener(on_tick)
+    time.sleep(duration)
+    report(f'clock: tick {tick_duration * 1000.0:.1f}ms, {ticks[0]} ticks in {duration:.1f}s')
+    passed = report_lateness(clock.get_timing_stats(), max_p99_ms, report)
+    clock.close()
+    return passed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Stress the scheduler and clock and check p99 lateness of fired callbacks')
+    arg_parser.add_argument('--timers', type=int, default=20000)
+    arg_parser.add_argument('--max-delay', type=float, default=3.0, help='timers are spread evenly up to this delay in seconds')
+    arg_parser.add_argument('--slow-every', type=int, default=1000, help='every n-th timer is slow, 0 to disable')
+    arg_parser.add_argument('--slow-duration', type=float, default=0.005, help='seconds spent by a slow timer')
+    arg_parser.add_argument('--pool', type=int, action='append', help='executor pool sizes, default: 0 and 4')
+    arg_parser.add_argument('--queue', choices=list(QUEUE_TYPES.keys()), action='append', help='default: heap and wheel')
+    arg_parser.add_argument('--compare', type=int, action='append', help='pending timer counts for the queue comparison, default: 10k, 50k, 100k')
+    arg_parser.add_argument('--compare-delay', type=float, default=60.0, help='timers of the queue comparison are spread up to this delay')
+    arg_parser.add_argument('--tick', type=float, default=0.01, help='clock tick duration in seconds')
+    arg_parser.add_argument('--clock-duration', type=float, default=2.0)
+    arg_parser.add_argument('--max-p99-ms', type=float, default=50.0)
+    args = arg_parser.parse_args()
+    pool_sizes = args.pool if args.pool else [0, 4]
+    queue_names = args.queue if args.queue else list(QUEUE_TYPES.keys())
+    all_passed = True
+    try:
+        for pending_timers in args.compare if args.compare else [10000, 50000, 100000]:
+            compare_queues(pending_timers, args.compare_delay)
+        for queue_name in queue_names:
+            for pool_size in pool_sizes:
+                if not run_scheduler(args.timers, args.max_delay, args.slow_every, args.slow_duration, pool_size, queue_name == 'wheel',
+                                     args.max_p99_ms):
+                    all_passed = False
+        if not run_clock(args.tick, args.clock_duration, args.max_p99_ms):
+            all_passed = False
+    finally:
+        cleanup_manager.close_all()
+    if not all_passed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
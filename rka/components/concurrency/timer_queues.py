@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import heapq
+import math
+import time
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional, Any, Sequence
+
+
+# pending timers of a scheduler; not thread safe, the scheduler lock must be held
+class ITimerQueue:
+    def add(self, item_id: int, run_at: float, entry: Any):
+        raise NotImplementedError()
+
+    def remove(self, item_id: int) -> bool:
+        raise NotImplementedError()
+
+    # entries which are due at given time, in order of run time
+    def pop_ready(self, now: float) -> Optional[Any]:
+        raise NotImplementedError()
+
+    # time when the queue should be checked again, None when empty
+    def get_next_run_at(self) -> Optional[float]:
+        raise NotImplementedError()
+
+    def __len__(self) -> int:
+        raise NotImplementedError()
+
+
+class HeapTimerQueue(ITimerQueue):
+    # heap is rebuilt when cancelled entries outnumber pending ones
+    MIN_HEAP_SIZE_TO_COMPACT = 64
+
+    def __init__(self):
+        # heap entries are (run_at, item_id, entry); item_id keeps the order of equal times and avoids comparing entries
+        # cancelled entries stay on the heap until popped or compacted, they are only removed from pending entries
+        self.__heap: List[Tuple[float, int, Any]] = list()
+        self.__pending: Dict[int, Any] = dict()
+
+    def __pop_cancelled(self):
+        while self.__heap and self.__heap[0][1] not in self.__pending:
+            heapq.heappop(self.__heap)
+
+    def __compact(self):
+        heap_size = len(self.__heap)
+        if heap_size >= HeapTimerQueue.MIN_HEAP_SIZE_TO_COMPACT and heap_size > 2 * len(self.__pending):
+            self.__heap = [heap_entry for heap_entry in self.__heap if heap_entry[1] in self.__pending]
+            heapq.heapify(self.__heap)
+
+    def add(self, item_id: int, run_at: float, entry: Any):
+        self.__pending[item_id] = entry
+        heapq.heappush(self.__heap, (run_at, item_id, entry))
+
+    def remove(self, item_id: int) -> bool:
+        if self.__pending.pop(item_id, None) is None:
+            return False
+        self.__compact()
+        return True
+
+    def pop_ready(self, now: float) -> Optional[Any]:
+        self.__pop_cancelled()
+        if not self.__heap or self.__heap[0][0] > now:
+            return None
+        _, item_id, entry = heapq.heappop(self.__heap)
+        del self.__pending[item_id]
+        return entry
+
+    def get_next_run_at(self) -> Optional[float]:
+        self.__pop_cancelled()
+        if not self.__heap:
+            return None
+        return self.__heap[0][0]
+
+    def __len__(self) -> int:
+        return len(self.__pending)
+
+
+class TimerWheel(ITimerQueue):
+    DEFAULT_RESOLUTION = 0.005
+    # with default resolution level 0 covers 1.28s, next levels 82s, 1.5h and 93h
+    DEFAULT_WHEEL_SIZES = (256, 64, 64, 64)
+
+    def __init__(self, resolution=DEFAULT_RESOLUTION, wheel_sizes: Sequence[int] = DEFAULT_WHEEL_SIZES):
+        self.__resolution = resolution
+        self.__wheel_sizes = list(wheel_sizes)
+        # number of ticks covered by a single slot of each level
+        self.__slot_spans = [math.prod(self.__wheel_sizes[:level]) for level in range(len(self.__wheel_sizes))]
+        # slots map item_id -> (run_at, entry)
+        self.__wheels: List[List[Dict[int, Tuple[float, Any]]]] = [[dict() for _ in range(size)] for size in self.__wheel_sizes]
+        # each pending item points to the slot which holds it, which makes insert and cancel O(1)
+        self.__locations: Dict[int, Dict[int, Tuple[float, Any]]] = dict()
+        # expired entries, waiting to be popped
+        self.__ready: OrderedDict[int, Tuple[float, Any]] = OrderedDict()
+        # first tick which has not been processed yet
+        self.__current_tick = int(time.time() / resolution)
+
+    def __place(self, item_id: int, run_at: float, entry: Any):
+        current_tick = self.__current_tick
+        expire_tick = math.ceil(run_at / self.__resolution)
+        if expire_tick - current_tick < self.__wheel_sizes[0]:
+            # most timers are short, they go directly to level 0
+            slot = self.__wheels[0][max(expire_tick, current_tick) % self.__wheel_sizes[0]]
+        else:
+            slot = None
+            last_level = len(self.__wheel_sizes) - 1
+            for level in range(1, last_level + 1):
+                wheel_size = self.__wheel_sizes[level]
+                slot_span = self.__slot_spans[level]
+                slot_distance = expire_tick // slot_span - current_tick // slot_span
+                if slot_distance < wheel_size or level == last_level:
+                    # entries beyond the last level wait in its farthest slot and are placed again when it cascades
+                    slot_distance = min(slot_distance, wheel_size - 1)
+                    slot = self.__wheels[level][(current_tick // slot_span + slot_distance) % wheel_size]
+                    break
+        slot[item_id] = (run_at, entry)
+        self.__locations[item_id] = slot
+
+    def __expire_slot(self, slot: Dict[int, Tuple[float, Any]]):
+        for item_id, timer in sorted(slot.items(), key=lambda item: item[1][0]):
+            self.__ready[item_id] = timer
+            self.__locations[item_id] = self.__ready
+
+    def __process_tick(self, tick: int):
+        # move entries of higher levels down before expiring level 0, highest level first
+        for level in range(len(self.__wheel_sizes) - 1, 0, -1):
+            slot_span = self.__slot_spans[level]
+            if tick % slot_span:
+                continue
+            wheel = self.__wheels[level]
+            slot_index = (tick // slot_span) % self.__wheel_sizes[level]
+            slot = wheel[slot_index]
+            if slot:
+                wheel[slot_index] = dict()
+                for item_id, (run_at, entry) in slot.items():
+                    self.__place(item_id, run_at, entry)
+        wheel = self.__wheels[0]
+        slot_index = tick % self.__wheel_sizes[0]
+        slot = wheel[slot_index]
+        if slot:
+            wheel[slot_index] = dict()
+            self.__expire_slot(slot)
+
+    def __advance(self, now: float):
+        last_tick = int(now / self.__resolution)
+        while self.__current_tick <= last_tick:
+            if len(self.__locations) == len(self.__ready):
+                # nothing left on the wheels, skip empty ticks
+                self.__current_tick = last_tick + 1
+                return
+            self.__process_tick(self.__current_tick)
+            self.__current_tick += 1
+
+    def add(self, item_id: int, run_at: float, entry: Any):
+        self.__place(item_id, run_at, entry)
+
+    def remove(self, item_id: int) -> bool:
+        slot = self.__locations.pop(item_id, None)
+        if slot is None:
+            return False
+        del slot[item_id]
+        return True
+
+    def pop_ready(self, now: float) -> Optional[Any]:
+        if not self.__ready:
+            self.__advance(now)
+            if not self.__ready:
+                return None
+        item_id, (_, entry) = self.__ready.popitem(last=False)
+        del self.__locations[item_id]
+        return entry
+
+    def get_next_run_at(self) -> Optional[float]:
+        if self.__ready:
+            return 0.0
+        if not self.__locations:
+            return None
+        # first non-empty slot of level 0, or the next cascade of higher levels
+        wheel_size = self.__wheel_sizes[0]
+        wheel = self.__wheels[0]
+        for tick in range(self.__current_tick, self.__current_tick + wheel_size):
+            if wheel[tick % wheel_size] or tick % wheel_size == 0:
+                return tick * self.__resolution
+        return (self.__current_tick + wheel_size) * self.__resolution
+
+    def __len__(self) -> int:
+        return len(self.__locations)
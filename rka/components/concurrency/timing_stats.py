@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Dict, List, Iterable, Callable
+
+
+class TimingHistogram:
+    # bucket upper bounds grow by a factor of 2, from 1us to over 2 minutes
+    BUCKET_BOUNDS = [0.000001 * 2 ** i for i in range(28)]
+
+    def __init__(self):
+        self.__buckets = [0] * (len(TimingHistogram.BUCKET_BOUNDS) + 1)
+        self.__count = 0
+        self.__total = 0.0
+        self.__max = 0.0
+
+    def record(self, duration: float):
+        if duration < 0.0:
+            duration = 0.0
+        self.__buckets[bisect.bisect_left(TimingHistogram.BUCKET_BOUNDS, duration)] += 1
+        self.__count += 1
+        self.__total += duration
+        if duration > self.__max:
+            self.__max = duration
+
+    def merge(self, other: TimingHistogram):
+        for i, bucket_count in enumerate(other.__buckets):
+            self.__buckets[i] += bucket_count
+        self.__count += other.__count
+        self.__total += other.__total
+        self.__max = max(self.__max, other.__max)
+
+    def get_count(self) -> int:
+        return self.__count
+
+    def get_mean(self) -> float:
+        return self.__total / self.__count if self.__count else 0.0
+
+    def get_max(self) -> float:
+        return self.__max
+
+    # upper bound of the bucket which contains the percentile
+    def get_percentile(self, percentile: float) -> float:
+        if not self.__count:
+            return 0.0
+        threshold = self.__count * percentile / 100.0
+        cumulative = 0
+        for i, bucket_count in enumerate(self.__buckets):
+            cumulative += bucket_count
+            if cumulative >= threshold and bucket_count:
+                if i == len(TimingHistogram.BUCKET_BOUNDS):
+                    return self.__max
+                return min(TimingHistogram.BUCKET_BOUNDS[i], self.__max)
+        return self.__max
+
+
+class TimingStats:
+    DEFAULT_PERCENTILES = (50.0, 90.0, 99.0)
+
+    def __init__(self, name: str):
+        self.__name = name
+        self.__lock = threading.Lock()
+        # callback name -> (lateness, run time)
+        self.__histograms: Dict[str, List[TimingHistogram]] = dict()
+
+    @staticmethod
+    def get_callback_name(callback: Callable) -> str:
+        name = getattr(callback, '__qualname__', None)
+        if not name:
+            name = type(callback).__qualname__
+        return name
+
+    # lateness: actual start time minus scheduled time; run_time: duration of the callback
+    def record(self, callback_name: str, lateness: float, run_time: float):
+        with self.__lock:
+            histograms = self.__histograms.get(callback_name)
+            if histograms is None:
+                histograms = [TimingHistogram(), TimingHistogram()]
+                self.__histograms[callback_name] = histograms
+            histograms[0].record(lateness)
+            histograms[1].record(run_time)
+
+    def get_callback_names(self) -> List[str]:
+        with self.__lock:
+            return list(self.__histograms.keys())
+
+    def get_summary(self, callback_name: str, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        percentiles = list(percentiles)
+        with self.__lock:
+            lateness, run_time = self.__histograms[callback_name]
+            summary = {'count': lateness.get_count()}
+            for histogram_name, histogram in [('lateness', lateness), ('run_time', run_time)]:
+                for percentile in percentiles:
+                    summary[f'{histogram_name}_p{percentile:g}'] = histogram.get_percentile(percentile)
+                summary[f'{histogram_name}_mean'] = histogram.get_mean()
+                summary[f'{histogram_name}_max'] = histogram.get_max()
+        return summary
+
+    # percentile over all callbacks
+    def get_total_lateness_percentile(self, percentile: float) -> float:
+        with self.__lock:
+            total = TimingHistogram()
+            for lateness, _ in self.__histograms.values():
+                total.merge(lateness)
+        return total.get_percentile(percentile)
+
+    def get_report(self) -> str:
+        lines = [f'{self.__name} timing [ms] (lateness p50/p90/p99/max, run time p50/p99/max)']
+        for callback_name in sorted(self.get_callback_names()):
+            s = self.get_summary(callback_name)
+            lines.append(f'  {callback_name}: n={s["count"]}, '
+                         f'{s["lateness_p50"] * 1000.0:.2f}/{s["lateness_p90"] * 1000.0:.2f}/{s["lateness_p99"] * 1000.0:.2f}/{s["lateness_max"] * 1000.0:.2f}, '
+                         f'{s["run_time_p50"] * 1000.0:.2f}/{s["run_time_p99"] * 1000.0:.2f}/{s["run_time_max"] * 1000.0:.2f}')
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self.__lock:
+            self.__histograms.clear()
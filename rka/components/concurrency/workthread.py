@@ -3,27 +3,35 @@ from __future__ import annotations
 import threading
 import time
 import traceback
+from collections import deque
 from threading import Condition
-from typing import List, Callable, Any, Optional
+from typing import List, Callable, Any, Optional, Deque, Tuple, Dict
 
 from rka.components.cleanup import CloseGuard
 from rka.components.cleanup import Closeable
 from rka.components.concurrency import logger
 from rka.components.concurrency.rkathread import RKAThread
+from rka.components.io.log_service import LogLevel
 
 
 class RKAFuture:
+    __slots__ = ('__action', '__result', '__completed', '__cancel', '__exception', '__next_task', '__external_condition', '__info', '__waiter')
+
+    # guards state changes of all futures; critical sections are short, so sharing it is cheaper than allocating a lock per task
+    __state_lock = threading.Lock()
+
     def __init__(self, action: Callable):
         assert action is not None
         self.__action = action
         self.__result = None
         self.__completed = False
-        self.__lock = Condition()
         self.__cancel = False
         self.__exception: Optional[Exception] = None
         self.__next_task: Optional[RKAFuture] = None
         self.__external_condition: Optional[Condition] = None
         self.__info: Optional[str] = None
+        # created only when someone waits for the result
+        self.__waiter: Optional[threading.Event] = None
 
     def __str__(self) -> str:
         if self.__info:
@@ -40,33 +48,30 @@ class RKAFuture:
         return self.__info
 
     def is_completed(self) -> bool:
-        with self.__lock:
-            return self.__completed
+        return self.__completed
 
     def is_cancelled(self) -> bool:
-        with self.__lock:
-            return self.__cancel
+        return self.__cancel
 
     def get_exception(self) -> Optional[Exception]:
-        with self.__lock:
-            return self.__exception
+        return self.__exception
 
     def complete(self):
-        with self.__lock:
-            if self.__cancel:
-                return
+        if self.__cancel:
+            return
         try:
             self.__result = self.__action()
         except Exception as e:
-            with self.__lock:
-                self.__exception = e
+            self.__exception = e
             raise e
         finally:
-            with self.__lock:
+            with RKAFuture.__state_lock:
                 self.__completed = True
-                self.__lock.notify()
+                waiter = self.__waiter
                 next_task = self.__next_task
                 external_condition = self.__external_condition
+            if waiter:
+                waiter.set()
             if external_condition:
                 with external_condition:
                     external_condition.notify_all()
@@ -74,35 +79,41 @@ class RKAFuture:
             next_task.complete()
 
     def get_result(self, timeout: Optional[float] = None, guard: Optional[CloseGuard] = None) -> Any:
-        with self.__lock:
-            while not self.__completed and not self.__cancel and (timeout is None or timeout > 0.0):
+        if not self.__completed and not self.__cancel and (timeout is None or timeout > 0.0):
+            with RKAFuture.__state_lock:
+                waiter = None
+                if not self.__completed and not self.__cancel:
+                    if not self.__waiter:
+                        self.__waiter = threading.Event()
+                    waiter = self.__waiter
+            if waiter:
                 if guard is None and (timeout is not None and timeout > 1.0):
-                    # this guard will notify the condition and cancel the future only when general cleanup fires
+                    # this guard will cancel the future only when general cleanup fires
                     guard = CloseGuard(name=self.__str__(), close_callback=self.cancel_future)
-                wait_start = time.time()
-                self.__lock.wait(timeout=timeout)
-                if timeout:
-                    timeout -= time.time() - wait_start
-            if guard is not None:
-                guard.disband()
-            return self.__result
+                waiter.wait(timeout)
+        if guard is not None:
+            guard.disband()
+        return self.__result
 
     def set_exernal_condition(self, condition: Condition):
-        with self.__lock:
+        with RKAFuture.__state_lock:
             self.__external_condition = condition
 
     def then(self, next_task: Callable) -> Optional[RKAFuture]:
-        with self.__lock:
+        with RKAFuture.__state_lock:
             if self.__completed:
                 return None
             self.__next_task = RKAFuture(next_task)
             return self.__next_task
 
     def cancel_future(self) -> bool:
-        with self.__lock:
+        with RKAFuture.__state_lock:
             self.__cancel = True
-            self.__lock.notify()
-            return not self.__completed
+            waiter = self.__waiter
+            completed = self.__completed
+        if waiter:
+            waiter.set()
+        return not completed
 
 
 class RKAFutureMuxer(Closeable):
@@ -174,18 +185,33 @@ class IWorker:
     def push_task(self, callback: Callable) -> Optional[RKAFuture]:
         raise NotImplementedError()
 
+    def post_task(self, callback: Callable) -> bool:
+        raise NotImplementedError()
+
     def print_queue(self):
         raise NotImplementedError()
 
 
 class RKAWorkerThread(IWorker, Closeable):
-    def __init__(self, name: str, queue_limit=-1):
+    DEFAULT_MAX_BATCH_SIZE = 16
+
+    def __init__(self, name: str, queue_limit=-1, warn_on_queue_limit=True, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
         Closeable.__init__(self, explicit_close=False, description=name)
         self.__name = name
         self.__description = f'RKAWorkerThread [{name}]'
         self.__lock = threading.Condition()
+        self.__not_full = threading.Condition(self.__lock)
         self.__queue_limit = queue_limit
-        self.__queue: List[RKAFuture] = list()
+        self.__warn_on_queue_limit = warn_on_queue_limit
+        self.__max_batch_size = max(1, max_batch_size)
+        # futures or callbacks, with their enqueue time
+        self.__queue: Deque[Tuple[Callable[[], None], float]] = deque()
+        self.__queue_high_water_mark = 0
+        self.__executed_count = 0
+        self.__total_wait_time = 0.0
+        self.__max_wait_time = 0.0
+        self.__total_run_time = 0.0
+        self.__max_run_time = 0.0
         self.__keep_running = True
         self.__threads = self._create_threads()
         for thread in self.__threads:
@@ -200,7 +226,39 @@ class RKAWorkerThread(IWorker, Closeable):
     def _create_thread(self, name: str) -> RKAThread:
         return RKAThread(name, target=self.__loop)
 
+    def __run_batch(self, batch: Deque[Tuple[Callable[[], None], float]]):
+        executed_count = 0
+        total_wait_time = 0.0
+        max_wait_time = 0.0
+        total_run_time = 0.0
+        max_run_time = 0.0
+        while batch and self.__keep_running:
+            task, queued_time = batch.popleft()
+            if logger.get_level() <= LogLevel.DETAIL:
+                logger.detail(f'Worker thread {self.__name} executing {task}')
+            start_time = time.perf_counter()
+            try:
+                task()
+            except Exception as e:
+                logger.warn(f'Exception {e} in workthread {self}, task {task}')
+                traceback.print_exc()
+            end_time = time.perf_counter()
+            executed_count += 1
+            wait_time = start_time - queued_time
+            total_wait_time += wait_time
+            max_wait_time = max(max_wait_time, wait_time)
+            run_time = end_time - start_time
+            total_run_time += run_time
+            max_run_time = max(max_run_time, run_time)
+        with self.__lock:
+            self.__executed_count += executed_count
+            self.__total_wait_time += total_wait_time
+            self.__max_wait_time = max(self.__max_wait_time, max_wait_time)
+            self.__total_run_time += total_run_time
+            self.__max_run_time = max(self.__max_run_time, max_run_time)
+
     def __loop(self):
+        batch: Deque[Tuple[Callable[[], None], float]] = deque()
         self.__lock.acquire()
         try:
             while self.__keep_running:
@@ -209,48 +267,122 @@ class RKAWorkerThread(IWorker, Closeable):
                 if not self.__keep_running:
                     logger.debug(f'Worker thread {self.__name} exiting')
                     return
-                future = self.__queue.pop(0)
+                # take only a share of the queue, so that other threads of a pool are not left idle
+                batch_size = min(self.__max_batch_size, max(1, len(self.__queue) // len(self.__threads)))
+                for _ in range(batch_size):
+                    batch.append(self.__queue.popleft())
+                if self.__queue_limit > 0:
+                    self.__not_full.notify(batch_size)
                 self.__lock.release()
-                logger.detail(f'Worker thread {self.__name} executing {future}')
                 try:
-                    future.complete()
-                except Exception as e:
-                    logger.warn(f'Exception {e} in workthread {self}, future {future}')
-                    traceback.print_exc()
+                    self.__run_batch(batch)
                 finally:
                     self.__lock.acquire()
         finally:
-            remaining_futures = self.__queue.copy()
+            remaining_futures = [task for task, _ in batch if isinstance(task, RKAFuture)]
+            remaining_futures += [task for task, _ in self.__queue if isinstance(task, RKAFuture)]
             self.__queue.clear()
             self.__lock.release()
             for remaining_future in remaining_futures:
                 remaining_future.cancel_future()
 
-    def push_task(self, callback: Callable[[], None]) -> Optional[RKAFuture]:
-        with self.__lock:
-            if not self.__keep_running:
-                return None
-            future = RKAFuture(callback)
+    def __enqueue_task(self, task: Callable[[], None], wait_timeout: Optional[float], force: bool) -> bool:
+        # lock must be held
+        if not self.__keep_running:
+            return False
+        queue_size = len(self.__queue)
+        if not force and 0 <= self.__queue_limit <= queue_size:
+            if wait_timeout:
+                # wait for the worker to make room in the queue
+                self.__not_full.wait_for(lambda: len(self.__queue) < self.__queue_limit or not self.__keep_running, timeout=wait_timeout)
+            queue_size = len(self.__queue)
+            if self.__queue_limit <= queue_size or not self.__keep_running:
+                if self.__warn_on_queue_limit:
+                    logger.warn(f'Worker thread {self.__name} queue limit reached')
+                return False
+        self.__queue.append((task, time.perf_counter()))
+        if queue_size >= self.__queue_high_water_mark:
+            self.__queue_high_water_mark = queue_size + 1
+        self.__lock.notify()
+        return True
+
+    def push_task(self, callback: Callable[[], None], wait_timeout: Optional[float] = None) -> Optional[RKAFuture]:
+        future = RKAFuture(callback)
+        if logger.get_level() <= LogLevel.DETAIL:
             logger.detail(f'Worker thread {self.__name} scheduling {callback} as {future}')
-            if len(self.__queue) == self.__queue_limit:
-                logger.warn(f'Worker thread {self.__name} queue limit reached')
+        with self.__lock:
+            if not self.__enqueue_task(future, wait_timeout, False):
                 return None
-            self.__queue.append(future)
-            self.__lock.notify()
         return future
 
+    # fire-and-forget, no future is allocated. force=True skips the queue limit, use when waiting for the worker would lock it up
+    def post_task(self, callback: Callable[[], None], wait_timeout: Optional[float] = None, force=False) -> bool:
+        if logger.get_level() <= LogLevel.DETAIL:
+            logger.detail(f'Worker thread {self.__name} scheduling {callback}')
+        with self.__lock:
+            return self.__enqueue_task(callback, wait_timeout, force)
+
+    # queued tasks are futures or callbacks posted without a future
+    # newest queued tasks are tried first, until update returns True
+    def update_queued_task(self, update: Callable[[Callable[[], None]], bool]) -> bool:
+        with self.__lock:
+            for task, _ in reversed(self.__queue):
+                if update(task):
+                    return True
+        return False
+
+    # removes the oldest queued task which is matched; it is not cancelled
+    def remove_queued_task(self, match: Callable[[Callable[[], None]], bool]) -> Optional[Callable[[], None]]:
+        with self.__lock:
+            for i, (task, _) in enumerate(self.__queue):
+                if match(task):
+                    del self.__queue[i]
+                    self.__not_full.notify()
+                    return task
+        return None
+
+    def is_stopped(self) -> bool:
+        with self.__lock:
+            return not self.__keep_running
+
+    def is_worker_thread(self) -> bool:
+        return threading.current_thread() in self.__threads
+
+    def get_queue_size(self) -> int:
+        with self.__lock:
+            return len(self.__queue)
+
+    def get_queue_high_water_mark(self) -> int:
+        with self.__lock:
+            return self.__queue_high_water_mark
+
+    # wait time is from queueing until a task starts running; times are in seconds
+    def get_metrics(self) -> Dict[str, float]:
+        with self.__lock:
+            executed_count = self.__executed_count
+            return {
+                'queue_size': len(self.__queue),
+                'queue_high_water_mark': self.__queue_high_water_mark,
+                'executed': executed_count,
+                'wait_time_avg': self.__total_wait_time / executed_count if executed_count else 0.0,
+                'wait_time_max': self.__max_wait_time,
+                'run_time_avg': self.__total_run_time / executed_count if executed_count else 0.0,
+                'run_time_max': self.__max_run_time,
+            }
+
     def print_queue(self):
         with self.__lock:
-            queue_copy = self.__queue.copy()
+            queue_copy = [task for task, _ in self.__queue]
         print('Queue contents:')
-        for i, future in enumerate(queue_copy):
-            print(f'{i}. {future}')
+        for i, task in enumerate(queue_copy):
+            print(f'{i}. {task}')
 
     def close(self):
         with self.__lock:
             logger.detail(f'Stopping worker thread {self.__name}')
             self.__keep_running = False
             self.__lock.notify_all()
+            self.__not_full.notify_all()
         join_end = time.time() + 1.0
         for thread in self.__threads:
             join_time_left = join_end - time.time()
@@ -267,4 +399,4 @@ class RKAWorkerThreadPool(RKAWorkerThread):
         RKAWorkerThread.__init__(self, name, queue_limit)
 
     def _create_threads(self):
-        return [self._create_thread(f'{self.__name}-1') for _ in range(self.__pool_size)]
+        return [self._create_thread(f'{self.__name}-{i + 1}') for i in range(self.__pool_size)]
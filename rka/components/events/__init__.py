@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import importlib
-from typing import Dict, Type, FrozenSet, Set, Optional, Any, List, TypeVar, get_origin, get_args
+from typing import Dict, Type, FrozenSet, Set, Optional, Any, List, TypeVar, Tuple, get_origin, get_args
 
 from rka.components.io.log_service import LogService
 from rka.log_configs import LOG_EVENTS
@@ -9,6 +9,9 @@ from rka.util.util import NameEnum
 
 logger = LogService(LOG_EVENTS)
 default_worker_queue_limit = 200
+default_overload_block_timeout = 2.0
+# type checks of event parameters are meant for development, events are otherwise constructed as trusted
+validate_event_params = False
 
 
 class EventStub:
@@ -34,45 +37,61 @@ def event(**kwargs) -> EventStub:
 
 
 class Event:
+    __slots__ = ('_params_set', '_cached_params')
+
     # these fields will be static for each new subclass
     name: str
     value: str
     event_id: int
     param_names: FrozenSet[str]
     _param_types: Dict[str, Type]
-    _params_set: Set[str]
-    _cached_params: Optional[Dict[str, Any]]
+    # resolved once per class by EventsMeta
+    _param_order: Tuple[str, ...]
+    _param_check_types: Dict[str, Type]
+    _enum_param_names: FrozenSet[str]
 
     @classmethod
     def get_param_type(cls: Type[Event], param_name: str) -> Type:
         return cls._param_types[param_name]
 
+    @classmethod
+    def _convert_param(cls, param_name: str, param_value: Any, validate: bool) -> Any:
+        if param_value is None:
+            return None
+        param_type = cls._param_check_types[param_name]
+        if param_name in cls._enum_param_names and isinstance(param_value, str):
+            return param_type[param_value]
+        if validate and not isinstance(param_value, param_type):
+            raise ValueError(f'Expected type {param_type} for value of "{param_name}", found {param_value} ({type(param_value)})')
+        return param_value
+
     def __init__(self, **kwargs):
-        self._params_set: Set[str] = set()
-        self._cached_params: Optional[Dict[str, Any]] = None
-        for k, v in kwargs.items():
-            if k not in self.__class__.__dict__:
-                raise AttributeError(f'Excess argument {k}')
-            self.__setattr__(k, v)
+        cls = self.__class__
+        set_attr = object.__setattr__
+        for param_name in cls._param_order:
+            set_attr(self, param_name, kwargs.get(param_name))
+        params_set = set(kwargs.keys())
+        if not params_set <= cls.param_names:
+            raise AttributeError(f'Excess argument {", ".join(params_set - cls.param_names)}')
+        set_attr(self, '_params_set', params_set)
+        set_attr(self, '_cached_params', None)
+        # trusted construction, unless validation is enabled or names of enum values need converting
+        if validate_event_params or not cls._enum_param_names.isdisjoint(params_set):
+            for param_name in params_set:
+                set_attr(self, param_name, cls._convert_param(param_name, kwargs[param_name], validate_event_params))
 
     def __setattr__(self, key: str, value: Any):
-        if key in {'name', 'value', 'event_id', 'param_names'}:
-            raise AttributeError(f'{key} cannot be changed')
-        if key not in self.__class__.__dict__:
-            raise AttributeError(f'{self.name} has no attribute \'{key}\'')
-        if key in self.param_names:
-            if value is not None:
-                t = self._param_types[key]
-                origin_t = get_origin(t)
-                if origin_t:
-                    t = origin_t
-                if issubclass(t, NameEnum) and isinstance(value, str):
-                    value = t[value]
-                if not isinstance(value, t):
-                    raise ValueError(f'Expected type {t} for value of "{key}", found {value} ({type(value)})')
-            self._params_set.add(key)
-            self._cached_params = None
-        super().__setattr__(key, value)
+        self._set_param(key, value, validate_event_params)
+
+    def _set_param(self, param_name: str, param_value: Any, validate: bool):
+        cls = self.__class__
+        if param_name not in cls.param_names:
+            if param_name in {'name', 'value', 'event_id', 'param_names'}:
+                raise AttributeError(f'{param_name} cannot be changed')
+            raise AttributeError(f'{self.name} has no attribute \'{param_name}\'')
+        object.__setattr__(self, param_name, cls._convert_param(param_name, param_value, validate))
+        self._params_set.add(param_name)
+        object.__setattr__(self, '_cached_params', None)
 
     def get_param(self, param_name: str) -> Any:
         if param_name not in self._params_set:
@@ -80,20 +99,19 @@ class Event:
         return self.__getattribute__(param_name)
 
     def set_param(self, param_name: str, param_value: Any):
-        self.__setattr__(param_name, param_value)
+        self._set_param(param_name, param_value, validate_event_params)
 
     def get_params(self) -> Dict[str, Any]:
         if self._cached_params is None:
-            self._cached_params = dict()
-            for param_name in self._params_set:
-                self._cached_params[param_name] = self.__getattribute__(param_name)
+            object.__setattr__(self, '_cached_params', {param_name: self.__getattribute__(param_name) for param_name in self._params_set})
         return self._cached_params.copy()
 
     def from_params(self, event_params: Dict[str, Any]) -> Event:
+        # parameters may come from remote clients, they are always validated
         updated_params = self.param_names.intersection(event_params.keys())
         for param_name in updated_params:
             param_value = event_params[param_name]
-            self.set_param(param_name, param_value)
+            self._set_param(param_name, param_value, validate=True)
         return self
 
     def get_params_set(self) -> FrozenSet[str]:
@@ -117,24 +135,28 @@ class Event:
         return True
 
     def clone(self) -> Event:
-        new_event = self.__class__()
-        for param_name in self._params_set:
-            new_event.__setattr__(param_name, self.get_param(param_name))
+        # values are already converted and validated, copy the slots directly
+        cls = self.__class__
+        new_event = cls.__new__(cls)
+        set_attr = object.__setattr__
+        for param_name in cls._param_order:
+            set_attr(new_event, param_name, getattr(self, param_name))
+        set_attr(new_event, '_params_set', set(self._params_set))
+        set_attr(new_event, '_cached_params', None)
         return new_event
 
     def merge_with(self, other_event: Event) -> Event:
         assert isinstance(other_event, type(self))
-        new_event = self.__class__()
         same_params = self._params_set.intersection(other_event._params_set)
         for param_name in same_params:
             v1 = self.__getattribute__(param_name)
             v2 = other_event.__getattribute__(param_name)
             if v1 != v2:
                 raise ValueError(f'Cannot merge, conflicting values of {param_name}: {v1} and {v2}')
-        for param_name in self._params_set:
-            new_event.__setattr__(param_name, self.get_param(param_name))
+        new_event = self.clone()
         for param_name in other_event._params_set:
-            new_event.__setattr__(param_name, other_event.get_param(param_name))
+            object.__setattr__(new_event, param_name, other_event.__getattribute__(param_name))
+        new_event._params_set.update(other_event._params_set)
         return new_event
 
     @staticmethod
@@ -150,11 +172,10 @@ class Event:
 
     def __str__(self) -> str:
         attrs = [str(self.event_id)]
-        for k, cv in self.__class__.__dict__.items():
-            if k in self.param_names:
-                if k in self._params_set:
-                    v = self.__getattribute__(k)
-                    attrs.append(f'{k}={v}')
+        for k in self._param_order:
+            if k in self._params_set:
+                v = self.__getattribute__(k)
+                attrs.append(f'{k}={v}')
         return f'{self.value}({", ".join(attrs)})'
 
 
@@ -231,6 +252,22 @@ class EventsMeta(type):
         stub_file.close()
         EventsMeta.__stub_files_built.add(stub_file_name)
 
+    @staticmethod
+    def __resolve_param_check_types(event_params: Dict[str, Type]) -> Tuple[Dict[str, Type], FrozenSet[str]]:
+        param_check_types = dict()
+        enum_param_names = set()
+        for param_name, param_type in event_params.items():
+            check_type = get_origin(param_type)
+            if not check_type:
+                check_type = param_type
+            if not isinstance(check_type, type):
+                # special forms cannot be checked with isinstance()
+                check_type = object
+            elif issubclass(check_type, NameEnum):
+                enum_param_names.add(param_name)
+            param_check_types[param_name] = check_type
+        return param_check_types, frozenset(enum_param_names)
+
     def __new__(mcs, name, bases, dct):
         contained_class_namespace = dict()
         module_name = dct['__module__']
@@ -253,8 +290,11 @@ class EventsMeta(type):
                 event_class_namespace['event_id'] = v.event_id
                 event_class_namespace['param_names'] = param_names
                 event_class_namespace['_param_types'] = v.event_params
-                event_class_namespace['_params_set'] = None
-                event_class_namespace['_cached_params'] = None
+                event_class_namespace['__slots__'] = tuple(v.event_params.keys())
+                event_class_namespace['_param_order'] = tuple(v.event_params.keys())
+                param_check_types, enum_param_names = EventsMeta.__resolve_param_check_types(v.event_params)
+                event_class_namespace['_param_check_types'] = param_check_types
+                event_class_namespace['_enum_param_names'] = enum_param_names
                 fields_exist = False
                 args = []
                 for field_name, field_type in v.event_params.items():
@@ -263,8 +303,6 @@ class EventsMeta(type):
                     required_imports.add(field_type)
                     args.append(f'{field_name}: Optional[{field_type_name}] = None')
                     fields_exist = True
-                    # just declare the field
-                    event_class_namespace[field_name] = None
                 if not fields_exist:
                     stub_code.append('\t\tpass')
                 else:
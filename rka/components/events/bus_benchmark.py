@@ -0,0 +1,126 @@
+import argparse
+import threading
+import time
+from typing import Callable
+
+from rka.components.cleanup import cleanup_manager
+from rka.components.events import Events, event, default_worker_queue_limit
+from rka.components.events.event_bus import EventBus, OverloadPolicy, OverloadConfig
+from rka.util.benchmark import PeakMemoryTracker, format_rate
+
+
+class BenchmarkEvents(Events):
+    FLOOD = event(source=int, seq=int)
+    STATUS = event(source=int, seq=int)
+
+
+STATUS_EVENT_INTERVAL = 100
+
+
+class _ThreadCountSampler:
+    def __init__(self, interval: float):
+        self.__interval = interval
+        self.__stopped = threading.Event()
+        self.__thread = threading.Thread(target=self.__sample, name='Thread count sampler', daemon=True)
+        self.max_thread_count = threading.active_count()
+
+    def __sample(self):
+        while not self.__stopped.wait(self.__interval):
+            self.max_thread_count = max(self.max_thread_count, threading.active_count())
+
+    def start(self):
+        self.__thread.start()
+
+    def stop(self):
+        self.__stopped.set()
+        self.__thread.join()
+
+
+def run_flood(policy: OverloadPolicy, producers: int, events_per_producer: int, handler_delay: float, block_timeout: float,
+              trace_memory: bool, max_memory_mb: float, report: Callable[[str], None] = print) -> bool:
+    memory_tracker = PeakMemoryTracker(trace_memory)
+    memory_tracker.start()
+    baseline_thread_count = threading.active_count()
+    config = OverloadConfig(policy, block_timeout, low_priority_event_types=[BenchmarkEvents.FLOOD])
+    bus = EventBus(f'flood-{policy.value}', config)
+    delivered = [0, 0]
+
+    def on_flood(_event: BenchmarkEvents.FLOOD):
+        delivered[0] += 1
+        if handler_delay:
+            time.sleep(handler_delay)
+
+    def on_status(_event: BenchmarkEvents.STATUS):
+        delivered[1] += 1
+
+    for source in range(producers):
+        bus.subscribe(BenchmarkEvents.FLOOD(source=source), on_flood)
+    bus.subscribe(BenchmarkEvents.STATUS(), on_status)
+
+    def produce(source: int):
+        poster = bus.get_poster(BenchmarkEvents.FLOOD(source=source))
+        for seq in range(events_per_producer):
+            poster.post(BenchmarkEvents.FLOOD(seq=seq))
+            if seq % STATUS_EVENT_INTERVAL == 0:
+                bus.post(BenchmarkEvents.STATUS(source=source, seq=seq))
+
+    sampler = _ThreadCountSampler(0.01)
+    sampler.start()
+    producer_threads = [threading.Thread(target=produce, args=(source,), name=f'Flood producer {source}') for source in range(producers)]
+    start = time.time()
+    for producer_thread in producer_threads:
+        producer_thread.start()
+    for producer_thread in producer_threads:
+        producer_thread.join()
+    posted = time.time()
+    bus.close()
+    finished = time.time()
+    sampler.stop()
+    peak_memory = memory_tracker.stop()
+    stats = bus.get_stats()
+    # producers, the bus thread and the sampler
+    thread_limit = baseline_thread_count + producers + 2
+    report(f'{config}: {producers} producers x {events_per_producer} events, handler delay {handler_delay * 1000.0:.2f}ms')
+    report(f'  posting: {format_rate(stats["posted"], posted - start, "events")}')
+    report(f'  delivered: {format_rate(delivered[0] + delivered[1], finished - start, "events")}, status events: {delivered[1]}')
+    report(f'  stats: {stats}')
+    report(f'  max threads: {sampler.max_thread_count} (limit {thread_limit})')
+    bounded = True
+    if sampler.max_thread_count > thread_limit:
+        report('  FAILED: thread count not bounded')
+        bounded = False
+    if stats['queue_high_water_mark'] > default_worker_queue_limit:
+        report('  FAILED: queue size not bounded')
+        bounded = False
+    if peak_memory is not None:
+        report(f'  peak traced memory: {peak_memory / 1024.0 / 1024.0:.2f} MB (limit {max_memory_mb:.0f} MB)')
+        if peak_memory > max_memory_mb * 1024.0 * 1024.0:
+            report('  FAILED: memory not bounded')
+            bounded = False
+    return bounded
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Flood an event bus and check its overload policies')
+    arg_parser.add_argument('--policy', choices=[policy.value for policy in OverloadPolicy], action='append', help='default: all policies')
+    arg_parser.add_argument('--producers', type=int, default=4)
+    arg_parser.add_argument('--events', type=int, default=5000, help='events posted by each producer')
+    arg_parser.add_argument('--handler-delay', type=float, default=0.0001, help='seconds spent by the subscriber per event')
+    arg_parser.add_argument('--block-timeout', type=float, default=2.0)
+    arg_parser.add_argument('--memory', action='store_true', help='trace peak memory (slows down posting)')
+    arg_parser.add_argument('--max-memory', type=float, default=64.0, help='peak traced memory limit in MB')
+    args = arg_parser.parse_args()
+    policies = [OverloadPolicy[policy_name] for policy_name in args.policy] if args.policy else list(OverloadPolicy)
+    all_bounded = True
+    try:
+        for policy in policies:
+            if not run_flood(policy, args.producers, args.events, args.handler_delay, args.block_timeout, args.memory, args.max_memory):
+                all_bounded = False
+    finally:
+        cleanup_manager.close_all()
+    if not all_bounded:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
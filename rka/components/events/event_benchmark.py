@@ -0,0 +1,74 @@
+import argparse
+import threading
+import time
+from typing import Callable
+
+import rka.components.events as events_module
+from rka.components.cleanup import cleanup_manager
+from rka.components.events import Events, event
+from rka.components.events.event_bus import EventBus
+from rka.util.benchmark import format_rate
+
+
+class BenchmarkEvents(Events):
+    COMBAT_HIT = event(client_id=str, attacker_name=str, target_name=str, ability_name=str, damage=int, damage_type=str, is_autoattack=bool,
+                       is_critical=bool, timestamp=float)
+
+
+def construct_events(count: int):
+    for i in range(count):
+        BenchmarkEvents.COMBAT_HIT(client_id='benchmark', attacker_name='Arvena', target_name='a training dummy', ability_name='Ice Comet',
+                                   damage=i, damage_type='cold', timestamp=float(i))
+
+
+def clone_events(count: int):
+    template = BenchmarkEvents.COMBAT_HIT(client_id='benchmark', attacker_name='Arvena')
+    hit = BenchmarkEvents.COMBAT_HIT(target_name='a training dummy', ability_name='Ice Comet', damage=1000)
+    for _ in range(count):
+        hit.merge_with(template)
+
+
+def post_events(count: int):
+    bus = EventBus('event benchmark')
+    all_delivered = threading.Event()
+    delivered = [0]
+
+    def on_hit(_event: BenchmarkEvents.COMBAT_HIT):
+        delivered[0] += 1
+        if delivered[0] == count:
+            all_delivered.set()
+
+    bus.subscribe(BenchmarkEvents.COMBAT_HIT(attacker_name='Arvena'), on_hit)
+    poster = bus.get_poster(BenchmarkEvents.COMBAT_HIT(client_id='benchmark'))
+    poster.mute_logs()
+    for i in range(count):
+        poster.post(BenchmarkEvents.COMBAT_HIT(attacker_name='Arvena', target_name='a training dummy', ability_name='Ice Comet', damage=i,
+                                               timestamp=float(i)))
+    all_delivered.wait()
+    bus.close()
+
+
+def measure(description: str, action: Callable[[int], None], count: int, report: Callable[[str], None]):
+    start = time.perf_counter()
+    action(count)
+    duration = time.perf_counter() - start
+    report(f'{description}: {format_rate(count, duration, "events")}, {duration / count * 1000000.0:.2f}us per event')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Measure event construction and posting rates')
+    arg_parser.add_argument('--count', type=int, default=100000)
+    args = arg_parser.parse_args()
+    try:
+        for validate in [False, True]:
+            events_module.validate_event_params = validate
+            mode = 'validated' if validate else 'trusted'
+            measure(f'construct ({mode})', construct_events, args.count, print)
+            measure(f'merge with template ({mode})', clone_events, args.count, print)
+            measure(f'construct and post ({mode})', post_events, args.count, print)
+    finally:
+        cleanup_manager.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+from enum import auto
 from threading import Lock
-from typing import Callable, List, Dict, Hashable, Type, Union, Optional, Any, Set, Generic, get_origin
+from typing import Callable, List, Dict, Hashable, Type, Union, Optional, Any, Set, Generic, Tuple, get_origin, Iterable, FrozenSet
 
 from rka.components.cleanup import Closeable
 from rka.components.concurrency.rkathread import RKAThread
-from rka.components.events import Event, logger, EventType
+from rka.components.events import Event, logger, EventType, default_overload_block_timeout
 from rka.components.events.event_system import BusThread, ISubscriberContainer, ISubscriberDB, IEventPoster, IEventPosterFactory, IEventBusPoster, \
-    EventSubscription, UpdateFlag, IEventBusPosterFactory
+    EventSubscription, UpdateFlag, IEventBusPosterFactory, EventDelivery
+from rka.components.io.log_service import LogLevel
+from rka.util.util import NameEnum
 
 
 class SubscriberList(Generic[EventType], ISubscriberDB[EventType], UpdateFlag):
@@ -83,6 +86,10 @@ class SubscriberList(Generic[EventType], ISubscriberDB[EventType], UpdateFlag):
 
 
 class SubscriberIndexer(Generic[EventType], ISubscriberDB[EventType], UpdateFlag):
+    MAX_DISPATCH_TABLE_SIZE = 10000
+    __UNSET = object()
+    __UNMATCHED = object()
+
     def __init__(self, event_type: Type[EventType]):
         UpdateFlag.__init__(self)
         self.__event_type = event_type
@@ -97,6 +104,11 @@ class SubscriberIndexer(Generic[EventType], ISubscriberDB[EventType], UpdateFlag
         self.__by_unset_fields: Dict[str, Set[EventSubscription[EventType]]] = dict()
         # subscription -> list of sets where to find it; dont index by subscriber, they may repeat and not every callable will be hashable
         self.__by_subscription: Dict[EventSubscription[EventType], List[Set[EventSubscription[EventType]]]] = dict()
+        # fields which are set in any subscription, and their value indexes; None when subscriptions changed
+        self.__dispatch_fields: Optional[List[Tuple[str, Dict[Any, Set[EventSubscription[EventType]]]]]] = None
+        self.__dispatch_table_enabled = True
+        # values of dispatch fields in posted events -> final subscriber list
+        self.__dispatch_table: Dict[Tuple, List[EventSubscription[EventType]]] = dict()
 
     @staticmethod
     def __get_from_dict(d: Dict, key: Hashable, default_fn: Callable) -> Any:
@@ -157,6 +169,7 @@ class SubscriberIndexer(Generic[EventType], ISubscriberDB[EventType], UpdateFlag
                 subs.add(new_subscription)
                 subs_list = self.__get_subscriber_setlist(new_subscription)
                 subs_list.append(subs)
+            self.__invalidate_dispatch_table()
             self.set_last_update()
 
     def __remove_subscription_sets(self, subscription: EventSubscription[EventType]):
@@ -174,6 +187,7 @@ class SubscriberIndexer(Generic[EventType], ISubscriberDB[EventType], UpdateFlag
                     if subscription.match_subscriber(subscriber) and subscription.match_event(subscribe_template, strict_comparison=True):
                         self.__remove_subscription_sets(subscription)
                         del self.__by_subscription[subscription]
+                        self.__invalidate_dispatch_table()
                         self.set_last_update()
                         return True
         return False
@@ -189,6 +203,7 @@ class SubscriberIndexer(Generic[EventType], ISubscriberDB[EventType], UpdateFlag
             for subscription in subscriptions_to_del:
                 del self.__by_subscription[subscription]
             if subscriptions_to_del:
+                self.__invalidate_dispatch_table()
                 self.set_last_update()
             return len(subscriptions_to_del)
 
@@ -200,39 +215,87 @@ class SubscriberIndexer(Generic[EventType], ISubscriberDB[EventType], UpdateFlag
             self.__by_none_fields.clear()
             self.__by_unset_fields.clear()
             self.__by_subscription.clear()
+            self.__invalidate_dispatch_table()
             self.set_last_update()
 
+    def __invalidate_dispatch_table(self):
+        self.__dispatch_fields = None
+        self.__dispatch_table.clear()
+
+    def __build_dispatch_fields(self):
+        # fields not set in any subscription dont affect filtering; every subscription is then in the unset set of the field
+        dispatch_fields = list()
+        self.__dispatch_table_enabled = True
+        for field_name in self.__event_type.param_names:
+            if any(self.__by_set_unindexed_fields.get(field_name, ())):
+                # unhashable values in subscriptions, cannot be represented in a dispatch key
+                self.__dispatch_table_enabled = False
+            field_value_dict = self.__by_set_indexed_fields.get(field_name, dict())
+            if any(field_value_dict.values()) or self.__by_none_fields.get(field_name):
+                dispatch_fields.append((field_name, field_value_dict))
+        self.__dispatch_fields = dispatch_fields
+
+    def __get_dispatch_key(self, event: EventType) -> Tuple:
+        key = list()
+        for field_name, field_value_dict in self.__dispatch_fields:
+            if not event.is_param_set(field_name):
+                key.append(SubscriberIndexer.__UNSET)
+                continue
+            field_value = event.get_param(field_name)
+            if field_value is None:
+                key.append(None)
+            elif isinstance(field_value, Hashable) and field_value_dict.get(field_value):
+                key.append(field_value)
+            else:
+                # all values which are not subscribed for give the same result
+                key.append(SubscriberIndexer.__UNMATCHED)
+        return tuple(key)
+
     # from ISubscriberContainer
     def filter_subscribers(self, event: EventType) -> List[EventSubscription[EventType]]:
         assert isinstance(event, self.__event_type)
+        with self.__lock:
+            if self.__dispatch_fields is None:
+                self.__build_dispatch_fields()
+            if not self.__dispatch_table_enabled:
+                return self.__filter_subscribers(event)
+            dispatch_key = self.__get_dispatch_key(event)
+            subscribers = self.__dispatch_table.get(dispatch_key)
+            if subscribers is None:
+                subscribers = self.__filter_subscribers(event)
+                if len(self.__dispatch_table) >= SubscriberIndexer.MAX_DISPATCH_TABLE_SIZE:
+                    self.__dispatch_table.clear()
+                self.__dispatch_table[dispatch_key] = subscribers
+            return subscribers
+
+    def __filter_subscribers(self, event: EventType) -> List[EventSubscription[EventType]]:
         # event param set -> sub param set and equal, or unset
         # event param unset -> sub param unset
-        with self.__lock:
-            candidates = None
-            for field_name in event.param_names:
-                unset_subs = self.__get_unset_subscribers(field_name)
-                if event.is_param_set(field_name):
-                    field_value = event.get_param(field_name)
-                    # compare value
-                    if field_value is None:
-                        candidates_by_field = self.__get_none_subscribers(field_name)
-                    elif isinstance(field_value, Hashable):
-                        candidates_by_field = self.__get_indexed_subscribers(field_name, field_value, create_set_for_values=False)
-                    else:
-                        unfiltered_subs = self.__get_unindexed_subscribers(field_name)
-                        candidates_by_field = set()
-                        for subscription in unfiltered_subs:
-                            if subscription.match_event_field(event, field_name):
-                                candidates_by_field.add(subscription)
-                    # add subs with value unset
-                    candidates_by_field = candidates_by_field.union(unset_subs)
+        candidates = None
+        for field_name in event.param_names:
+            unset_subs = self.__get_unset_subscribers(field_name)
+            if event.is_param_set(field_name):
+                field_value = event.get_param(field_name)
+                # compare value
+                if field_value is None:
+                    candidates_by_field = self.__get_none_subscribers(field_name)
+                elif isinstance(field_value, Hashable):
+                    candidates_by_field = self.__get_indexed_subscribers(field_name, field_value, create_set_for_values=False)
                 else:
-                    candidates_by_field = unset_subs
-                if candidates is None:
-                    candidates = candidates_by_field
-                else:
-                    candidates = candidates.intersection(candidates_by_field)
-            return list(candidates) if candidates else list()
+                    unfiltered_subs = self.__get_unindexed_subscribers(field_name)
+                    candidates_by_field = set()
+                    for subscription in unfiltered_subs:
+                        if subscription.match_event_field(event, field_name):
+                            candidates_by_field.add(subscription)
+                # add subs with value unset
+                candidates_by_field = candidates_by_field.union(unset_subs)
+            else:
+                candidates_by_field = unset_subs
+            if candidates is None:
+                candidates = candidates_by_field
+            else:
+                candidates = candidates.intersection(candidates_by_field)
+        return list(candidates) if candidates else list()
 
     def filter_into_subcontainer(self, event_template: EventType, subcontainer: ISubscriberDB):
         assert isinstance(event_template, self.__event_type)
@@ -292,6 +355,7 @@ class PrefilteredEventPoster(Generic[EventType], IEventPoster[EventType], IEvent
 
     # from IEventPoster
     def post(self, event: EventType):
+        self.__poster._get_stats().record_posted()
         self.__update_filtered_container()
         if self.__filtered_container.is_empty():
             return
@@ -302,6 +366,7 @@ class PrefilteredEventPoster(Generic[EventType], IEventPoster[EventType], IEvent
 
     # from IEventPoster
     def call(self, event: EventType):
+        self.__poster._get_stats().record_called()
         self.__update_filtered_container()
         if self.__filtered_container.is_empty():
             return
@@ -319,45 +384,168 @@ class PrefilteredEventPoster(Generic[EventType], IEventPoster[EventType], IEvent
         return PrefilteredEventPoster(self.__poster, self.__parent_container, posting_template.merge_with(self.__posting_template))
 
 
-class EventDispatcher(Generic[EventType]):
+class OverloadPolicy(NameEnum):
+    # block the posting thread until the bus thread makes room, up to the configured timeout
+    BLOCK = auto()
+    # replace the event in a queued delivery of the same event type to the same subscriber
+    COALESCE = auto()
+    # remove the oldest queued delivery of a low priority event
+    DROP_OLDEST = auto()
+
+
+class OverloadConfig:
+    def __init__(self, policy=OverloadPolicy.BLOCK, block_timeout=default_overload_block_timeout,
+                 low_priority_event_types: Optional[Iterable[Type[Event]]] = None):
+        self.policy = policy
+        # COALESCE and DROP_OLDEST fall back to blocking when there is no delivery to coalesce or remove
+        self.block_timeout = block_timeout
+        # all event types are low priority, unless specified
+        self.low_priority_event_ids: Optional[FrozenSet[int]] = None
+        if low_priority_event_types is not None:
+            self.low_priority_event_ids = frozenset([event_type.event_id for event_type in low_priority_event_types])
+
+    def __str__(self) -> str:
+        return f'OverloadConfig [{self.policy.value}, {self.block_timeout}s]'
+
+    def is_low_priority(self, event: Event) -> bool:
+        return self.low_priority_event_ids is None or event.event_id in self.low_priority_event_ids
+
+
+class EventBusStats:
+    OVERLOAD_COUNTERS = ['overloads', 'coalesced', 'evicted', 'blocked', 'block_timeouts', 'overflowed']
+
     def __init__(self, worker: BusThread):
+        self.__lock = Lock()
+        self.__worker = worker
+        self.__posted = 0
+        self.__called = 0
+        self.__dispatched = 0
+        self.__dropped = 0
+        self.__overload_counters = {counter_name: 0 for counter_name in EventBusStats.OVERLOAD_COUNTERS}
+
+    def record_posted(self):
+        with self.__lock:
+            self.__posted += 1
+
+    def record_called(self):
+        with self.__lock:
+            self.__called += 1
+
+    def record_dispatched(self, dispatched: int, dropped: int):
+        with self.__lock:
+            self.__dispatched += dispatched
+            self.__dropped += dropped
+
+    # a delivery already in the queue was lost, replaced by a coalesced event or evicted
+    def record_dropped_queued(self):
+        with self.__lock:
+            self.__dropped += 1
+
+    def record_overload(self, counter_name: str):
+        with self.__lock:
+            self.__overload_counters[counter_name] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.__lock:
+            stats = {
+                'posted': self.__posted,
+                'called': self.__called,
+                'dispatched': self.__dispatched,
+                'dropped': self.__dropped,
+            }
+            stats.update(self.__overload_counters)
+        stats['queue_size'] = self.__worker.get_queue_size()
+        stats['queue_high_water_mark'] = self.__worker.get_queue_high_water_mark()
+        return stats
+
+
+class EventDispatcher(Generic[EventType]):
+    def __init__(self, worker: BusThread, stats: EventBusStats, overload_config: OverloadConfig):
         self.__worker = worker
+        self.__stats = stats
+        self.__overload_config = overload_config
         self.__quiet = False
 
     def mute_logs(self):
         self.__quiet = True
 
+    def _get_stats(self) -> EventBusStats:
+        return self.__stats
+
+    def __coalesce_delivery(self, sub: EventSubscription[EventType], event: EventType) -> bool:
+        def update_delivery(delivery: Callable[[], None]) -> bool:
+            if not isinstance(delivery, EventDelivery) or delivery.subscription is not sub or delivery.event.event_id != event.event_id:
+                return False
+            delivery.event = event
+            return True
+
+        return self.__worker.update_queued_task(update_delivery)
+
+    def __evict_low_priority_delivery(self) -> bool:
+        def is_low_priority(delivery: Callable[[], None]) -> bool:
+            return isinstance(delivery, EventDelivery) and self.__overload_config.is_low_priority(delivery.event)
+
+        return self.__worker.remove_queued_task(is_low_priority) is not None
+
+    def __post_event_overloaded(self, sub: EventSubscription[EventType], event: EventType) -> bool:
+        self.__stats.record_overload('overloads')
+        if self.__worker.is_worker_thread():
+            # a subscriber is posting from the bus thread; waiting for room would lock it up
+            self.__stats.record_overload('overflowed')
+            return sub.post_event(self.__worker, event, force=True)
+        policy = self.__overload_config.policy
+        if policy == OverloadPolicy.COALESCE and self.__coalesce_delivery(sub, event):
+            self.__stats.record_overload('coalesced')
+            self.__stats.record_dropped_queued()
+            return True
+        if policy == OverloadPolicy.DROP_OLDEST and self.__evict_low_priority_delivery():
+            self.__stats.record_overload('evicted')
+            self.__stats.record_dropped_queued()
+            if sub.post_event(self.__worker, event):
+                return True
+        self.__stats.record_overload('blocked')
+        if sub.post_event(self.__worker, event, wait_timeout=self.__overload_config.block_timeout):
+            return True
+        if self.__worker.is_stopped():
+            return False
+        self.__stats.record_overload('block_timeouts')
+        logger.error(f'Bus Thread queue filled, dropping {event} after {self.__overload_config.block_timeout}s')
+        self.__worker.print_queue()
+        RKAThread.dump_threads()
+        return False
+
     def post_event_to(self, event: EventType, deliver_subs: List[EventSubscription[EventType]]):
-        if not self.__quiet:
+        if not self.__quiet and logger.get_level() <= LogLevel.INFO:
             logger.info(f'posting {event} to {len(deliver_subs)} subscribers')
+        dispatched = 0
         for sub in deliver_subs:
-            if not sub.post_event(self.__worker, event):
-                if self.__worker.is_closed():
-                    logger.warn(f'Bus Thread closed, ignore ({event})')
-                    return
-                new_thread_num = self.__worker.bus_thread_num + 1
-                logger.error(f'Bus Thread queue filled (sending {event}) in new thread #{new_thread_num}')
-                self.__worker.print_queue()
-                RKAThread.dump_threads()
-                self.__worker = BusThread(f'Replacement Bus thread #{new_thread_num}', new_thread_num)
-                if not sub.post_event(self.__worker, event):
-                    logger.fatal(f'Unable to send event {event}')
+            if sub.post_event(self.__worker, event):
+                dispatched += 1
+                continue
+            if self.__worker.is_stopped():
+                logger.warn(f'Bus Thread closed, ignore ({event})')
+                break
+            if self.__post_event_overloaded(sub, event):
+                dispatched += 1
+        self.__stats.record_dispatched(dispatched, len(deliver_subs) - dispatched)
 
     def pass_event_to(self, event: EventType, deliver_subs: List[EventSubscription[EventType]]):
-        if not self.__quiet:
+        if not self.__quiet and logger.get_level() <= LogLevel.INFO:
             logger.info(f'passing {event} to {len(deliver_subs)} subscribers')
         for sub in deliver_subs:
             sub.pass_event(event)
 
     def complete_pending_events(self):
-        future = self.__worker.push_task(lambda: None)
+        # the queue may be full, wait for room instead of skipping
+        future = self.__worker.push_task(lambda: None, wait_timeout=self.__overload_config.block_timeout)
         if future:
             future.get_result()
 
 
 class SpecificEventBus(Generic[EventType], IEventBusPoster[EventType], ISubscriberContainer[EventType], IEventPosterFactory, EventDispatcher[EventType]):
-    def __init__(self, bus_id: str, worker: BusThread, event_type: Type[EventType]):
-        EventDispatcher.__init__(self, worker)
+    def __init__(self, bus_id: str, worker: BusThread, event_type: Type[EventType], stats: Optional[EventBusStats] = None,
+                 overload_config: Optional[OverloadConfig] = None):
+        EventDispatcher.__init__(self, worker, stats if stats else EventBusStats(worker), overload_config if overload_config else OverloadConfig())
         self.__bus_id = bus_id
         self.__event_type = event_type
         self.__subscribers = SubscriberDBFactory.create_subscriber_db(event_type)
@@ -370,6 +558,7 @@ class SpecificEventBus(Generic[EventType], IEventBusPoster[EventType], ISubscrib
 
     # from IEventPoster
     def post(self, event: EventType):
+        self._get_stats().record_posted()
         if self.__subscribers.is_empty():
             return
         deliver_subs = self.__subscribers.filter_subscribers(event)
@@ -378,6 +567,7 @@ class SpecificEventBus(Generic[EventType], IEventBusPoster[EventType], ISubscrib
 
     # from IEventPoster
     def call(self, event: EventType):
+        self._get_stats().record_called()
         if self.__subscribers.is_empty():
             return
         deliver_subs = self.__subscribers.filter_subscribers(event)
@@ -419,6 +609,10 @@ class SpecificEventBus(Generic[EventType], IEventBusPoster[EventType], ISubscrib
         self.complete_pending_events()
         self.__subscribers.clear_subscribers()
 
+    # from IEventBus
+    def get_stats(self) -> Dict[str, int]:
+        return self._get_stats().get_stats()
+
     # from ISubscriberContainer
     def filter_subscribers(self, event: EventType) -> List[EventSubscription[EventType]]:
         return self.__subscribers.filter_subscribers(event)
@@ -437,19 +631,27 @@ class SpecificEventBus(Generic[EventType], IEventBusPoster[EventType], ISubscrib
 
 
 class EventBus(IEventBusPoster[Event], IEventPosterFactory, Closeable):
-    def __init__(self, bus_id: Union[int, str]):
+    def __init__(self, bus_id: Union[int, str], overload_config: Optional[OverloadConfig] = None):
         Closeable.__init__(self, explicit_close=True)
         self.__bus_id = bus_id
         self.__lock = Lock()
         self.__worker = BusThread(f'Bus Thread [{bus_id}]', 1)
+        self.__stats = EventBusStats(self.__worker)
+        self.__overload_config = overload_config if overload_config else OverloadConfig()
         self.__specific_event_buses: List[Optional[SpecificEventBus]] = []
         logger.info(f'started event bus id {self.__worker.describe_resource()}')
 
     def _get_worker(self) -> BusThread:
         return self.__worker
 
+    def _get_stats(self) -> EventBusStats:
+        return self.__stats
+
+    def _get_overload_config(self) -> OverloadConfig:
+        return self.__overload_config
+
     def _create_specific_event_bus(self, event_type: Type[EventType]) -> SpecificEventBus[EventType]:
-        return SpecificEventBus(self.__bus_id, self.__worker, event_type)
+        return SpecificEventBus(self.__bus_id, self.__worker, event_type, self.__stats, self.__overload_config)
 
     def _get_specific_event_bus(self, event_type: Type[EventType]) -> SpecificEventBus[EventType]:
         with self.__lock:
@@ -496,6 +698,10 @@ class EventBus(IEventBusPoster[Event], IEventPosterFactory, Closeable):
     def close_bus(self):
         self.close()
 
+    # from IEventBus
+    def get_stats(self) -> Dict[str, int]:
+        return self.__stats.get_stats()
+
     # from Closeable
     def close(self):
         with self.__lock:
@@ -507,5 +713,8 @@ class EventBus(IEventBusPoster[Event], IEventPosterFactory, Closeable):
 
 
 class EventBusFactory(IEventBusPosterFactory):
+    def __init__(self, overload_config: Optional[OverloadConfig] = None):
+        self.__overload_config = overload_config
+
     def create_event_bus(self, bus_id: str) -> IEventBusPoster:
-        return EventBus(bus_id)
+        return EventBus(bus_id, self.__overload_config)
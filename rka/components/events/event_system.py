@@ -2,25 +2,24 @@ from __future__ import annotations
 
 import threading
 import time
-from typing import Callable, Generic, List, Type, Optional, Dict, Hashable, Union, Tuple
+from typing import Callable, Generic, List, Type, Optional, Dict, Hashable, Union, Tuple, Any
 
 from rka.components.cleanup import Closeable
 from rka.components.concurrency.workthread import RKAWorkerThread
 from rka.components.events import logger, default_worker_queue_limit, EventType
+from rka.components.io.log_service import LogLevel
 
 
 class BusThread(RKAWorkerThread):
     def __init__(self, name: str, bus_thread_num: int):
-        RKAWorkerThread.__init__(self, f'{name}-{bus_thread_num}', default_worker_queue_limit)
+        # overloads are handled and reported by the event dispatcher
+        RKAWorkerThread.__init__(self, f'{name}-{bus_thread_num}', default_worker_queue_limit, warn_on_queue_limit=False)
         self.bus_thread_num = bus_thread_num
 
-    def push_with_description(self, event_name: str, callback: Callable[[], None]) -> bool:
-        future = RKAWorkerThread.push_task(self, callback)
-        if not future:
-            # queue limit reached - delivery thread is locked up
-            return False
-        future.set_description(event_name)
-        return True
+    # the delivery also serves as the description of the queued task
+    def post_delivery(self, delivery: EventDelivery, wait_timeout: Optional[float] = None, force=False) -> bool:
+        # False when queue limit is reached - delivery thread is locked up
+        return RKAWorkerThread.post_task(self, delivery, wait_timeout, force)
 
     @staticmethod
     def is_running_on_bus_thread() -> bool:
@@ -86,6 +85,9 @@ class IEventBus(Generic[EventType]):
     def close_bus(self):
         raise NotImplementedError()
 
+    def get_stats(self) -> Dict[str, int]:
+        raise NotImplementedError()
+
 
 # noinspection PyAbstractClass
 class IEventBusPoster(Generic[EventType], IEventPoster[EventType], IEventBus[EventType]):
@@ -97,6 +99,22 @@ class IEventBusPosterFactory:
         raise NotImplementedError()
 
 
+# queued delivery of an event, also used as its description. the event may be replaced while queued (coalescing)
+# formatting event reprs is expensive, so it is deferred until the description is actually logged or printed
+class EventDelivery:
+    __slots__ = ('subscription', 'event')
+
+    def __init__(self, subscription: EventSubscription, event: EventType):
+        self.subscription = subscription
+        self.event = event
+
+    def __call__(self):
+        self.subscription.pass_event(self.event, self)
+
+    def __str__(self) -> str:
+        return f'{self.event} for {self.subscription.get_subscriber()}'
+
+
 class EventSubscription(Generic[EventType]):
     def __init__(self, subscriber: Callable[[EventType], None], subscribe_template: EventType):
         self.__subscriber = subscriber
@@ -112,15 +130,15 @@ class EventSubscription(Generic[EventType]):
     def get_subscribe_template(self) -> EventType:
         return self.__subscribe_template
 
-    def pass_event(self, event: EventType, description: Optional[str] = None):
-        if not description:
-            description = f'{event} for {self.__subscriber}'
-        logger.info(f'Passing event {description}')
+    def pass_event(self, event: EventType, description: Optional[Any] = None):
+        if logger.get_level() <= LogLevel.INFO:
+            if not description:
+                description = EventDelivery(self, event)
+            logger.info(f'Passing event {description}')
         self.__subscriber(event)
 
-    def post_event(self, worker: BusThread, event: EventType) -> bool:
-        description = f'{event} for {self.__subscriber}'
-        return worker.push_with_description(description, lambda: self.pass_event(event, description))
+    def post_event(self, worker: BusThread, event: EventType, wait_timeout: Optional[float] = None, force=False) -> bool:
+        return worker.post_delivery(EventDelivery(self, event), wait_timeout, force)
 
     def match_subscriber(self, subscriber: Callable[[EventType], None]) -> bool:
         # do not change this to 'is'. bound methods cant be compared with 'is'
@@ -222,6 +240,9 @@ class EventSystem(Closeable):
             return None
         return self.__buses[bus_id]
 
+    def get_stats(self) -> Dict[Hashable, Dict[str, int]]:
+        return {bus_id: bus.get_stats() for bus_id, bus in list(self.__buses.items())}
+
     def close(self):
         buses = list(self.__buses.values())
         self.__buses.clear()
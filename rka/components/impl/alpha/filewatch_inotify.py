@@ -0,0 +1,115 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+
+from rka.components.io.filewatch import IFileChangeWatcher
+from rka.components.io.log_service import LogService
+from rka.log_configs import LOG_COMMON
+
+logger = LogService(LOG_COMMON)
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_IGNORED = 0x00008000
+_IN_WATCH_LOST = _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED
+_IN_EVENT_HEADER = struct.Struct('iIII')
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    return _libc
+
+
+class InotifyFileChangeWatcher(IFileChangeWatcher):
+    def __init__(self, filename: str):
+        libc = _get_libc()
+        self.__lock = threading.Condition()
+        self.__closed = False
+        # readers inside select(); the fds are closed only after they leave it
+        self.__waiting_readers = 0
+        self.__interrupted = False
+        self.__watch_lost = False
+        self.__inotify_fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.__inotify_fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        wd = libc.inotify_add_watch(self.__inotify_fd, os.fsencode(filename), _IN_MODIFY | _IN_ATTRIB | _IN_DELETE_SELF | _IN_MOVE_SELF)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.__inotify_fd)
+            raise OSError(errno, os.strerror(errno), filename)
+        self.__wakeup_read_fd, self.__wakeup_write_fd = os.pipe()
+        os.set_blocking(self.__wakeup_read_fd, False)
+        self.__filename = filename
+
+    def __str__(self) -> str:
+        return f'InotifyFileChangeWatcher[{self.__filename}]'
+
+    def __drain_events(self) -> bool:
+        changed = False
+        while True:
+            try:
+                data = os.read(self.__inotify_fd, 4096)
+            except BlockingIOError:
+                return changed
+            if not data:
+                return changed
+            changed = True
+            offset = 0
+            while offset < len(data):
+                _wd, mask, _cookie, name_len = _IN_EVENT_HEADER.unpack_from(data, offset)
+                offset += _IN_EVENT_HEADER.size + name_len
+                if mask & _IN_WATCH_LOST and not self.__watch_lost:
+                    logger.info(f'file no longer watched in {self}')
+                    self.__watch_lost = True
+
+    def wait_for_change(self, poll_time: float) -> bool:
+        with self.__lock:
+            if self.__interrupted or self.__closed:
+                return False
+            self.__waiting_readers += 1
+        # without a watch there is nothing to wake up the reader, so keep polling
+        timeout = poll_time if self.__watch_lost else None
+        try:
+            readable, _, _ = select.select([self.__inotify_fd, self.__wakeup_read_fd], [], [], timeout)
+            if self.__inotify_fd in readable:
+                return self.__drain_events()
+        except (OSError, ValueError) as e:
+            logger.warn(f'error waiting for file change in {self}: {e}')
+        finally:
+            with self.__lock:
+                self.__waiting_readers -= 1
+                self.__lock.notify_all()
+        return False
+
+    def is_event_driven(self) -> bool:
+        return not self.__watch_lost
+
+    def interrupt(self):
+        with self.__lock:
+            if self.__interrupted or self.__closed:
+                return
+            self.__interrupted = True
+            os.write(self.__wakeup_write_fd, b'\0')
+
+    def close(self):
+        self.interrupt()
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            # interrupted readers return from select() promptly
+            while self.__waiting_readers:
+                self.__lock.wait()
+            os.close(self.__inotify_fd)
+            os.close(self.__wakeup_read_fd)
+            os.close(self.__wakeup_write_fd)
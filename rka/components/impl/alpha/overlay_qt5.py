@@ -268,7 +268,7 @@ class OptionDialog(QDialog):
         selected_option_test = item.text()
         selected_option_label = item.label
         logger.debug(f'OptionDialog selected: {selected_option_test}')
-        shared_worker.push_task(lambda: self.__result_cb(selected_option_label))
+        shared_worker.post_task(lambda: self.__result_cb(selected_option_label))
         self.close()
 
     def moveEvent(self, event: QMoveEvent):
@@ -760,14 +760,14 @@ class Qt5Overlay(IOverlay, Closeable, QObject):
         text, ok_pressed = QInputDialog.getText(self.__window, title, 'Input text:')
         if not ok_pressed:
             text = None
-        shared_worker.push_task(lambda: result_cb(text))
+        shared_worker.post_task(lambda: result_cb(text))
 
     @_print_exceptions
     def __get_confirm(self, title: str, result_cb: Callable[[bool], None]):
         logger.debug(f'__get_confirm: create dialog {title}')
         # noinspection PyCallByClass, PyArgumentList
         choice = QMessageBox.question(self.__window, 'Confirm?', title)
-        shared_worker.push_task(lambda: result_cb(choice == QMessageBox.Yes))
+        shared_worker.post_task(lambda: result_cb(choice == QMessageBox.Yes))
 
     @_print_exceptions
     def __runloop(self):
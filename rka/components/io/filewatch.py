@@ -0,0 +1,57 @@
+import sys
+import threading
+import time
+
+
+class IFileChangeWatcher(object):
+    def wait_for_change(self, poll_time: float) -> bool:
+        # returns True when the file is known to have changed. implementations which get notified about changes
+        # may block for longer than poll_time, they only return earlier than a change when interrupted
+        raise NotImplementedError()
+
+    def is_event_driven(self) -> bool:
+        raise NotImplementedError()
+
+    def interrupt(self):
+        raise NotImplementedError()
+
+    def close(self):
+        raise NotImplementedError()
+
+
+class PollingFileChangeWatcher(IFileChangeWatcher):
+    def __init__(self):
+        self.__lock = threading.Condition()
+        self.__interrupted = False
+
+    def wait_for_change(self, poll_time: float) -> bool:
+        with self.__lock:
+            remaining_duration = poll_time
+            while not self.__interrupted and remaining_duration > 0:
+                start = time.time()
+                self.__lock.wait(remaining_duration)
+                remaining_duration -= time.time() - start
+        return False
+
+    def is_event_driven(self) -> bool:
+        return False
+
+    def interrupt(self):
+        with self.__lock:
+            self.__interrupted = True
+            self.__lock.notify_all()
+
+    def close(self):
+        self.interrupt()
+
+
+class FileChangeWatcherFactory:
+    @staticmethod
+    def create_watcher(filename: str) -> IFileChangeWatcher:
+        if sys.platform.startswith('linux'):
+            from rka.components.impl.alpha.filewatch_inotify import InotifyFileChangeWatcher
+            try:
+                return InotifyFileChangeWatcher(filename)
+            except OSError:
+                pass
+        return PollingFileChangeWatcher()
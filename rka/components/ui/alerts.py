@@ -29,7 +29,7 @@ class Alerts(Closeable):
     def __alert(self, frequency: int, duration: int):
         duration_with_gap = max(duration, self.__gap)
         self.__last_alert_end = time.time() + duration_with_gap / 1000.0
-        self.__beep_thread.push_task(lambda: self.__alert_task(frequency, duration))
+        self.__beep_thread.post_task(lambda: self.__alert_task(frequency, duration))
 
     def major_trigger(self):
         if self.__overlaps():
@@ -41,7 +41,7 @@ class OvWarning:
         self.__fired = False
 
     def fire_warning(self, worker: RKAWorkerThread):
-        worker.push_task(self.action)
+        worker.post_task(self.action)
         self.__fired = True
 
     def has_fired(self) -> bool:
@@ -10,6 +10,8 @@ UI_REACT_DELAY = 0.5
 SERVER_REACT_DELAY = 0.8 + GAME_LAG
 AUTOCOMBAT_TICK = 0.4
 PROCESSOR_TICK = 0.25
+PROCESSOR_PROFILING = False
+PROCESSOR_PROFILING_LOG_PERIOD = 60.0
 
 # ability constants
 PARSE_CENSUS_EFFECTS = False
@@ -18,6 +20,8 @@ ABILITY_RECOVERY_SAFETY = GAME_LAG + 0.1
 ABILITY_REUSE_SAFETY = 0.2
 ABILITY_INJECTION_DURATION = 3.0 + VPN_LAG
 ABILITY_GRANT_DELAY = 2.0 + GAME_LAG
+ABILITY_FILTER_REORDER = True
+ABILITY_MONITOR_HUB = True
 
 # action delay measurements
 ACTION_MEASURE_DELAY = True
@@ -25,6 +29,7 @@ ACTION_OVERHEAD_DEFAULT = 0.0
 
 # parser constants
 LOG_PARSER_SKIPCHARS = 39
+LOG_PARSER_GAME_TIMESTAMPS = True
 DPSPARSE_NEW_ENCOUNTER_GAP = 6.0
 
 # UI constants
@@ -17,11 +17,12 @@ from rka.eq2.master.game.effect import EffectType
 from rka.eq2.master.game.events.combat_parser import CombatParserEvents
 from rka.eq2.master.game.events.object_state import ObjectStateEvents
 from rka.eq2.master.game.interfaces import IAbilityMonitor, IAbility, IAbilityLocator, IEffectsManager, IPlayer, IEffectBuilder, TValidPlayer, \
-    TOptionalTarget, TValidTarget, AbilityTarget, EffectTarget, IRunningAbilityMonitor, IAbilityMonitorConfigurator
+    TOptionalTarget, TValidTarget, AbilityTarget, EffectTarget, IRunningAbilityMonitor, IAbilityMonitorConfigurator, TAbilityTime
 from rka.eq2.master.game.player import PlayerStatus
 from rka.eq2.shared.flags import MutableFlags
 from rka.eq2.shared.shared_workers import shared_scheduler
 from rka.log_configs import LOG_ABILITY_CASTING
+from rka.util.util import monotonic_from_timestamp
 
 NO_DELAY = datetime.timedelta(seconds=0)
 
@@ -47,6 +48,22 @@ class Ability(IAbility):
         assert isinstance(when, float)
         return when
 
+    # ability timers run on time.monotonic(); datetimes are converted, floats are already monotonic
+    @staticmethod
+    def get_mono(now: TAbilityTime = None) -> float:
+        if now is None:
+            return time.monotonic()
+        elif isinstance(now, datetime.datetime):
+            return monotonic_from_timestamp(now.timestamp())
+        return now
+
+    # event times are wall clock, as either datetime or timestamp
+    @staticmethod
+    def get_event_mono(when: Union[datetime.datetime, float, None] = None) -> float:
+        if when is None:
+            return time.monotonic()
+        return monotonic_from_timestamp(Ability.get_ts(when))
+
     def __init__(self, locator: IAbilityLocator, player: IPlayer, effects_mgr: IEffectsManager,
                  shared_vars: AbilitySharedVars, ext_consts: AbilityExtConsts, census_consts: AbilityCensusConsts):
         IAbility.__init__(self)
@@ -71,8 +88,8 @@ class Ability(IAbility):
         self.__monitors: List[IAbilityMonitor] = []
         self.__running_monitors: List[IRunningAbilityMonitor] = []
         self.__monitoring_running = False
-        self.__last_cast_time_for_target: Optional[datetime.datetime] = None
-        self.__expired_time_for_target: Optional[datetime.datetime] = None
+        self.__last_cast_at_for_target: Optional[float] = None
+        self.__expired_at_for_target: Optional[float] = None
         self.__effect_start_future: Optional[RKAFuture] = None
         self.__target_key: Optional[str] = None
         self.__shared_key: Optional[str] = None
@@ -259,86 +276,71 @@ class Ability(IAbility):
         duration = self.__effects_mgr.apply_effects(effect_type=EffectType.DURATION, apply_target=self.__effect_source, base_value=self.census.duration)
         return duration
 
-    def __set_casting_timers(self, now: datetime.datetime, casting_overhead: float):
-        now = Ability.get_dt(now)
-        self.__set_last_cast_time(now)
-        self.__set_expired_time(None)
+    def __set_casting_timers(self, now: float, casting_overhead: float):
+        self.__set_last_cast_at(now)
+        self.__set_expired_at(None)
         self.shared.last_target_name = self.__get_target_str()
         self.shared.last_effective_casting = self.__calc_effective_casting(casting_overhead)
         self.shared.last_effective_reuse = self.__calc_effective_reuse()
         self.shared.last_effective_recovery = self.__calc_effective_recovery()
         self.shared.last_effective_duration = self.__calc_effective_duration()
 
-    def __get_casting_td(self) -> datetime.timedelta:
-        return datetime.timedelta(seconds=self.get_casting_secs())
-
-    def __get_recovery_td(self) -> datetime.timedelta:
-        return datetime.timedelta(seconds=self.get_recovery_secs())
-
-    def __get_casting_with_recovery_td(self) -> datetime.timedelta:
-        return datetime.timedelta(seconds=self.get_casting_with_recovery_secs())
-
-    def __get_reuse_td_from_cast(self) -> datetime.timedelta:
+    def __get_reuse_secs_from_cast(self) -> float:
         assert self.__has_been_cast()
-        reuse_td = datetime.timedelta(seconds=self.get_reuse_secs())
+        reuse = self.get_reuse_secs()
         if self.ext.maintained:
-            if self.shared.last_expired_time is None:
-                duration_td = self.__get_duration_td()
+            if self.shared.last_expired_at is None:
+                duration = self.get_duration_secs()
             else:
-                duration_td = self.shared.last_expired_time - self.shared.last_cast_time
-            return reuse_td + self.__get_casting_td() + duration_td
+                duration = self.shared.last_expired_at - self.shared.last_cast_at
+            return reuse + self.get_casting_secs() + duration
         else:
-            return reuse_td + self.__get_casting_td()
-
-    def __get_duration_td(self) -> datetime.timedelta:
-        if not self.__has_been_cast():
-            return datetime.timedelta(seconds=self.__calc_effective_duration())
-        return datetime.timedelta(seconds=self.shared.last_effective_duration)
+            return reuse + self.get_casting_secs()
 
     def __has_been_cast(self) -> bool:
-        return self.shared.last_cast_time is not None
+        return self.shared.last_cast_at is not None
 
-    def __set_last_cast_time(self, last_cast_time: datetime.datetime):
-        self.shared.previous_last_cast_time = self.shared.last_cast_time
-        self.__last_cast_time_for_target = last_cast_time
-        self.shared.last_cast_time = last_cast_time
+    def __set_last_cast_at(self, last_cast_at: float):
+        self.shared.previous_last_cast_at = self.shared.last_cast_at
+        self.__last_cast_at_for_target = last_cast_at
+        self.shared.last_cast_at = last_cast_at
 
-    def __revert_last_cast_time(self):
-        self.__last_cast_time_for_target = self.shared.previous_last_cast_time
-        self.shared.last_cast_time = self.shared.previous_last_cast_time
+    def __revert_last_cast_at(self):
+        self.__last_cast_at_for_target = self.shared.previous_last_cast_at
+        self.shared.last_cast_at = self.shared.previous_last_cast_at
 
-    def __get_last_cast_time_for_target(self) -> Optional[datetime.datetime]:
+    def __get_last_cast_at_for_target(self) -> Optional[float]:
         if self.shared.last_target_name == self.__get_target_str():
-            return self.shared.last_cast_time
-        return self.__last_cast_time_for_target
+            return self.shared.last_cast_at
+        return self.__last_cast_at_for_target
 
-    def __set_expired_time(self, expired_time: Optional[datetime.datetime]):
-        self.__expired_time_for_target = expired_time
-        self.shared.last_expired_time = expired_time
+    def __set_expired_at(self, expired_at: Optional[float]):
+        self.__expired_at_for_target = expired_at
+        self.shared.last_expired_at = expired_at
 
-    def __get_expired_time_for_target(self) -> Optional[datetime.datetime]:
+    def __get_expired_at_for_target(self) -> Optional[float]:
         if self.shared.last_target_name == self.__get_target_str():
-            return self.shared.last_expired_time
-        return self.__expired_time_for_target
+            return self.shared.last_expired_at
+        return self.__expired_at_for_target
 
-    def __is_being_maintained(self, now: Optional[datetime.datetime] = None) -> bool:
+    def __is_being_maintained(self, now: float) -> bool:
         if not self.ext.maintained:
             return False
         return not self.__is_maintained_duration_expired(now)
 
-    def __has_duration_running_since(self, cast_time: datetime.datetime, now: Optional[datetime.datetime] = None) -> bool:
+    def __has_duration_running_since(self, cast_at: float, now: float) -> bool:
         if self.is_permanent():
             return True
-        casting_ends_at = cast_time + self.__get_casting_td()
-        still_running = cast_time <= Ability.get_dt(now) < casting_ends_at + self.__get_duration_td()
+        casting_ends_at = cast_at + self.get_casting_secs()
+        still_running = cast_at <= now < casting_ends_at + self.get_duration_secs()
         return still_running
 
-    def __is_maintained_duration_expired(self, now: Optional[datetime.datetime] = None) -> bool:
+    def __is_maintained_duration_expired(self, now: float) -> bool:
         assert self.ext.maintained
-        last_cast = self.shared.last_cast_time
-        if not last_cast:
+        last_cast = self.shared.last_cast_at
+        if last_cast is None:
             return True
-        if self.shared.last_expired_time:
+        if self.shared.last_expired_at is not None:
             return True
         if self.is_permanent():
             return False
@@ -365,61 +367,55 @@ class Ability(IAbility):
         return self.shared.last_effective_reuse
 
     def get_duration_secs(self) -> float:
-        duration_td = self.__get_duration_td()
-        return duration_td.total_seconds()
+        if not self.__has_been_cast():
+            return self.__calc_effective_duration()
+        return self.shared.last_effective_duration
 
-    def get_remaining_reuse_wait_td(self, now: Optional[datetime.datetime] = None) -> datetime.timedelta:
+    def get_remaining_reuse_wait_td(self, now: TAbilityTime = None) -> datetime.timedelta:
+        now = Ability.get_mono(now)
         if self.is_reuse_expired(now):
             return NO_DELAY
-        assert self.__has_been_cast()
-        now = Ability.get_dt(now)
-        recast_possible_at = self.shared.last_cast_time + self.__get_reuse_td_from_cast()
-        return recast_possible_at - now
+        recast_possible_at = self.shared.last_cast_at + self.__get_reuse_secs_from_cast()
+        return datetime.timedelta(seconds=recast_possible_at - now)
 
-    def get_remaining_duration_sec(self, now: Optional[datetime.datetime] = None) -> float:
+    def get_remaining_duration_sec(self, now: TAbilityTime = None) -> float:
         if not self.__has_been_cast():
             return -1.0
-        if not self.__get_last_cast_time_for_target():
+        last_cast_at = self.__get_last_cast_at_for_target()
+        if last_cast_at is None:
             return -1.0
         if self.is_permanent():
             return -1.0
-        now = Ability.get_dt(now)
-        casting_ends_at = self.__get_last_cast_time_for_target() + self.__get_casting_td()
-        duration_ends_at = casting_ends_at + self.__get_duration_td()
-        remaining_duration_td = duration_ends_at - now
-        return remaining_duration_td.total_seconds()
+        duration_ends_at = last_cast_at + self.get_casting_secs() + self.get_duration_secs()
+        return duration_ends_at - Ability.get_mono(now)
 
-    def is_casting(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_casting(self, now: TAbilityTime = None) -> bool:
         if not self.__has_been_cast():
             return False
-        now = Ability.get_dt(now)
-        return now <= self.shared.last_cast_time + self.__get_casting_td()
+        return Ability.get_mono(now) <= self.shared.last_cast_at + self.get_casting_secs()
 
-    def is_recovering(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_recovering(self, now: TAbilityTime = None) -> bool:
         if not self.__has_been_cast():
             return False
-        now = Ability.get_dt(now)
-        casting_end = self.shared.last_cast_time + self.__get_casting_td()
-        recovery_end = casting_end + self.__get_recovery_td()
-        return casting_end < now <= recovery_end
+        casting_end = self.shared.last_cast_at + self.get_casting_secs()
+        recovery_end = casting_end + self.get_recovery_secs()
+        return casting_end < Ability.get_mono(now) <= recovery_end
 
-    def is_after_recovery(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_after_recovery(self, now: TAbilityTime = None) -> bool:
         if not self.__has_been_cast():
             return True
-        now = Ability.get_dt(now)
-        return now > self.shared.last_cast_time + self.__get_casting_with_recovery_td()
+        return Ability.get_mono(now) > self.shared.last_cast_at + self.get_casting_with_recovery_secs()
 
-    def is_reuse_expired(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_reuse_expired(self, now: TAbilityTime = None) -> bool:
         if not self.__has_been_cast():
             return True
-        now = Ability.get_dt(now)
-        recast_possible_at = self.shared.last_cast_time + self.__get_reuse_td_from_cast()
-        return now > recast_possible_at
+        recast_possible_at = self.shared.last_cast_at + self.__get_reuse_secs_from_cast()
+        return Ability.get_mono(now) > recast_possible_at
 
-    def is_reusable(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_reusable(self, now: TAbilityTime = None) -> bool:
         if not self.__has_been_cast():
             return True
-        now = Ability.get_dt(now)
+        now = Ability.get_mono(now)
         if self.ext.cast_when_reusing:
             return self.is_after_recovery(now)
         return self.is_reuse_expired(now)
@@ -427,17 +423,17 @@ class Ability(IAbility):
     def is_permanent(self) -> bool:
         return self.census.duration < 0 or self.census.does_not_expire
 
-    def is_duration_expired(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_duration_expired(self, now: TAbilityTime = None) -> bool:
         if not self.__has_been_cast():
             return True
-        last_cast = self.__get_last_cast_time_for_target()
-        if not last_cast:
+        last_cast = self.__get_last_cast_at_for_target()
+        if last_cast is None:
             return True
-        if self.__get_expired_time_for_target():
+        if self.__get_expired_at_for_target() is not None:
             return True
         if self.is_permanent():
             return False
-        return not self.__has_duration_running_since(last_cast, now)
+        return not self.__has_duration_running_since(last_cast, Ability.get_mono(now))
 
     def can_affect_target(self, target: TValidTarget) -> bool:
         check_target = AbilityTarget(target, self.player.get_player_manager())
@@ -460,8 +456,8 @@ class Ability(IAbility):
             return False
         return AbilityTarget.match_targets(self.player, player)
 
-    def is_reusable_and_duration_expired(self, now: Optional[datetime.datetime] = None) -> bool:
-        now = Ability.get_dt(now)
+    def is_reusable_and_duration_expired(self, now: TAbilityTime = None) -> bool:
+        now = Ability.get_mono(now)
         return self.is_reusable(now) and self.is_duration_expired(now)
 
     def is_permitted_in_caster_state(self) -> bool:
@@ -508,15 +504,15 @@ class Ability(IAbility):
     def interrupted(self):
         if not self.__has_been_cast():
             return
-        now = datetime.datetime.now()
+        now = time.monotonic()
         # only apply the interrupt if the ability has been cast below a threshold (prevent race condition)
-        reduced_casting_ts = self.__get_casting_td() * 0.8
-        if now <= self.shared.last_cast_time + reduced_casting_ts:
+        reduced_casting = self.get_casting_secs() * 0.8
+        if now <= self.shared.last_cast_at + reduced_casting:
             self.__cancel_ability_effect_start()
-            self.__revert_last_cast_time()
+            self.__revert_last_cast_at()
 
     def reset_reuse(self):
-        if self.__is_being_maintained():
+        if self.__is_being_maintained(time.monotonic()):
             logger.info(f'cannot reset reuse {self.ext.ability_name}, is being maintained')
             return
         logger.info(f'reset reuse {self.ext.ability_name}')
@@ -542,14 +538,14 @@ class Ability(IAbility):
                 effect.start_effect()
 
     def __stop_ability_effect(self):
-        self.__effects_mgr.cancel_effects(lambda effect: effect.sustain_source().ability() is self)
+        self.__effects_mgr.cancel_effects(source_ability=self)
 
     def expire_duration(self, when: Union[datetime.datetime, float, None] = None):
-        when = Ability.get_dt(when)
-        if self.is_duration_expired(when):
+        expired_at = Ability.get_event_mono(when)
+        if self.is_duration_expired(expired_at):
             return
-        casting_logger.info(f'expired {self.ext.ability_name} at {when}')
-        self.__set_expired_time(when)
+        casting_logger.info(f'expired {self.ext.ability_name} at {Ability.get_dt(when)}')
+        self.__set_expired_at(expired_at)
         EventSystem.get_main_bus().post(ObjectStateEvents.ABILITY_EXPIRED(ability=self,
                                                                           ability_name=self.locator.get_canonical_name(),
                                                                           ability_shared_key=self.ability_shared_key(),
@@ -577,7 +573,7 @@ class Ability(IAbility):
             debug_str = f'* Confirm casting {self.ability_variant_display_name()}'
             casting_logger.info(debug_str)
 
-    def __casting_started(self, cancel_action: bool, casting_overhead: float, when: datetime.datetime, player_busy: bool):
+    def __casting_started(self, cancel_action: bool, casting_overhead: float, when: float, player_busy: bool):
         self.__set_casting_timers(when, casting_overhead)
         if not player_busy or self.ext.cancel_spellcast or not self.ext.cast_when_casting:
             self.player.set_last_cast_ability(self)
@@ -589,15 +585,18 @@ class Ability(IAbility):
     def confirm_casting_started(self, cancel_action: bool, casting_overhead=0.0, when: Union[datetime.datetime, float, None] = None,
                                 player_busy: Optional[bool] = None):
         casting_logger.detail(f'confirm_casting_started: {self} at {when}')
-        when_ts = Ability.get_ts(when)
-        last_cast_ts = self.shared.last_cast_time.timestamp() if self.shared.last_cast_time else 0.0
-        since_last_confirm = when_ts - self.shared.last_confirm_time
+        # converted once, so that cast and confirm times set from the same event compare equal
+        when_mono = Ability.get_event_mono(when)
+        last_cast_at = self.shared.last_cast_at
+        last_confirm_at = self.shared.last_confirm_at
+        confirm_expired = last_confirm_at is None or when_mono - last_confirm_at >= self.get_reuse_secs()
+        cast_not_confirmed = last_cast_at is not None and when_mono > last_cast_at and (last_confirm_at is None or last_cast_at > last_confirm_at)
         # handle two casting modes:
         # 1. by confirming (confirm and cast times were set)
         # 2. by invoking (casting time was set, but confirm time was not
-        if since_last_confirm >= self.get_reuse_secs() or when_ts > last_cast_ts > self.shared.last_confirm_time:
-            self.shared.last_confirm_time = when_ts
-            self.__casting_started(cancel_action, casting_overhead, when, player_busy if player_busy is not None else self.player.is_busy())
+        if confirm_expired or cast_not_confirmed:
+            self.shared.last_confirm_at = when_mono
+            self.__casting_started(cancel_action, casting_overhead, when_mono, player_busy if player_busy is not None else self.player.is_busy())
             self.__log_confirm_casting()
             EventSystem.get_main_bus().post(ObjectStateEvents.ABILITY_CASTING_CONFIRMED(ability=self,
                                                                                         ability_name=self.locator.get_canonical_name(),
@@ -608,11 +607,11 @@ class Ability(IAbility):
     def confirm_casting_completed(self, cancel_action: bool, when: Union[datetime.datetime, float, None]):
         when = Ability.get_dt(when)
         casting_logger.debug(f'confirm_casting_completed: {self} at {when}')
-        when = when - self.__get_casting_td()
-        self.confirm_casting_started(cancel_action=cancel_action, casting_overhead=0.0, when=when, player_busy=False)
+        started_ts = when.timestamp() - self.get_casting_secs()
+        self.confirm_casting_started(cancel_action=cancel_action, casting_overhead=0.0, when=started_ts, player_busy=False)
 
     def withdraw_casting_action(self) -> bool:
-        if self.shared.last_cast_time is None:
+        if self.shared.last_cast_at is None:
             logger.warn(f'nothing to withdraw, ability not cast: {self}')
             return False
         if not self.get_action().is_cancellable():
@@ -629,20 +628,19 @@ class Ability(IAbility):
     def revoke_last_cast_if_not_confirmed(self, max_confirm_delay: float, now: Union[datetime.datetime, float, None] = None) -> bool:
         if not self.__has_been_cast():
             return False
-        last_cast_ts = self.shared.last_cast_time.timestamp() if self.shared.last_cast_time else 0.0
-        if self.shared.last_confirm_time >= last_cast_ts:
+        last_confirm_at = self.shared.last_confirm_at
+        if last_confirm_at is not None and last_confirm_at >= self.shared.last_cast_at:
             return False
-        now_ts = Ability.get_ts(now)
-        if now_ts <= last_cast_ts + max_confirm_delay:
+        if Ability.get_event_mono(now) <= self.shared.last_cast_at + max_confirm_delay:
             return False
-        self.__revert_last_cast_time()
+        self.__revert_last_cast_at()
         return True
 
     def cast(self) -> bool:
-        now = datetime.datetime.now()
+        now = time.monotonic()
         reuse_expired = self.is_reuse_expired(now)
         if not self.ext.cast_when_reusing and not reuse_expired:
-            recast_possible_at = self.shared.last_cast_time + self.__get_reuse_td_from_cast()
+            recast_possible_at = self.shared.last_cast_time + datetime.timedelta(seconds=self.__get_reuse_secs_from_cast())
             tstr1 = f'cast_at:{self.shared.last_cast_time.time()}'
             tstr2 = f'casting:{self.shared.last_effective_casting}/{self.census.casting}'
             tstr3 = f'reuse:{self.shared.last_effective_reuse}/{self.census.reuse}/{recast_possible_at.time()}'
@@ -0,0 +1,85 @@
+import argparse
+import datetime
+import time
+from typing import Callable, List
+
+from rka.components.cleanup import cleanup_manager
+from rka.eq2.master.game.ability.ability import Ability
+from rka.eq2.master.game.ability.ability_data import AbilitySharedVars, AbilityExtConsts, AbilityCensusConsts
+from rka.eq2.master.game.interfaces import IPlayer
+from rka.util.benchmark import format_rate
+
+
+class _BenchmarkPlayer(IPlayer):
+    def __init__(self, name: str):
+        self.__name = name
+
+    def get_player_name(self) -> str:
+        return self.__name
+
+    def get_player_manager(self):
+        return None
+
+
+class _BenchmarkEffectsManager:
+    def apply_effects(self, effect_type, apply_target, base_value):
+        return base_value
+
+
+def create_abilities(count: int) -> List[Ability]:
+    player = _BenchmarkPlayer('benchmark player')
+    effects_mgr = _BenchmarkEffectsManager()
+    now = time.monotonic()
+    abilities = list()
+    for i in range(count):
+        census = AbilityCensusConsts()
+        census.casting = 0.5
+        census.reuse = float(i % 60)
+        census.recovery = 0.25
+        census.duration = float(i % 30)
+        ext = AbilityExtConsts()
+        ext.cast_when_reusing = False
+        ext.maintained = i % 10 == 0
+        shared = AbilitySharedVars()
+        # half of the abilities have been cast recently, the others never
+        if i % 2:
+            shared.last_cast_at = now - float(i % 45)
+            shared.last_effective_casting = census.casting
+            shared.last_effective_reuse = census.reuse
+            shared.last_effective_recovery = census.recovery
+            shared.last_effective_duration = census.duration
+        # noinspection PyTypeChecker
+        abilities.append(Ability(None, player, effects_mgr, shared, ext, census))
+    return abilities
+
+
+def measure(name: str, abilities: List[Ability], check: Callable[[Ability], bool], rounds: int, report: Callable[[str], None]):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for ability in abilities:
+            check(ability)
+    report(f'  {name}: {format_rate(rounds * len(abilities), time.perf_counter() - start, "checks")}')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Measure ability readiness checks per second')
+    arg_parser.add_argument('--abilities', type=int, default=1000)
+    arg_parser.add_argument('--rounds', type=int, default=200)
+    args = arg_parser.parse_args()
+    try:
+        abilities = create_abilities(args.abilities)
+        print(f'{args.abilities} abilities, {args.rounds} rounds')
+        now_mono = time.monotonic()
+        now_dt = datetime.datetime.now()
+        measure('is_reusable(monotonic)', abilities, lambda ability: ability.is_reusable(now_mono), args.rounds, print)
+        measure('is_reusable()', abilities, lambda ability: ability.is_reusable(), args.rounds, print)
+        measure('is_reusable(datetime)', abilities, lambda ability: ability.is_reusable(now_dt), args.rounds, print)
+        measure('is_duration_expired(monotonic)', abilities, lambda ability: ability.is_duration_expired(now_mono), args.rounds, print)
+        measure('is_reusable_and_duration_expired(monotonic)', abilities, lambda ability: ability.is_reusable_and_duration_expired(now_mono),
+                args.rounds, print)
+    finally:
+        cleanup_manager.close_all()
+
+
+if __name__ == '__main__':
+    main()
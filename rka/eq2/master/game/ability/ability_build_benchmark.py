@@ -0,0 +1,196 @@
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from rka.components.cleanup import cleanup_manager
+from rka.eq2.master import BuilderTools
+from rka.eq2.master.control.action import action_factory
+from rka.eq2.master.game.ability import AbilityEffectTarget, AbilityPriority
+from rka.eq2.master.game.ability.ability_data import AbilityExtConsts
+from rka.eq2.master.game.ability.ability_factory import AbilityFactory
+from rka.eq2.master.game.ability.ability_locator import AbilityLocatorFactory
+from rka.eq2.master.game.ability.ability_registry import AbilityRegistry
+from rka.eq2.master.game.census.census_bridge import ICensusBridge
+from rka.eq2.master.game.effect.effect_mgr import EffectsManager
+from rka.eq2.master.game.gameclass import GameClass
+from rka.eq2.master.game.interfaces import IAbilityLocator, IPlayer
+from rka.eq2.master.game.player import PlayerStatus
+from rka.util.benchmark import format_rate
+
+
+class _BenchmarkExtConstsRegistry:
+    def __init__(self):
+        self.__ext_objects: Dict[str, AbilityExtConsts] = dict()
+
+    def add_locator(self, locator: IAbilityLocator):
+        ext = AbilityExtConsts()
+        ext.classname = locator.get_gameclass().name
+        ext.ability_id = locator.get_ability_id()
+        ext.ability_name = locator.get_canonical_name()
+        ext.shared_name = locator.get_shared_name()
+        ext.effect_name = ext.ability_name
+        ext.priority = AbilityPriority.COMBAT
+        ext.priority_adjust = 0
+        ext.effect_target = AbilityEffectTarget.Enemy
+        ext.has_census = False
+        ext.cannot_modify = False
+        ext.ward_expires = False
+        ext.maintained = False
+        ext.expire_on_move = False
+        ext.expire_on_attack = False
+        self.__ext_objects[locator.locator_key()] = ext
+
+    def get_ability_ext_object(self, game_class: GameClass, ability_id: str) -> AbilityExtConsts:
+        return self.__ext_objects[f'{game_class.name}.{ability_id}']
+
+
+class _BenchmarkInputs:
+    class _Special:
+        def __init__(self):
+            self.consume_ability_injection = action_factory.new_action().delay(0.0)
+            self.consume_command_injection = action_factory.new_action().delay(0.0)
+
+    def __init__(self):
+        self.special = _BenchmarkInputs._Special()
+
+
+class _BenchmarkPlayerManager:
+    # noinspection PyMethodMayBeStatic
+    def resolve_targets(self, _target, _condition) -> list:
+        return []
+
+
+class _BenchmarkPlayer(IPlayer):
+    def __init__(self, name: str, inputs: _BenchmarkInputs, player_mgr: _BenchmarkPlayerManager):
+        self.__name = name
+        self.__inputs = inputs
+        self.__player_mgr = player_mgr
+
+    def get_player_name(self) -> str:
+        return self.__name
+
+    def get_player_id(self) -> str:
+        return f'benchmark.{self.__name}'
+
+    def get_player_manager(self):
+        return self.__player_mgr
+
+    def get_inputs(self):
+        return self.__inputs
+
+    def get_status(self) -> PlayerStatus:
+        return PlayerStatus.Zoned
+
+    def is_remote(self) -> bool:
+        return True
+
+    def get_ability_injector_name(self) -> str:
+        return f'{self.__name}.abilities'
+
+    def get_command_injector_name(self) -> str:
+        return f'{self.__name}.commands'
+
+
+class _Roster:
+    def __init__(self, abilities_per_character: int, shared_vars_dir: str):
+        self.builder_tools = BuilderTools()
+        # shared vars of benchmark characters must not be saved with the real ones
+        self.builder_tools.ability_reg = AbilityRegistry(os.path.join(shared_vars_dir, 'saved_ability_vars.json'))
+        self.builder_tools.effects_mgr = EffectsManager()
+        self.builder_tools.registered_ability_factory = AbilityFactory(self.builder_tools.effects_mgr, self.builder_tools.ability_reg)
+        # abilities are not census based, census bridge is never called
+        ext_consts_reg = _BenchmarkExtConstsRegistry()
+        # noinspection PyTypeChecker
+        AbilityLocatorFactory.initialize(self.builder_tools.ability_reg, ICensusBridge(), ext_consts_reg)
+        # generated locators require an initialized locator factory
+        from rka.eq2.master.game.ability.generated_abilities import ability_collection_classes
+        # registry keys do not include the class, a character can have each ability id once
+        locators: Dict[str, IAbilityLocator] = dict()
+        for collection_class in ability_collection_classes.values():
+            for _, value in sorted(vars(collection_class).items()):
+                if isinstance(value, IAbilityLocator):
+                    locators.setdefault(value.get_ability_id(), value)
+        self.locators_by_class: Dict[GameClass, List[IAbilityLocator]] = dict()
+        for locator in list(locators.values())[:abilities_per_character]:
+            ext_consts_reg.add_locator(locator)
+            self.locators_by_class.setdefault(locator.get_gameclass(), list()).append(locator)
+        self.inputs = _BenchmarkInputs()
+        self.player_mgr = _BenchmarkPlayerManager()
+        self.characters = 0
+
+    def add_character(self):
+        from rka.eq2.master.game.gameclass.classes_virtual import PlayerClassBase
+        from rka.eq2.master.game.player.player_config import PlayerConfig
+        player = _BenchmarkPlayer(f'character{self.characters}', self.inputs, self.player_mgr)
+        self.characters += 1
+        player_class = PlayerClassBase(1)
+        for game_class, locators in self.locators_by_class.items():
+            store = player_class.add_subclass(game_class)
+            for ability_id, locator in enumerate(locators):
+                builder = store.builder(locator).census_data(casting=0.5 + ability_id % 3, reuse=float(ability_id % 60), recovery=0.5,
+                                                             duration=float(ability_id % 30))
+                builder.non_census_injection_use_ability_str(f'useability {ability_id}')
+                # a few abilities per character change their data, these get own copies
+                if ability_id % 20 == 0:
+                    builder.cancel_spellcast()
+                builder.build()
+        # same path as players of the runtime, including the check for duplicate actions
+        player_config = PlayerConfig()
+        player_config.has_census = False
+        player_config.add_class(player_class)
+        # noinspection PyTypeChecker
+        player_config.build_all_classes_abilities(player, self.builder_tools)
+
+    def get_ability_count(self) -> int:
+        return len(self.builder_tools.ability_reg.find_abilities(lambda _ability: True))
+
+
+def build_characters(roster: _Roster, characters: int):
+    for _ in range(characters):
+        roster.add_character()
+
+
+def run_roster(roster: _Roster, characters: int, report: Callable[[str], None] = print) -> float:
+    # timing pass, tracemalloc would inflate the times
+    gc.collect()
+    abilities_before = roster.get_ability_count()
+    start = time.perf_counter()
+    build_characters(roster, characters)
+    ready = time.perf_counter() - start
+    abilities = roster.get_ability_count() - abilities_before
+    report(f'  time to ready: {ready / characters * 1000.0:.2f}ms per character, {format_rate(abilities, ready, "abilities")}')
+    # memory pass
+    gc.collect()
+    tracemalloc.start()
+    memory_start, _ = tracemalloc.get_traced_memory()
+    build_characters(roster, characters)
+    memory_ready, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report(f'  memory: {(memory_ready - memory_start) / characters / 1024.0:.1f}KiB per character when ready')
+    return ready
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Measure time to ready and memory per character when building abilities through PlayerConfig')
+    arg_parser.add_argument('--characters', type=int, default=24)
+    arg_parser.add_argument('--abilities', type=int, default=300, help='abilities per character')
+    args = arg_parser.parse_args()
+    shared_vars_dir = tempfile.TemporaryDirectory()
+    try:
+        roster = _Roster(args.abilities, shared_vars_dir.name)
+        # warm up caches which are shared by both modes
+        roster.add_character()
+        print(f'{args.characters} characters, {args.abilities} abilities each')
+        run_roster(roster, args.characters)
+    finally:
+        # registry saves its shared vars on close
+        cleanup_manager.close_all()
+        shared_vars_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -353,11 +353,16 @@ class AbilityBuilder:
                 new_value = fn(ext_data, census_data)
                 census_data.__setattr__(prop, new_value)
 
-    def __new_ext_data_object(self) -> Optional[AbilityExtConsts]:
+    def __get_ext_data_object(self) -> Optional[AbilityExtConsts]:
         """
-            creates new ext data, it can be modified for different players
+            shares ext data of the locator between players, a copy is made only if this builder modifies it
         """
-        return self.locator.get_ext_object().make_copy()
+        ext_data = self.locator.get_ext_object()
+        if PARSE_CENSUS_EFFECTS and ext_data.has_census:
+            return ext_data.make_copy()
+        if any(hasattr(ext_data, prop) for prop, _ in self.__modifiers_set):
+            return ext_data.make_copy()
+        return ext_data
 
     def __new_census_data_object(self, player: IPlayer, has_census: bool) -> Optional[AbilityCensusConsts]:
         """
@@ -376,8 +381,8 @@ class AbilityBuilder:
                 orig_census_consts = self.locator.get_census_object_by_tier(self.__class_level, self.__tier)
             if orig_census_consts is None:
                 return None
-            # make a copy to allow modifications for different players
-            census_consts = orig_census_consts.make_copy()
+            # locator creates a new object, it can be modified for this player
+            census_consts = orig_census_consts
         else:
             assert isinstance(self.__census_data, AbilityCensusConsts)
             census_consts = AbilityCensusConsts()
@@ -451,7 +456,7 @@ class AbilityBuilder:
         return target_action
 
     def build_ability(self, player: IPlayer, builder_tools: BuilderTools, ability_factory: IAbilityFactory) -> List[IAbility]:
-        ext_consts = self.__new_ext_data_object()
+        ext_consts = self.__get_ext_data_object()
         census_consts = self.__new_census_data_object(player, ext_consts.has_census)
         if not census_consts:
             level = LogLevel.DEBUG if self.__optional else LogLevel.WARN
@@ -462,7 +467,6 @@ class AbilityBuilder:
         resolved_targets = self.__resolve_targets(player, ext_consts)
         abilities_built = list()
         for resolved_target in resolved_targets:
-            # factory internally creates a copy of Ext data object to allow modifications
             ability = ability_factory.create_ability(self.locator, player, census_consts, ext_consts)
             if resolved_target:
                 ability.set_target(resolved_target)
@@ -12,7 +12,7 @@ from rka.eq2.master.game.ability import AbilityEffectTarget, AbilityPriority, Ab
 from rka.eq2.master.game.census import CensusTopFields, CensusNestedFields
 from rka.eq2.master.game.player import PlayerStatus
 from rka.services.api.census import TCensusStruct
-from rka.util.util import NameEnum
+from rka.util.util import NameEnum, monotonic_from_timestamp, timestamp_from_monotonic
 
 
 class ExtFields(NameEnum):
@@ -303,24 +303,61 @@ class AbilitySharedVars:
     class SharedVarsJSONEncoder(JSONEncoder):
         def default(self, o):
             if isinstance(o, AbilitySharedVars):
-                return {k: v for k, v in o.__dict__.items() if k in PersistentSharedVarsFields.__members__}
+                return {k: getattr(o, k) for k in PersistentSharedVarsFields.__members__}
             if isinstance(o, datetime.datetime):
                 return o.strftime(AbilitySharedVars.CAST_TIME_FORMAT)
             return super().default(o)
 
     def __init__(self):
-        # serializable fields start with 'last_'
-        self.last_cast_time: Optional[datetime.datetime] = None
-        self.last_expired_time: Optional[datetime.datetime] = None
+        # serializable fields start with 'last_'; cast and expire times are time.monotonic() values, saved as datetime;
+        # confirm time is a time.monotonic() value too, saved as timestamp
+        self.last_cast_at: Optional[float] = None
+        self.last_expired_at: Optional[float] = None
         self.last_target_name: Optional[str] = None
         self.last_effective_casting = 0.0
         self.last_effective_reuse = 0.0
         self.last_effective_recovery = 0.0
         self.last_effective_duration = 0.0
-        self.last_confirm_time = 0.0
+        self.last_confirm_at: Optional[float] = None
         # fields not saved as persistent
         self.enabled_at: Optional[float] = 0.0  # None means the ability is disabled
-        self.previous_last_cast_time: Optional[datetime.datetime] = None
+        self.previous_last_cast_at: Optional[float] = None
+
+    @staticmethod
+    def __to_datetime(monotonic: Optional[float]) -> Optional[datetime.datetime]:
+        if monotonic is None:
+            return None
+        return datetime.datetime.fromtimestamp(timestamp_from_monotonic(monotonic))
+
+    @staticmethod
+    def __to_monotonic(dt: Optional[datetime.datetime]) -> Optional[float]:
+        if dt is None:
+            return None
+        return monotonic_from_timestamp(dt.timestamp())
+
+    @property
+    def last_cast_time(self) -> Optional[datetime.datetime]:
+        return AbilitySharedVars.__to_datetime(self.last_cast_at)
+
+    @last_cast_time.setter
+    def last_cast_time(self, last_cast_time: Optional[datetime.datetime]):
+        self.last_cast_at = AbilitySharedVars.__to_monotonic(last_cast_time)
+
+    @property
+    def last_expired_time(self) -> Optional[datetime.datetime]:
+        return AbilitySharedVars.__to_datetime(self.last_expired_at)
+
+    @last_expired_time.setter
+    def last_expired_time(self, last_expired_time: Optional[datetime.datetime]):
+        self.last_expired_at = AbilitySharedVars.__to_monotonic(last_expired_time)
+
+    @property
+    def last_confirm_time(self) -> float:
+        return timestamp_from_monotonic(self.last_confirm_at) if self.last_confirm_at is not None else 0.0
+
+    @last_confirm_time.setter
+    def last_confirm_time(self, last_confirm_time: float):
+        self.last_confirm_at = monotonic_from_timestamp(last_confirm_time) if last_confirm_time else None
 
     def set_shared_vars(self, var_data_dict: Dict):
         if var_data_dict[PersistentSharedVarsFields.last_cast_time.value] is not None:
@@ -1,16 +1,61 @@
 from __future__ import annotations
 
-import datetime
-from typing import Optional, Iterable, Union, List
+from typing import Optional, Iterable, Union, List, Tuple
 
+from rka.eq2.configs.shared.rka_constants import ABILITY_FILTER_REORDER
 from rka.eq2.master import IRuntime
 from rka.eq2.master.game.ability import HOIcon, AbilityPriority, logger, AbilityEffectTarget, AbilityType, AbilitySpecial, PRIORITY_ADJUSTMENT_MARGIN
 from rka.eq2.master.game.gameclass import GameClasses, GameClass
-from rka.eq2.master.game.interfaces import IAbility, TAbilityFilter, IPlayer, TValidTarget, TOptionalPlayer, IAbilityLocator
+from rka.eq2.master.game.interfaces import IAbility, TAbilityFilter, IPlayer, TValidTarget, TOptionalPlayer, IAbilityLocator, TAbilityTime
 from rka.eq2.master.game.player import PlayerStatus
 from rka.eq2.shared import Groups, ClientFlags
 
 
+# flat tuple of AND-ed predicates; the order is changed once, by rejection rates measured on the first evaluations
+class _CompiledPredicates:
+    SELECTIVITY_SAMPLES = 500
+
+    def __init__(self, predicates: List[TAbilityFilter]):
+        self.predicates: Tuple[TAbilityFilter, ...] = tuple(predicates)
+        self.sampling = ABILITY_FILTER_REORDER and len(self.predicates) > 1
+        self.__tested = [0] * len(self.predicates)
+        self.__rejected = [0] * len(self.predicates)
+        self.__samples_left = _CompiledPredicates.SELECTIVITY_SAMPLES
+
+    def __reorder(self):
+        # counters are not synchronized, they are only estimates
+        rates = [rejected / tested if tested else 0.0 for tested, rejected in zip(self.__tested, self.__rejected)]
+        order = sorted(range(len(self.predicates)), key=lambda i: rates[i], reverse=True)
+        self.predicates = tuple(self.predicates[i] for i in order)
+        self.sampling = False
+
+    def accept_sampled(self, ability: IAbility) -> bool:
+        accepted = True
+        for i, predicate in enumerate(self.predicates):
+            self.__tested[i] += 1
+            if not predicate(ability):
+                self.__rejected[i] += 1
+                accepted = False
+                break
+        self.__samples_left -= 1
+        if self.__samples_left <= 0:
+            self.__reorder()
+        return accepted
+
+    def apply_sampled(self, abilities: List[IAbility]) -> List[IAbility]:
+        for i, predicate in enumerate(self.predicates):
+            if not abilities:
+                break
+            tested = len(abilities)
+            abilities = [ability for ability in abilities if predicate(ability)]
+            self.__tested[i] += tested
+            self.__rejected[i] += tested - len(abilities)
+            self.__samples_left -= tested
+        if self.__samples_left <= 0:
+            self.__reorder()
+        return abilities
+
+
 class AbilityFilter(TAbilityFilter):
     @staticmethod
     def _exclude_one_or_none(player: TOptionalPlayer, ability: IAbility) -> bool:
@@ -52,32 +97,69 @@ class AbilityFilter(TAbilityFilter):
             return player == ability.player.get_player_name()
         assert False, player
 
+    @staticmethod
+    def _flatten(filter_cb: TAbilityFilter) -> List[TAbilityFilter]:
+        # nested filters, including filter tasks, are merged into one level of predicates
+        get_predicates = getattr(filter_cb, 'get_predicates', None)
+        if get_predicates is not None:
+            return get_predicates()
+        return [filter_cb]
+
     def __init__(self, filter_cb: Optional[TAbilityFilter] = None):
         self._filter_cb = filter_cb
+        self.__compiled: Optional[_CompiledPredicates] = None
+
+    def _invalidate(self):
+        self.__compiled = None
 
     def _add_filter(self, filter_cb: TAbilityFilter) -> AbilityFilter:
         if self._filter_cb is None:
             self._filter_cb = filter_cb
+            self._invalidate()
             return self
         maf = MultipleAbilityFilter(self._filter_cb)
         maf.op_and(filter_cb)
         return maf
 
+    def get_predicates(self) -> List[TAbilityFilter]:
+        if self._filter_cb is None:
+            return []
+        return AbilityFilter._flatten(self._filter_cb)
+
+    # filters are compiled on first use; changes of nested filters made after that are not seen
+    def __compile(self) -> _CompiledPredicates:
+        compiled = self.__compiled
+        if compiled is None:
+            compiled = _CompiledPredicates(self.get_predicates())
+            self.__compiled = compiled
+        return compiled
+
     def __call__(self, ability: IAbility) -> bool:
-        if self._filter_cb:
-            return self._filter_cb(ability)
+        compiled = self.__compiled or self.__compile()
+        if compiled.sampling:
+            return compiled.accept_sampled(ability)
+        for predicate in compiled.predicates:
+            if not predicate(ability):
+                return False
         return True
 
     def accept_ability(self, ability: IAbility) -> bool:
-        if self._filter_cb:
-            return self._filter_cb(ability)
-        return True
+        return self(ability)
 
+    # vectorized: each predicate is evaluated over the remaining abilities at once
     def apply(self, abilities: Iterable[IAbility]) -> List[IAbility]:
-        return list(filter(self.accept_ability, abilities))
+        compiled = self.__compiled or self.__compile()
+        accepted = list(abilities)
+        if compiled.sampling:
+            return compiled.apply_sampled(accepted)
+        for predicate in compiled.predicates:
+            if not accepted:
+                break
+            accepted = [ability for ability in accepted if predicate(ability)]
+        return accepted
 
     def print_debug(self, ability: IAbility):
-        for flt in self._filters:
+        for flt in self.get_predicates():
             accepted = flt(ability)
             logger.debug(f'testing {ability}, filter: {flt}, result {accepted}')
 
@@ -211,16 +293,16 @@ class AbilityFilter(TAbilityFilter):
     def not_heroic_op(self, icon_heroic_op: HOIcon) -> AbilityFilter:
         return self._add_filter(lambda ability: ability.census.icon_heroic_op != icon_heroic_op)
 
-    def casting_or_in_duration(self, now: Optional[datetime.datetime] = None) -> AbilityFilter:
+    def casting_or_in_duration(self, now: TAbilityTime = None) -> AbilityFilter:
         return self._add_filter(lambda ability: ability.is_casting(now) or not ability.is_duration_expired(now))
 
-    def in_duration(self, now: Optional[datetime.datetime] = None) -> AbilityFilter:
+    def in_duration(self, now: TAbilityTime = None) -> AbilityFilter:
         return self._add_filter(lambda ability: not ability.is_duration_expired(now))
 
-    def reusable(self, now: Optional[datetime.datetime] = None) -> AbilityFilter:
+    def reusable(self, now: TAbilityTime = None) -> AbilityFilter:
         return self._add_filter(lambda ability: ability.is_reusable(now))
 
-    def expired(self, now: Optional[datetime.datetime] = None) -> AbilityFilter:
+    def expired(self, now: TAbilityTime = None) -> AbilityFilter:
         return self._add_filter(lambda ability: ability.is_duration_expired(now))
 
     def maintained(self) -> AbilityFilter:
@@ -380,18 +462,12 @@ class MultipleAbilityFilter(AbilityFilter):
     # Override
     def _add_filter(self, filter_cb: TAbilityFilter) -> AbilityFilter:
         self._filters.append(filter_cb)
+        self._invalidate()
         return self
 
     # Override
-    def __call__(self, ability: IAbility) -> bool:
-        for flt in self._filters:
-            if not flt(ability):
-                return False
-        return True
-
-    # Override
-    def accept_ability(self, ability: IAbility) -> bool:
+    def get_predicates(self) -> List[TAbilityFilter]:
+        predicates = list()
         for flt in self._filters:
-            if not flt(ability):
-                return False
-        return True
+            predicates += AbilityFilter._flatten(flt)
+        return predicates
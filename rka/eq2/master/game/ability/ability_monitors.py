@@ -1,9 +1,11 @@
 import time
-from typing import List
+from threading import Lock
+from typing import List, Dict
 
 from rka.components.events import Event
-from rka.components.events.event_system import EventSystem
+from rka.components.events.event_system import EventSystem, IEventBus
 from rka.components.io.log_service import LogService
+from rka.eq2.configs.shared.rka_constants import ABILITY_MONITOR_HUB
 from rka.eq2.master import RequiresRuntime
 from rka.eq2.master.game.events.combat import CombatEvents
 from rka.eq2.master.game.events.combat_parser import CombatParserEvents
@@ -23,10 +25,17 @@ class AbstractAbilityMonitor(IAbilityMonitor):
     def notify_monitor(self, ability: IAbility, event: Event, timestamp: float):
         raise NotImplementedError()
 
+    # subscription events can be shared by many abilities, this narrows events down to the ability
+    def accepts_event(self, ability: IAbility, event: Event) -> bool:
+        return True
+
     def start_monitoring(self, ability: IAbility) -> IRunningAbilityMonitor:
         subscription_event = self.get_subscription_event(ability)
         running_monitor = RunningAbilityMonitor(self, ability, subscription_event)
-        EventSystem.get_main_bus().subscribe(subscription_event, running_monitor.event_callback)
+        if ABILITY_MONITOR_HUB:
+            ability_monitor_hub.add_running_monitor(running_monitor)
+        else:
+            EventSystem.get_main_bus().subscribe(subscription_event, running_monitor.event_callback)
         return running_monitor
 
 
@@ -35,8 +44,11 @@ class RunningAbilityMonitor(IRunningAbilityMonitor):
         self.monitor = monitor
         self.ability = ability
         self.subscribed_event = subscribed_event
+        self.in_hub = False
 
     def event_callback(self, event: Event):
+        if not self.monitor.accepts_event(self.ability, event):
+            return
         if 'timestamp' in event.param_names:
             timestamp = event.get_param('timestamp')
         else:
@@ -44,12 +56,72 @@ class RunningAbilityMonitor(IRunningAbilityMonitor):
         self.monitor.notify_monitor(self.ability, event, timestamp)
 
     def stop_monitoring(self):
-        EventSystem.get_main_bus().unsubscribe(self.subscribed_event, self.event_callback)
+        if self.in_hub:
+            ability_monitor_hub.remove_running_monitor(self)
+        else:
+            EventSystem.get_main_bus().unsubscribe(self.subscribed_event, self.event_callback)
 
     def start_for_clone(self, ability: IAbility) -> IRunningAbilityMonitor:
         return self.monitor.start_monitoring(ability)
 
 
+class _HubSubscription:
+    def __init__(self, bus: IEventBus, subscribed_event: Event):
+        self.bus = bus
+        self.subscribed_event = subscribed_event
+        # replaced, never modified, when monitors are added or removed; events are routed without locking
+        self.running_monitors: List[RunningAbilityMonitor] = list()
+
+    def route_event(self, event: Event):
+        for running_monitor in self.running_monitors:
+            running_monitor.event_callback(event)
+
+
+class AbilityMonitorHub:
+    """
+        keeps one bus subscription per distinct subscription event and routes received events to running monitors,
+        instead of subscribing every monitored ability and clone on the bus separately
+    """
+
+    def __init__(self):
+        self.__lock = Lock()
+        # subscription event description -> subscription
+        self.__subscriptions: Dict[str, _HubSubscription] = dict()
+
+    def add_running_monitor(self, running_monitor: RunningAbilityMonitor):
+        subscription_key = str(running_monitor.subscribed_event)
+        with self.__lock:
+            subscription = self.__subscriptions.get(subscription_key)
+            if subscription is None:
+                bus = EventSystem.get_main_bus()
+                subscription = _HubSubscription(bus, running_monitor.subscribed_event)
+                self.__subscriptions[subscription_key] = subscription
+                bus.subscribe(subscription.subscribed_event, subscription.route_event)
+            subscription.running_monitors = subscription.running_monitors + [running_monitor]
+            running_monitor.in_hub = True
+
+    def remove_running_monitor(self, running_monitor: RunningAbilityMonitor):
+        subscription_key = str(running_monitor.subscribed_event)
+        with self.__lock:
+            subscription = self.__subscriptions.get(subscription_key)
+            if not subscription or running_monitor not in subscription.running_monitors:
+                logger.warn(f'monitor of {running_monitor.ability} not found for {subscription_key}')
+                return
+            subscription.running_monitors = [monitor for monitor in subscription.running_monitors if monitor is not running_monitor]
+            running_monitor.in_hub = False
+            if subscription.running_monitors:
+                return
+            del self.__subscriptions[subscription_key]
+            subscription.bus.unsubscribe(subscription.subscribed_event, subscription.route_event)
+
+    def get_subscription_count(self) -> int:
+        with self.__lock:
+            return len(self.__subscriptions)
+
+
+ability_monitor_hub = AbilityMonitorHub()
+
+
 class EventAbilityCastingStartedMonitor(AbstractAbilityMonitor):
     def __init__(self, event_template: Event):
         AbstractAbilityMonitor.__init__(self)
@@ -91,12 +163,13 @@ class WardExpirationMonitor(AbstractAbilityMonitor):
         AbstractAbilityMonitor.__init__(self)
 
     def get_subscription_event(self, ability: IAbility) -> Event:
-        if ability.get_target():
-            target_name = ability.get_target().get_target_name()
-            event = CombatParserEvents.WARD_EXPIRED(caster_name=ability.player.get_player_name(), ability_name=ability.ext.ability_name, target_name=target_name)
-        else:
-            event = CombatParserEvents.WARD_EXPIRED(caster_name=ability.player.get_player_name(), ability_name=ability.ext.ability_name)
-        return event
+        # same for all targets, so that clones of the ability share the subscription
+        return CombatParserEvents.WARD_EXPIRED(caster_name=ability.player.get_player_name(), ability_name=ability.ext.ability_name)
+
+    def accepts_event(self, ability: IAbility, event: CombatParserEvents.WARD_EXPIRED) -> bool:
+        if not ability.get_target():
+            return True
+        return event.is_param_set('target_name') and event.target_name == ability.get_target().get_target_name()
 
     def notify_monitor(self, ability: IAbility, event: Event, timestamp: float):
         ability.expire_duration(when=timestamp)
@@ -132,9 +205,12 @@ class BulwarkCastingCompletedMonitor(AbstractAbilityMonitor, RequiresRuntime):
 
 
 class DefaultMonitorsFactory:
+    # monitor has no state of its own, one instance is used for all abilities
+    __ward_expiration_monitor = WardExpirationMonitor()
+
     @staticmethod
     def create_default_monitors(ability: IAbility) -> List[IAbilityMonitor]:
         monitors = list()
         if ability.ext.ward_expires and not (ability.census.does_not_expire or ability.ext.maintained):
-            monitors.append(WardExpirationMonitor())
+            monitors.append(DefaultMonitorsFactory.__ward_expiration_monitor)
         return monitors
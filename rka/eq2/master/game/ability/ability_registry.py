@@ -11,11 +11,11 @@ from rka.eq2.master.game.interfaces import IAbility, IAbilityLocator, IAbilityRe
 
 
 class AbilityRegistry(IAbilityRegistry, Closeable):
-    def __init__(self):
+    def __init__(self, shared_vars_db_filepath: Optional[str] = None):
         Closeable.__init__(self, explicit_close=False)
         self.__lock = RLock()
         self.__shared_vars_registry: Dict[str, AbilitySharedVars] = dict()
-        self.__shared_vars_db_filepath = ability_saved_shared_data_filepath()
+        self.__shared_vars_db_filepath = shared_vars_db_filepath if shared_vars_db_filepath else ability_saved_shared_data_filepath()
         self.__ability_names: Dict[str, IAbilityLocator] = dict()
         self.__ability_registry: Dict[str, List[IAbility]] = dict()
         self.__ability_effect_names: Dict[str, str] = dict()
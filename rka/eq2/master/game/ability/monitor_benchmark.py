@@ -0,0 +1,187 @@
+import argparse
+import random
+import time
+from typing import Callable, List, Optional
+
+from rka.components.cleanup import cleanup_manager
+from rka.components.events import Event
+from rka.components.events.event_bus import EventBusFactory
+from rka.components.events.event_system import EventSystem
+from rka.eq2.master.game.ability import ability_monitors
+from rka.eq2.master.game.ability.ability_monitors import EventAbilityCastingCompletedMonitor, WardExpirationMonitor, ability_monitor_hub
+from rka.eq2.master.game.events.combat_parser import CombatParserEvents
+from rka.eq2.master.game.interfaces import IAbility, IPlayer, AbilityTarget, IRunningAbilityMonitor
+from rka.util.benchmark import format_rate
+
+
+class _BenchmarkPlayer(IPlayer):
+    def __init__(self, name: str):
+        self.__name = name
+
+    def get_player_name(self) -> str:
+        return self.__name
+
+    def get_player_id(self) -> str:
+        return f'benchmark.{self.__name}'
+
+
+class _BenchmarkPlayerManager:
+    # noinspection PyMethodMayBeStatic
+    def resolve_player(self, _target) -> None:
+        return None
+
+
+class _BenchmarkExt:
+    def __init__(self, ability_name: str):
+        self.ability_name = ability_name
+
+
+class _BenchmarkAbility(IAbility):
+    def __init__(self, player: _BenchmarkPlayer, ability_id: int, target: Optional[AbilityTarget]):
+        self.player = player
+        self.ext = _BenchmarkExt(f'ability {ability_id}')
+        self.__unique_key = IAbility.make_ability_unique_key(player.get_player_id(), str(ability_id))
+        self.__target = target
+        self.notifications = 0
+
+    def __str__(self):
+        return self.__unique_key
+
+    def ability_unique_key(self) -> str:
+        return self.__unique_key
+
+    def get_target(self) -> Optional[AbilityTarget]:
+        return self.__target
+
+    def confirm_casting_completed(self, cancel_action: bool, when: Optional[float] = None):
+        self.notifications += 1
+
+    def expire_duration(self, when: Optional[float] = None):
+        self.notifications += 1
+
+
+class _MonitoredRoster:
+    def __init__(self, characters: int, abilities_per_character: int, targeted_every: int, targets: int, ward_every: int):
+        self.players = [_BenchmarkPlayer(f'character{character_id}') for character_id in range(characters)]
+        self.abilities: List[_BenchmarkAbility] = list()
+        self.ward_abilities: List[_BenchmarkAbility] = list()
+        self.running_monitors: List[IRunningAbilityMonitor] = list()
+        ward_monitor = WardExpirationMonitor()
+        player_mgr = _BenchmarkPlayerManager()
+        for player in self.players:
+            for ability_id in range(abilities_per_character):
+                # same template for the ability and all its clones, like AbilityBuilder.casting_confirm_by_combat_event
+                casting_monitor = EventAbilityCastingCompletedMonitor(
+                    CombatParserEvents.COMBAT_HIT(attacker_name=player.get_player_name(), ability_name=f'ability {ability_id}',
+                                                  is_multi=False, is_autoattack=False, is_dot=False))
+                is_ward = ward_every > 0 and ability_id % ward_every == 0
+                if targeted_every > 0 and ability_id % targeted_every == 0:
+                    variant_targets = [AbilityTarget(f'member{target_id}', player_mgr) for target_id in range(targets)]
+                else:
+                    variant_targets = [None]
+                for target in variant_targets:
+                    # noinspection PyTypeChecker
+                    ability = _BenchmarkAbility(player, ability_id, target)
+                    self.abilities.append(ability)
+                    monitors = [casting_monitor]
+                    if is_ward:
+                        self.ward_abilities.append(ability)
+                        monitors.append(ward_monitor)
+                    for monitor in monitors:
+                        # noinspection PyTypeChecker
+                        self.running_monitors.append(monitor.start_monitoring(ability))
+
+    def replace_with_clone(self, monitor_id: int):
+        # a clone starts monitoring while its prototype is still monitored
+        running_monitor = self.running_monitors[monitor_id]
+        self.running_monitors[monitor_id] = running_monitor.start_for_clone(running_monitor.ability)
+        running_monitor.stop_monitoring()
+
+    def stop(self):
+        for running_monitor in self.running_monitors:
+            running_monitor.stop_monitoring()
+        self.running_monitors.clear()
+
+    def notifications(self) -> int:
+        return sum(ability.notifications for ability in self.abilities)
+
+
+def generate_events(roster: _MonitoredRoster, count: int, seed: int) -> List[Event]:
+    rng = random.Random(seed)
+    events = list()
+    for event_id in range(count):
+        kind = event_id % 4
+        if kind == 0 and roster.ward_abilities:
+            ability = rng.choice(roster.ward_abilities)
+            target = ability.get_target()
+            events.append(CombatParserEvents.WARD_EXPIRED(caster_name=ability.player.get_player_name(), ability_name=ability.ext.ability_name,
+                                                          target_name=target.get_target_name() if target else 'npc', timestamp=0.0))
+        elif kind == 1:
+            ability = rng.choice(roster.abilities)
+            events.append(CombatParserEvents.COMBAT_HIT(attacker_name=ability.player.get_player_name(), ability_name=ability.ext.ability_name,
+                                                        is_multi=False, is_autoattack=False, is_dot=False, timestamp=0.0))
+        else:
+            # most combat hits are not from monitored abilities
+            events.append(CombatParserEvents.COMBAT_HIT(attacker_name=f'npc{rng.randrange(20)}', ability_name=f'ability {rng.randrange(100)}',
+                                                        is_multi=False, is_autoattack=False, is_dot=False, timestamp=0.0))
+    return events
+
+
+def run_dispatch(use_hub: bool, args: argparse.Namespace, report: Callable[[str], None] = print) -> float:
+    ability_monitors.ABILITY_MONITOR_HUB = use_hub
+    bus = EventSystem.get_main_bus()
+    start = time.perf_counter()
+    roster = _MonitoredRoster(args.characters, args.abilities, args.targeted_every, args.targets, args.ward_every)
+    started = time.perf_counter() - start
+    events = generate_events(roster, args.events, 0)
+    subscriptions = ability_monitor_hub.get_subscription_count() if use_hub else len(roster.running_monitors)
+    report(f'{"hub" if use_hub else "per-monitor"} subscriptions: {len(roster.running_monitors)} running monitors, {subscriptions} bus subscriptions')
+    report(f'  start monitoring: {format_rate(len(roster.running_monitors), started, "monitors")}')
+    # first pass fills dispatch tables of the bus
+    for event in events:
+        bus.call(event)
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for event in events:
+            bus.call(event)
+    elapsed = time.perf_counter() - start
+    report(f'  dispatch: {format_rate(len(events) * args.rounds, elapsed, "events")}, notifications: {roster.notifications()}')
+    # clones start and stop monitoring while events are dispatched
+    rng = random.Random(1)
+    churn_elapsed = 0.0
+    for _ in range(args.rounds):
+        for event_id, event in enumerate(events):
+            if args.churn_every > 0 and event_id % args.churn_every == 0:
+                roster.replace_with_clone(rng.randrange(len(roster.running_monitors)))
+            start = time.perf_counter()
+            bus.call(event)
+            churn_elapsed += time.perf_counter() - start
+    report(f'  dispatch with monitor churn: {format_rate(len(events) * args.rounds, churn_elapsed, "events")}')
+    start = time.perf_counter()
+    roster.stop()
+    report(f'  stop monitoring: {format_rate(len(roster.abilities), time.perf_counter() - start, "abilities")}')
+    return len(events) * args.rounds / churn_elapsed if churn_elapsed > 0.0 else 0.0
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Compare bus dispatch with ability monitors subscribed separately and through the monitor hub')
+    arg_parser.add_argument('--characters', type=int, default=24)
+    arg_parser.add_argument('--abilities', type=int, default=60, help='monitored abilities per character')
+    arg_parser.add_argument('--targeted-every', type=int, default=4, help='every n-th ability is cloned for each target, 0 to disable')
+    arg_parser.add_argument('--targets', type=int, default=6, help='clones of targeted abilities')
+    arg_parser.add_argument('--ward-every', type=int, default=8, help='every n-th ability is a ward, 0 to disable')
+    arg_parser.add_argument('--events', type=int, default=2000)
+    arg_parser.add_argument('--rounds', type=int, default=5)
+    arg_parser.add_argument('--churn-every', type=int, default=20, help='a monitor is replaced by a clone every n events, 0 to disable')
+    args = arg_parser.parse_args()
+    try:
+        EventSystem.get_main_system(EventBusFactory())
+        separate = run_dispatch(False, args)
+        hub = run_dispatch(True, args)
+        print(f'  hub/per-monitor dispatch with churn: {hub / separate if separate else 0.0:.2f}x')
+    finally:
+        cleanup_manager.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+from rka.components.cleanup import cleanup_manager
+from rka.eq2.master.game.ability.ability import Ability
+from rka.eq2.master.game.ability.ability_data import AbilitySharedVars, AbilityExtConsts, AbilityCensusConsts
+from rka.eq2.master.game.effect import EffectType, EffectScopeType
+from rka.eq2.master.game.effect.effect_builder import EffectBuilder
+from rka.eq2.master.game.effect.effect_mgr import EffectsManager
+from rka.eq2.master.game.interfaces import IPlayer, IEffect, IEffectsManager, EffectTarget
+from rka.eq2.master.game.player import PlayerStatus
+from rka.util.benchmark import format_rate
+
+
+class _BenchmarkPlayer(IPlayer):
+    def __init__(self, name: str):
+        self.__name = name
+        self.__effect_target = EffectTarget(player=self)
+
+    def get_player_name(self) -> str:
+        return self.__name
+
+    def get_player_manager(self):
+        return None
+
+    def get_status(self) -> PlayerStatus:
+        return PlayerStatus.Zoned
+
+    def is_in_group_with(self, player: IPlayer) -> bool:
+        return True
+
+    def as_effect_target(self) -> EffectTarget:
+        return self.__effect_target
+
+
+class _RaidEffects:
+    def __init__(self, effects_mgr: IEffectsManager, players: int, abilities_per_player: int, npcs: int):
+        self.players: List[_BenchmarkPlayer] = [_BenchmarkPlayer(f'player{player_id}') for player_id in range(players)]
+        self.abilities: List[Ability] = list()
+        self.npc_targets = [EffectTarget(npc_name=f'npc{npc_id}') for npc_id in range(npcs)]
+        self.by_ability: Dict[Ability, List[IEffect]] = dict()
+        self.by_player_scope: Dict[Tuple[str, EffectScopeType], List[IEffect]] = dict()
+        self.by_npc: Dict[str, List[IEffect]] = dict()
+        self.effect_count = 0
+        for player in self.players:
+            for ability_id in range(abilities_per_player):
+                census = AbilityCensusConsts()
+                census.duration = 10.0
+                # noinspection PyTypeChecker
+                ability = Ability(None, player, effects_mgr, AbilitySharedVars(), AbilityExtConsts(), census)
+                self.abilities.append(ability)
+                source = EffectTarget(ability=ability)
+                npc_target = self.npc_targets[ability_id % npcs]
+                self.__add(ability, EffectBuilder(EffectScopeType.PLAYER).add(EffectType.CASTING_SPEED, 1.0), player.as_effect_target(), source, effects_mgr)
+                self.__add(ability, EffectBuilder(EffectScopeType.GROUP).add(EffectType.REUSE_SPEED, 1.0), player.as_effect_target(), source, effects_mgr)
+                self.__add(ability, EffectBuilder(EffectScopeType.NON_PLAYER).mul(EffectType.DURATION, 0.1), npc_target, source, effects_mgr)
+
+    def __add(self, ability: Ability, builder: EffectBuilder, target: EffectTarget, source: EffectTarget, effects_mgr: IEffectsManager):
+        builder.set_effect_name(f'{ability.player.get_player_name()}.effect{self.effect_count}')
+        effect = builder.build_effect(effects_mgr, sustain_target=target, sustain_source=source)
+        self.by_ability.setdefault(ability, list()).append(effect)
+        self.by_player_scope.setdefault((ability.player.get_player_name(), effect.effect_scope().scope_type()), list()).append(effect)
+        if target.npc_name():
+            self.by_npc.setdefault(target.npc_name(), list()).append(effect)
+        self.effect_count += 1
+
+    def start_all(self):
+        for effects in self.by_ability.values():
+            for effect in effects:
+                effect.start_effect()
+
+
+def measure(name: str, rounds: int, cancel: Callable[[int], List[IEffect]], report: Callable[[str], None]) -> float:
+    elapsed = 0.0
+    for round_id in range(rounds):
+        start = time.perf_counter()
+        cancelled = cancel(round_id)
+        elapsed += time.perf_counter() - start
+        # restore the effect set for the next round, not measured
+        for effect in cancelled:
+            effect.start_effect()
+    report(f'  {name}: {format_rate(rounds, elapsed, "cancels")}')
+    return rounds / elapsed if elapsed > 0.0 else 0.0
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Compare indexed EffectsManager.cancel_effects with predicate scans of all effects')
+    arg_parser.add_argument('--players', type=int, default=24)
+    arg_parser.add_argument('--abilities', type=int, default=50, help='abilities per player, each sustaining 3 effects')
+    arg_parser.add_argument('--npcs', type=int, default=10)
+    arg_parser.add_argument('--rounds', type=int, default=500)
+    args = arg_parser.parse_args()
+    try:
+        effects_mgr = EffectsManager()
+        raid = _RaidEffects(effects_mgr, args.players, args.abilities, args.npcs)
+        raid.start_all()
+        rng = random.Random(0)
+        abilities = [rng.choice(raid.abilities) for _ in range(args.rounds)]
+        players = [rng.choice(raid.players) for _ in range(args.rounds)]
+        npc_targets = [rng.choice(raid.npc_targets) for _ in range(args.rounds)]
+        print(f'{args.players} players, {raid.effect_count} active effects, {args.rounds} rounds')
+        print('effects of an ability')
+
+        def by_ability_indexed(i: int) -> List[IEffect]:
+            effects_mgr.cancel_effects(source_ability=abilities[i])
+            return raid.by_ability[abilities[i]]
+
+        def by_ability_scan(i: int) -> List[IEffect]:
+            effects_mgr.cancel_effects(lambda effect: effect.sustain_source().ability() is abilities[i])
+            return raid.by_ability[abilities[i]]
+
+        indexed = measure('indexed', args.rounds, by_ability_indexed, print)
+        scan = measure('scan', args.rounds, by_ability_scan, print)
+        print(f'  indexed/scan: {indexed / scan if scan else 0.0:.1f}x')
+        print('group effects cast by a player')
+
+        def by_player_indexed(i: int) -> List[IEffect]:
+            effects_mgr.cancel_effects(source_player=players[i], scope_type=EffectScopeType.GROUP)
+            return raid.by_player_scope[(players[i].get_player_name(), EffectScopeType.GROUP)]
+
+        def by_player_scan(i: int) -> List[IEffect]:
+            effects_mgr.cancel_effects(lambda effect: effect.sustain_source().player() is players[i]
+                                       and effect.effect_scope().scope_type() == EffectScopeType.GROUP)
+            return raid.by_player_scope[(players[i].get_player_name(), EffectScopeType.GROUP)]
+
+        indexed = measure('indexed', args.rounds, by_player_indexed, print)
+        scan = measure('scan', args.rounds, by_player_scan, print)
+        print(f'  indexed/scan: {indexed / scan if scan else 0.0:.1f}x')
+        print('effects on an NPC')
+
+        def by_target_indexed(i: int) -> List[IEffect]:
+            effects_mgr.cancel_effects(sustain_target=npc_targets[i])
+            return raid.by_npc[npc_targets[i].npc_name()]
+
+        def by_target_scan(i: int) -> List[IEffect]:
+            npc_name = npc_targets[i].npc_name()
+            effects_mgr.cancel_effects(lambda effect: effect.sustain_target() is not None and effect.sustain_target().npc_name() == npc_name)
+            return raid.by_npc[npc_name]
+
+        indexed = measure('indexed', args.rounds, by_target_indexed, print)
+        scan = measure('scan', args.rounds, by_target_scan, print)
+        print(f'  indexed/scan: {indexed / scan if scan else 0.0:.1f}x')
+    finally:
+        cleanup_manager.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,14 +2,14 @@ from __future__ import annotations
 
 import time
 from threading import RLock
-from typing import Dict, List, Optional, Iterable, Tuple, Callable, Union
+from typing import Dict, List, Optional, Iterable, Tuple, Callable, Union, Any
 
 from rka.components.events.event_system import EventSystem, CloseableSubscriber
 from rka.eq2.configs.shared.rka_constants import ABILITY_GRANT_DELAY
 from rka.eq2.master.game.effect import EffectType, logger, EffectScopeType
 from rka.eq2.master.game.events.combat import CombatEvents
 from rka.eq2.master.game.events.object_state import ObjectStateEvents
-from rka.eq2.master.game.interfaces import IEffect, IEffectsManager, IPlayer, IAbilityLocator, TEffectValue, EffectTarget
+from rka.eq2.master.game.interfaces import IEffect, IEffectsManager, IPlayer, IAbility, IAbilityLocator, TEffectValue, EffectTarget
 from rka.eq2.master.game.player import PlayerStatus
 
 
@@ -67,24 +67,41 @@ class EffectsManager(IEffectsManager):
             self.__raid_effects[effect_type.name] = dict()
             self.__target_effects[effect_type.name] = dict()
             self.__ability_effects[effect_type.name] = dict()
+        # secondary indexes of active effects, each effect once regardless of its effect types
+        # {effect_key: effect}
+        self.__all_effects: Dict[str, IEffect] = dict()
+        # {index_key: {effect_key: effect}}, keyed by the ability and the player which sustain the effect, its target and its scope
+        self.__effects_by_source_ability: Dict[IAbility, Dict[str, IEffect]] = dict()
+        self.__effects_by_source_player: Dict[str, Dict[str, IEffect]] = dict()
+        self.__effects_by_target: Dict[str, Dict[str, IEffect]] = dict()
+        self.__effects_by_scope: Dict[EffectScopeType, Dict[str, IEffect]] = dict()
         self.__setup_event_listenters()
         self.__special_effects = SpecialEffectsHandler()
         self.__empty_dict = dict()
+        # resolved apply_effects() results, only valid for the generation they were computed in
+        self.__generation = 0
+        self.__resolved_values: Dict[Tuple[EffectType, EffectScopeType, str, Optional[IAbility], TEffectValue], Tuple[int, TEffectValue]] = dict()
 
     def __setup_event_listenters(self):
         bus = EventSystem.get_main_bus()
         bus.subscribe(CombatEvents.PLAYER_DIED(), self.__player_died)
         bus.subscribe(CombatEvents.PLAYER_REVIVED(), self.__player_revived)
+        # group and raid effects apply only to zoned players
+        bus.subscribe(ObjectStateEvents.PLAYER_STATUS_CHANGED(), lambda _event: self.clear_cache())
 
-    # noinspection PyMethodMayBeStatic
-    def __stop_effects_by_scope(self, effect: IEffect, player: IPlayer, scope: EffectScopeType) -> bool:
-        if effect.sustain_source() is not player:
-            return False
-        return effect.effect_scope().scope_type() == scope
+    def clear_cache(self):
+        with self.__lock:
+            self.__generation += 1
+            self.__resolved_values.clear()
+
+    @staticmethod
+    def __is_sourced_by_player_itself(effect: IEffect) -> bool:
+        # effects of the player's abilities have the ability as source; they are not restarted on revive
+        return effect.sustain_source().ability() is None
 
     def __player_died(self, event: CombatEvents.PLAYER_DIED):
-        self.cancel_effects(lambda effect: self.__stop_effects_by_scope(effect, event.player, EffectScopeType.RAID))
-        self.cancel_effects(lambda effect: self.__stop_effects_by_scope(effect, event.player, EffectScopeType.GROUP))
+        self.cancel_effects(EffectsManager.__is_sourced_by_player_itself, source_player=event.player, scope_type=EffectScopeType.RAID)
+        self.cancel_effects(EffectsManager.__is_sourced_by_player_itself, source_player=event.player, scope_type=EffectScopeType.GROUP)
 
     # noinspection PyMethodMayBeStatic
     def __player_revived(self, event: CombatEvents.PLAYER_REVIVED):
@@ -122,6 +139,36 @@ class EffectsManager(IEffectsManager):
             return self.__ability_effects[effect_type_key][target_key][ability_key]
         assert False, effect_scope_type
 
+    def __iter_effect_indexes(self, effect: IEffect) -> Iterable[Tuple[Dict[Any, Dict[str, IEffect]], Any]]:
+        source = effect.sustain_source()
+        if source.ability() is not None:
+            yield self.__effects_by_source_ability, source.ability()
+        if source.player() is not None:
+            yield self.__effects_by_source_player, source.player().get_player_name()
+        if effect.sustain_target() is not None:
+            yield self.__effects_by_target, effect.sustain_target().key()
+        yield self.__effects_by_scope, effect.effect_scope().scope_type()
+
+    def __index_effect(self, effect: IEffect):
+        effect_key = effect.effect_key()
+        self.__all_effects[effect_key] = effect
+        for index, index_key in self.__iter_effect_indexes(effect):
+            if index_key not in index:
+                index[index_key] = dict()
+            index[index_key][effect_key] = effect
+
+    def __unindex_effect(self, effect: IEffect):
+        effect_key = effect.effect_key()
+        self.__all_effects.pop(effect_key, None)
+        for index, index_key in self.__iter_effect_indexes(effect):
+            effects = index.get(index_key)
+            if effects is None:
+                continue
+            effects.pop(effect_key, None)
+            # do not keep abilities and targets of past effects
+            if not effects:
+                del index[index_key]
+
     def add_effect(self, effect: IEffect):
         effect_key = effect.effect_key()
         with self.__lock:
@@ -137,6 +184,8 @@ class EffectsManager(IEffectsManager):
                 if effect_key in effects.keys():
                     effects[effect_key].cancel_effect()
                 effects[effect_key] = effect
+            self.__index_effect(effect)
+            self.clear_cache()
         logger.info(f'add_effect: {effect}')
 
     def remove_effect(self, effect: IEffect):
@@ -155,31 +204,45 @@ class EffectsManager(IEffectsManager):
                 if effect_key in effects.keys():
                     del effects[effect_key]
                     removed = True
+            if removed:
+                self.__unindex_effect(effect)
+                self.clear_cache()
         if removed:
             logger.debug(f'remove_effect: removed effect {effect.effect_key()}')
 
-    def cancel_effects(self, effect_filter: Callable[[IEffect], bool]):
+    # criteria are combined; the smallest matching index is scanned, or all effects if only effect_filter is given
+    def cancel_effects(self, effect_filter: Optional[Callable[[IEffect], bool]] = None, source_ability: Optional[IAbility] = None,
+                       source_player: Optional[IPlayer] = None, sustain_target: Optional[EffectTarget] = None,
+                       scope_type: Optional[EffectScopeType] = None):
+        assert effect_filter is not None or source_ability is not None or source_player is not None or sustain_target is not None \
+               or scope_type is not None, 'no effect selected to cancel'
         with self.__lock:
-            effect_to_cancel: List[IEffect] = list()
-            for effect_type in EffectType:
-                effect_type_key = effect_type.name
-                for effect_key, effect in self.__raid_effects[effect_type_key].items():
-                    if effect_filter(effect):
-                        effect_to_cancel.append(effect)
-                for effect_key, effect in self.__group_effects[effect_type_key].items():
-                    if effect_filter(effect):
-                        effect_to_cancel.append(effect)
-                for target_key, effects in self.__target_effects[effect_type_key].items():
-                    for effect_key, effect in effects.items():
-                        if effect_filter(effect):
-                            effect_to_cancel.append(effect)
-                for target_key, abilities in self.__ability_effects[effect_type_key].items():
-                    for ability_key, effects in abilities.items():
-                        for effect_key, effect in effects.items():
-                            if effect_filter(effect):
-                                effect_to_cancel.append(effect)
+            candidate_groups: List[Dict[str, IEffect]] = list()
+            criteria: List[Callable[[IEffect], bool]] = list()
+            if source_ability is not None:
+                candidate_groups.append(self.__effects_by_source_ability.get(source_ability, self.__empty_dict))
+                criteria.append(lambda effect: effect.sustain_source().ability() is source_ability)
+            if source_player is not None:
+                player_name = source_player.get_player_name()
+                candidate_groups.append(self.__effects_by_source_player.get(player_name, self.__empty_dict))
+                criteria.append(lambda effect: effect.sustain_source().player() is not None
+                                               and effect.sustain_source().player().get_player_name() == player_name)
+            if sustain_target is not None:
+                target_key = sustain_target.key()
+                candidate_groups.append(self.__effects_by_target.get(target_key, self.__empty_dict))
+                criteria.append(lambda effect: effect.sustain_target() is not None and effect.sustain_target().key() == target_key
+                                               and effect.sustain_target().scope().scope_type() == sustain_target.scope().scope_type())
+            if scope_type is not None:
+                candidate_groups.append(self.__effects_by_scope.get(scope_type, self.__empty_dict))
+                criteria.append(lambda effect: effect.effect_scope().scope_type() == scope_type)
+            if effect_filter is not None:
+                criteria.append(effect_filter)
+            candidates = min(candidate_groups, key=len) if candidate_groups else self.__all_effects
+            effect_to_cancel = [effect for effect in candidates.values() if all(criterion(effect) for criterion in criteria)]
             for effect in effect_to_cancel:
                 effect.cancel_effect()
+            if effect_to_cancel:
+                self.clear_cache()
             logger.debug(f'remove_effects: removed {len(effect_to_cancel)}')
 
     # noinspection PyMethodMayBeStatic
@@ -247,6 +310,17 @@ class EffectsManager(IEffectsManager):
         return list(dict.fromkeys(all_effects))
 
     def apply_effects(self, effect_type: EffectType, apply_target: EffectTarget, base_value: TEffectValue) -> TEffectValue:
+        cache_key = (effect_type, apply_target.scope().scope_type(), apply_target.key(), apply_target.ability(), base_value)
+        # read before resolving; a result computed while effects change is stored under the old generation and never used
+        generation = self.__generation
+        resolved = self.__resolved_values.get(cache_key)
+        if resolved is not None and resolved[0] == generation:
+            return resolved[1]
+        result_value = self.__resolve_effects(effect_type, apply_target, base_value)
+        self.__resolved_values[cache_key] = (generation, result_value)
+        return result_value
+
+    def __resolve_effects(self, effect_type: EffectType, apply_target: EffectTarget, base_value: TEffectValue) -> TEffectValue:
         result_value = base_value
         final = False
         for effects in self.__iter_effect_groups(effect_type, apply_target):
@@ -1,26 +1,55 @@
 from __future__ import annotations
 
-import datetime
+import itertools
+import threading
+import time
 from random import choice
-from typing import Dict, List, Set, Optional, Iterable, Callable, Any
+from typing import Dict, List, Set, Optional, Iterable, Callable, Any, Tuple
 
 from rka.eq2.configs.shared.game_constants import READYUP_MIN_PERIOD
 from rka.eq2.configs.shared.rka_constants import ABILITY_CASTING_SAFETY, ABILITY_REUSE_SAFETY
 from rka.eq2.master.game.ability.ability_filter import AbilityFilter
 from rka.eq2.master.game.ability.snap import AbilitySnapshot
-from rka.eq2.master.game.interfaces import IAbility, IPlayer, TAbilityFilter
+from rka.eq2.master.game.interfaces import IAbility, IPlayer, TAbilityFilter, TAbilityTime
 
 
 def minall(abilities: List[IAbility], key: Callable[[IAbility], Any]) -> List[Any]:
-    keyvalues = map(key, abilities)
+    keyvalues = [key(ability) for ability in abilities]
     extremum = min(keyvalues)
-    return [ability for ability in abilities if key(ability) == extremum]
+    return [ability for ability, keyvalue in zip(abilities, keyvalues) if keyvalue == extremum]
 
 
 def maxall(abilities: List[IAbility], key: Callable[[IAbility], Any]) -> List[Any]:
-    keyvalues = map(key, abilities)
+    keyvalues = [key(ability) for ability in abilities]
     extremum = max(keyvalues)
-    return [ability for ability in abilities if key(ability) == extremum]
+    return [ability for ability, keyvalue in zip(abilities, keyvalues) if keyvalue == extremum]
+
+
+_bag_versions = itertools.count(1)
+_query_generations = itertools.count(1)
+_query_scope = threading.local()
+
+
+# filtered abilities of bags are memoized while a scope is open in the current thread, e.g. for one processor tick;
+# filters depend on time and ability state, so nothing is reused between scopes
+class AbilityBagQueryScope:
+    def __enter__(self):
+        depth = getattr(_query_scope, 'depth', 0)
+        if depth == 0:
+            _query_scope.generation = next(_query_generations)
+        _query_scope.depth = depth + 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _query_scope.depth -= 1
+        if _query_scope.depth == 0:
+            _query_scope.generation = 0
+
+    # drops results memoized so far in the open scope, e.g. after casting an ability
+    @staticmethod
+    def invalidate():
+        if getattr(_query_scope, 'generation', 0):
+            _query_scope.generation = next(_query_generations)
 
 
 class AbilityBag:
@@ -29,6 +58,10 @@ class AbilityBag:
         self.__bags: List[AbilityBag] = list()
         self.__filter: Optional[TAbilityFilter] = None
         self.__readonly = readonly
+        # bumped on every change of bags or filter; versions are globally increasing, so a parent can compare the max of its subtree
+        self.__version = next(_bag_versions)
+        # (query generation, subtree version, filtered abilities), replaced as a whole to be safe for other threads
+        self.__cached: Optional[Tuple[int, int, List[IAbility]]] = None
 
     def __str__(self):
         abilities_str = [str(a) for a in self.__abilities]
@@ -37,10 +70,12 @@ class AbilityBag:
     def add_bag(self, bag: AbilityBag):
         assert not self.__readonly
         self.__bags.append(bag)
+        self.__version = next(_bag_versions)
 
     def remove_bag(self, bag: AbilityBag):
         assert not self.__readonly
         self.__bags.remove(bag)
+        self.__version = next(_bag_versions)
 
     def snapshot(self) -> AbilityBag:
         abilities = self.get_abilities_unfiltered()
@@ -53,25 +88,62 @@ class AbilityBag:
 
     def set_filter(self, ability_filter: TAbilityFilter):
         self.__filter = ability_filter
+        self.__version = next(_bag_versions)
+
+    def get_version(self) -> int:
+        version = self.__version
+        for bag in self.__bags:
+            bag_version = bag.get_version()
+            if bag_version > version:
+                version = bag_version
+        return version
 
     def filter_abilities(self, abilities: Optional[List[IAbility]]) -> List[IAbility]:
         if abilities is None:
             abilities = self.get_abilities_unfiltered()
         if self.__filter is None:
             return list(abilities)
+        if isinstance(self.__filter, AbilityFilter):
+            return self.__filter.apply(abilities)
         accepted: List[IAbility] = list()
         for ability in abilities:
             if self.__filter(ability):
                 accepted.append(ability)
         return accepted
 
-    def get_abilities(self) -> List[IAbility]:
+    def __collect_abilities(self) -> List[IAbility]:
         filtered_abilities = self.filter_abilities(self.__abilities)
         for bag in self.__bags:
-            filtered_abilities += bag.get_abilities()
+            filtered_abilities += bag.__get_abilities_shared()
         return filtered_abilities
 
+    def __get_cached_abilities(self, generation: int) -> Optional[List[IAbility]]:
+        cached = self.__cached
+        if cached is None or cached[0] != generation or cached[1] != self.get_version():
+            return None
+        return cached[2]
+
+    # the returned list may be shared with the cache and must not be modified
+    def __get_abilities_shared(self) -> List[IAbility]:
+        generation = getattr(_query_scope, 'generation', 0)
+        if not generation:
+            return self.__collect_abilities()
+        abilities = self.__get_cached_abilities(generation)
+        if abilities is None:
+            abilities = self.__collect_abilities()
+            self.__cached = (generation, self.get_version(), abilities)
+        return abilities
+
+    def get_abilities(self) -> List[IAbility]:
+        abilities = self.__get_abilities_shared()
+        if getattr(_query_scope, 'generation', 0):
+            return list(abilities)
+        return abilities
+
     def get_first_ability(self) -> Optional[IAbility]:
+        if getattr(_query_scope, 'generation', 0):
+            abilities = self.__get_abilities_shared()
+            return abilities[0] if abilities else None
         filtered_abilities = self.filter_abilities(self.__abilities)
         if filtered_abilities:
             return filtered_abilities[0]
@@ -88,32 +160,26 @@ class AbilityBag:
         return unfiltered_abilities
 
     def get_all_players(self) -> Set[IPlayer]:
-        players: Set[IPlayer] = set()
-        for ability in self.get_abilities():
-            players.add(ability.player)
-        return players
+        return {ability.player for ability in self.__get_abilities_shared()}
 
     def get_map_by_player(self) -> Dict[IPlayer, AbilityBag]:
         abilities_by_player: Dict[IPlayer, Dict[str, IAbility]] = dict()
-        bags_by_player: Dict[IPlayer, AbilityBag] = dict()
-        players = self.get_all_players()
-        filtered_abilities = self.get_abilities()
-        for player in players:
-            abilities_by_player[player] = dict()
-        for ability in filtered_abilities:
-            abilities_by_player[ability.player][ability.ability_variant_key()] = ability
-        for player in players:
-            bags_by_player[player] = AbilityBag(abilities_by_player[player].values())
-        return bags_by_player
+        for ability in self.__get_abilities_shared():
+            player_abilities = abilities_by_player.get(ability.player)
+            if player_abilities is None:
+                player_abilities = dict()
+                abilities_by_player[ability.player] = player_abilities
+            player_abilities[ability.ability_variant_key()] = ability
+        return {player: AbilityBag(player_abilities.values()) for player, player_abilities in abilities_by_player.items()}
 
     def one_random(self) -> AbilityBag:
-        filtered_abilities = self.get_abilities()
+        filtered_abilities = self.__get_abilities_shared()
         if not filtered_abilities:
             return EMPTY_BAG
         return AbilityBag([choice(filtered_abilities)])
 
     def one_of_least_busy_player(self) -> AbilityBag:
-        filtered_abilities = self.get_abilities()
+        filtered_abilities = self.__get_abilities_shared()
         best_ability = None
         for ability in filtered_abilities:
             if not best_ability or best_ability.player.is_busier_than(ability.player):
@@ -123,10 +189,10 @@ class AbilityBag:
         return AbilityBag([best_ability])
 
     def get_bag_by_filter(self, condition: TAbilityFilter) -> AbilityBag:
-        return AbilityBag(filter(condition, self.get_abilities()))
+        return AbilityBag(filter(condition, self.__get_abilities_shared()))
 
     def get_bag_by_max_priority(self) -> AbilityBag:
-        abilities = self.get_abilities()
+        abilities = self.__get_abilities_shared()
         if not abilities:
             return EMPTY_BAG
         max_priority_abilities = maxall(abilities, key=lambda ability: ability.get_priority())
@@ -135,7 +201,7 @@ class AbilityBag:
         return AbilityBag(max_priority_abilities)
 
     def get_bag_by_max_duration(self) -> AbilityBag:
-        abilities = self.get_abilities()
+        abilities = self.__get_abilities_shared()
         if not abilities:
             return EMPTY_BAG
         max_duration_abilities = maxall(abilities, key=lambda ability: ability.census.duration)
@@ -144,7 +210,7 @@ class AbilityBag:
         return AbilityBag(max_duration_abilities)
 
     def get_bag_by_priority_in_range(self, max_priority: int, priority_range: int) -> AbilityBag:
-        abilities = self.get_abilities()
+        abilities = self.__get_abilities_shared()
         if not abilities:
             return EMPTY_BAG
         abilities_in_range = [ability for ability in abilities if max_priority - priority_range <= ability.get_priority() <= max_priority]
@@ -159,7 +225,7 @@ class AbilityBag:
         ability_bag = self.get_bag_by_duration_expired()
         if ability_bag.is_empty():
             ability_bag = self
-        abilities = ability_bag.get_abilities()
+        abilities = ability_bag.__get_abilities_shared()
         max_priority = max(abilities, key=lambda ability: ability.get_priority()).get_priority()
         min_priority = min(abilities, key=lambda ability: ability.get_priority()).get_priority()
         priority_spread = max_priority - min_priority
@@ -181,7 +247,7 @@ class AbilityBag:
         return AbilityBag(sorted_abilities[:max_return])
 
     def get_bag_by_shortest_cast_time(self) -> AbilityBag:
-        abilities = self.get_abilities()
+        abilities = self.__get_abilities_shared()
         if not abilities:
             return EMPTY_BAG
         min_time_to_cast = minall(abilities, key=lambda ability: ability.census.casting)
@@ -190,7 +256,7 @@ class AbilityBag:
         return AbilityBag(min_time_to_cast)
 
     def get_bag_by_shortest_reuse_time(self) -> AbilityBag:
-        abilities = self.get_abilities()
+        abilities = self.__get_abilities_shared()
         if not abilities:
             return EMPTY_BAG
         min_time_to_reuse = minall(abilities, key=lambda ability: ability.census.reuse)
@@ -198,37 +264,37 @@ class AbilityBag:
             return EMPTY_BAG
         return AbilityBag(min_time_to_reuse)
 
-    def get_bag_by_shortest_time_to_recast(self, now: Optional[datetime.datetime] = None) -> AbilityBag:
-        abilities = self.get_abilities()
+    def get_bag_by_shortest_time_to_recast(self, now: TAbilityTime = None) -> AbilityBag:
+        abilities = self.__get_abilities_shared()
         if not abilities:
             return EMPTY_BAG
-        if not now:
-            now = datetime.datetime.now()
+        if now is None:
+            now = time.monotonic()
         min_time_to_recast = minall(abilities, key=lambda ability: round(ability.get_remaining_reuse_wait_td(now).seconds, 1))
         if not min_time_to_recast:
             return EMPTY_BAG
         return AbilityBag(min_time_to_recast)
 
-    def get_bag_by_reusable(self, now: Optional[datetime.datetime] = None) -> AbilityBag:
-        if not now:
-            now = datetime.datetime.now()
+    def get_bag_by_reusable(self, now: TAbilityTime = None) -> AbilityBag:
+        if now is None:
+            now = time.monotonic()
         return self.get_bag_by_filter(AbilityFilter().reusable(now))
 
-    def get_bag_by_duration_expired(self, now: Optional[datetime.datetime] = None) -> AbilityBag:
-        if not now:
-            now = datetime.datetime.now()
+    def get_bag_by_duration_expired(self, now: TAbilityTime = None) -> AbilityBag:
+        if now is None:
+            now = time.monotonic()
         return self.get_bag_by_filter(AbilityFilter().expired(now))
 
-    def get_bag_by_in_duration_or_casting(self, now: Optional[datetime.datetime] = None) -> AbilityBag:
-        if not now:
-            now = datetime.datetime.now()
+    def get_bag_by_in_duration_or_casting(self, now: TAbilityTime = None) -> AbilityBag:
+        if now is None:
+            now = time.monotonic()
         return self.get_bag_by_filter(AbilityFilter().casting_or_in_duration(now))
 
     def get_bag_by_can_override(self, test_ability: IAbility) -> AbilityBag:
         return self.get_bag_by_filter(AbilityFilter().can_override(test_ability))
 
     def get_bag_by_highest_tier(self) -> AbilityBag:
-        abilities = self.get_abilities()
+        abilities = self.__get_abilities_shared()
         if not abilities:
             return EMPTY_BAG
         max_tier = maxall(abilities, key=lambda ability: ability.census.tier_int)
@@ -237,6 +303,8 @@ class AbilityBag:
         return AbilityBag(max_tier)
 
     def is_empty(self) -> bool:
+        if getattr(_query_scope, 'generation', 0):
+            return not self.__get_abilities_shared()
         filtered_abilities = self.filter_abilities(self.__abilities)
         if filtered_abilities:
             return False
@@ -54,7 +54,7 @@ class Mode(Task):
                           self.__starting_and_expiring_at_close_tasks, self.__running_until_close_tasks):
             self.__processor.run_auto(task)
         for task in self.__starting_callbacks:
-            shared_worker.push_task(task)
+            shared_worker.post_task(task)
 
     def _on_extend(self, remaining_duration: float):
         for task in chain(self.__running_tasks, self.__running_until_close_tasks):
@@ -82,4 +82,4 @@ class Mode(Task):
         for task in self.__closing_tasks:
             self.__processor.run_auto(task)
         for task in self.__closing_callbacks:
-            shared_worker.push_task(task)
+            shared_worker.post_task(task)
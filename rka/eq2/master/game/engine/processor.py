@@ -1,113 +1,100 @@
 from __future__ import annotations
 
 import threading
+import time
 import traceback
-from typing import Dict, List, Callable
+from typing import Dict, List, Callable, Optional, Collection
 
 from rka.components.cleanup import Closeable
+from rka.components.concurrency.measured_condition import MeasuredCondition
 from rka.components.concurrency.rkathread import RKAThread
 from rka.components.io.log_service import LogLevel
-from rka.eq2.configs.shared.rka_constants import PROCESSOR_TICK
+from rka.eq2.configs.shared.rka_constants import PROCESSOR_TICK, PROCESSOR_PROFILING, PROCESSOR_PROFILING_LOG_PERIOD
 from rka.eq2.master import IRuntime, RequiresRuntime
 from rka.eq2.master.game.ability import PRIORITY_SELECTION_MARGIN
 from rka.eq2.master.game.ability.ability_filter import AbilityFilter
 from rka.eq2.master.game.ability.snap import AbilitySnapshot
 from rka.eq2.master.game.engine import logger
-from rka.eq2.master.game.engine.abilitybag import AbilityBag
+from rka.eq2.master.game.engine.abilitybag import AbilityBag, AbilityBagQueryScope
 from rka.eq2.master.game.engine.request import Request
 from rka.eq2.master.game.engine.task import Task, FilterTask, IAbilityCastingObserver
+from rka.eq2.master.game.engine.task_schedule import TaskSchedule
+from rka.eq2.master.game.engine.tick_profiler import TickProfiler, RequestProfilingScope
 from rka.eq2.master.game.interfaces import IAbility, IPlayer
 
 
 class TaskController(Closeable):
     def __init__(self, runtime: IRuntime):
         Closeable.__init__(self, explicit_close=True)
-        self.__running_requests: List[Request] = list()
-        self.__running_filters: List[FilterTask] = list()
-        self.__running_othertasks: List[Task] = list()
-        self.__delayed_requests: List[Request] = list()
-        self.__delayed_filters: List[FilterTask] = list()
-        self.__delayed_othertasks: List[Task] = list()
+        self.__requests: TaskSchedule[Request] = TaskSchedule()
+        self.__filters: TaskSchedule[FilterTask] = TaskSchedule()
+        self.__othertasks: TaskSchedule[Task] = TaskSchedule()
         # aggregates
-        self.___all_tasks = [self.__running_requests, self.__delayed_requests,
-                             self.__running_othertasks, self.__delayed_othertasks,
-                             self.__running_filters, self.__delayed_filters]
-        self.___all_requests_and_othertasks = [self.__running_requests, self.__delayed_requests,
-                                               self.__running_othertasks, self.__delayed_othertasks]
-        self.___all_running_tasks = [self.__running_requests, self.__running_othertasks, self.__running_filters]
+        self.___all_schedules = [self.__requests, self.__othertasks, self.__filters]
+        self.___requests_and_othertasks_schedules = [self.__requests, self.__othertasks]
+        # AND of all running filters, rebuilt only when running filters change
+        self.__combined_filter: Optional[AbilityFilter] = None
         # for setting up in tasks
         self.__runtime = runtime
 
     def visit_requests_and_othertasks(self, cb: Callable[[Task], None]):
-        for task_list in self.___all_requests_and_othertasks:
-            for req in task_list:
+        for schedule in self.___requests_and_othertasks_schedules:
+            for req in list(schedule.get_running()) + schedule.get_delayed():
                 cb(req)
 
     def visit_all_running_tasks(self, cb: Callable[[Task], None]):
-        for task_list in self.___all_running_tasks:
-            for req in task_list:
+        for schedule in self.___all_schedules:
+            for req in list(schedule.get_running()):
                 cb(req)
 
     def expire_requests_and_othertasks(self):
-        for task_list in self.___all_requests_and_othertasks:
-            for req in task_list:
+        for schedule in self.___requests_and_othertasks_schedules:
+            for req in list(schedule.get_running()) + schedule.get_delayed():
                 if not req.is_persistent():
                     req.expire()
 
-    @staticmethod
-    def __prepare_running_tasks(running_list: List[Task], delayed_list: List[Task]):
-        for task in running_list:
-            if task.is_in_delay():
-                logger.warn(f'unexpected delay {task.get_delay()} found on {task}')
-        ready_delayed = [task for task in delayed_list if not task.is_in_delay()]
-        for ready_task in ready_delayed:
-            delayed_list.remove(ready_task)
-            running_list.append(ready_task)
-            logger.debug(f'started: {ready_task.__class__.__name__} {ready_task}')
-            ready_task.notify_started()
-        expired_running = [task for task in running_list if task.is_expired()]
-        for expired_task in expired_running:
-            running_list.remove(expired_task)
-            logger.debug(f'expired: {expired_task.__class__.__name__} {expired_task}')
-            expired_task.notify_expired()
-
-    def prepare_running_requests(self) -> List[Request]:
-        i1 = len(self.__running_requests)
-        i2 = len(self.__delayed_requests)
-        TaskController.__prepare_running_tasks(self.__running_requests, self.__delayed_requests)
-        i12 = len(self.__running_requests)
-        i22 = len(self.__delayed_requests)
-        if i1 != i12 or i2 != i22:
+    def prepare_running_requests(self) -> Collection[Request]:
+        i1 = self.__requests.get_running_count()
+        i2 = self.__requests.get_delayed_count()
+        if self.__requests.prepare():
+            i12 = self.__requests.get_running_count()
+            i22 = self.__requests.get_delayed_count()
             logger.info(f'REQUESTS MOVED: running {i1} -> {i12} & delayed {i2} -> {i22}')
-        return self.__running_requests
+        return self.__requests.get_running()
 
-    def prepare_running_filters(self) -> List[FilterTask]:
-        TaskController.__prepare_running_tasks(self.__running_filters, self.__delayed_filters)
-        return self.__running_filters
+    def prepare_running_filters(self) -> Collection[FilterTask]:
+        if self.__filters.prepare():
+            self.__combined_filter = None
+        return self.__filters.get_running()
 
-    def prepare_running_tasks(self) -> List[Task]:
-        TaskController.__prepare_running_tasks(self.__running_othertasks, self.__delayed_othertasks)
-        return self.__running_othertasks
+    def get_combined_filter(self) -> AbilityFilter:
+        if self.__combined_filter is None:
+            self.__combined_filter = AbilityFilter().op_and_all(self.__filters.get_running())
+        return self.__combined_filter
+
+    def prepare_running_tasks(self) -> Collection[Task]:
+        self.__othertasks.prepare()
+        return self.__othertasks.get_running()
 
     def add_request(self, request: Request):
-        self.__add_task(request, self.__running_requests, self.__delayed_requests)
+        self.__add_task(request, self.__requests)
 
     def add_filter(self, flt: FilterTask):
-        self.__add_task(flt, self.__running_filters, self.__delayed_filters)
+        self.__add_task(flt, self.__filters)
 
     def add_othertask(self, task: Task):
-        self.__add_task(task, self.__running_othertasks, self.__delayed_othertasks)
+        self.__add_task(task, self.__othertasks)
 
-    def __add_task(self, task: Task, running_list: List[Task], delayed_list: List[Task]):
+    def __add_task(self, task: Task, schedule: TaskSchedule):
         logger.debug(f'Adding task {task}')
         if isinstance(task, RequiresRuntime):
             task.set_runtime(self.__runtime)
         name = task.__class__.__name__
-        task_in_running = task in running_list
-        task_in_delayed = task in delayed_list
+        task_in_running = schedule.is_running(task)
+        task_in_delayed = schedule.is_delayed(task)
         if task_in_running and task_in_delayed:
             logger.warn(f'{name} was both in running and delayed lists')
-            delayed_list.remove(task)
+            schedule.remove_delayed(task)
         if task_in_running or task_in_delayed:
             logger.detail(f'{name} /{task}/ restarted')
             task.restart()
@@ -116,31 +103,20 @@ class TaskController(Closeable):
             task.start()
             # always add to delayed list, so start notification is simplified (in one place)
             # it will be moved to running list soon
-            delayed_list.append(task)
+            schedule.add_delayed(task)
 
     def print_debug(self):
-        logger.warn(f'print_debug: __running_filters')
-        for d in self.__running_filters:
-            logger.warn(f'{d}')
-        logger.warn(f'print_debug: __delayed_filters')
-        for d in self.__delayed_filters:
-            logger.warn(f'{d}')
-        logger.warn(f'print_debug: __running_requests')
-        for d in self.__running_requests:
-            logger.warn(f'{d}')
-        logger.warn(f'print_debug: __delayed_requests')
-        for d in self.__delayed_requests:
-            logger.warn(f'{d}')
-        logger.warn(f'print_debug: __running_othertasks')
-        for d in self.__running_othertasks:
-            logger.warn(f'{d}')
-        logger.warn(f'print_debug: __delayed_othertasks')
-        for d in self.__delayed_othertasks:
-            logger.warn(f'{d}')
+        for schedule_name, schedule in [('filters', self.__filters), ('requests', self.__requests), ('othertasks', self.__othertasks)]:
+            logger.warn(f'print_debug: running {schedule_name}')
+            for d in schedule.get_running():
+                logger.warn(f'{d}')
+            logger.warn(f'print_debug: delayed {schedule_name}')
+            for d in schedule.get_delayed():
+                logger.warn(f'{d}')
 
     def close(self):
-        for task_list in self.___all_tasks:
-            for task in task_list:
+        for schedule in self.___all_schedules:
+            for task in list(schedule.get_running()) + schedule.get_delayed():
                 if not task.is_persistent():
                     task.expire()
                 if isinstance(task, Closeable):
@@ -158,6 +134,9 @@ class Processor(Closeable):
         self.__keep_running = True
         self.__paused = False
         self.__tasks = TaskController(runtime)
+        self.__profiler: Optional[TickProfiler] = None
+        if PROCESSOR_PROFILING:
+            self.enable_profiling(True)
         RKAThread(name=f'Processor {self}', target=self.__main_loop).start()
 
     def __main_loop(self):
@@ -165,10 +144,17 @@ class Processor(Closeable):
         with self.__lock:
             while self.__keep_running:
                 try:
+                    profiler = self.__profiler
+                    tick_start = time.perf_counter() if profiler else 0.0
+                    phase_durations: Optional[Dict[str, float]] = dict() if profiler else None
                     running_requests = self.__tasks.prepare_running_requests()
-                    running_filters = self.__tasks.prepare_running_filters()
+                    self.__tasks.prepare_running_filters()
                     self.__tasks.prepare_running_tasks()
-                    self.__process_running_requests(running_requests, running_filters)
+                    if profiler:
+                        phase_durations['filtering'] = time.perf_counter() - tick_start
+                    self.__process_running_requests(running_requests, profiler, phase_durations)
+                    if profiler:
+                        profiler.record_tick(time.perf_counter() - tick_start, phase_durations)
                     error_count = 0
                 except Exception as e:
                     logger.error(f'error occured {e}')
@@ -185,38 +171,65 @@ class Processor(Closeable):
             ability = ability.unwrap()
         cast = ability.cast()
         if cast:
+            AbilityBagQueryScope.invalidate()
             self.__tasks.visit_all_running_tasks(lambda task: task.notify_casting(ability) if isinstance(task, IAbilityCastingObserver) else None)
         return cast
 
-    def __process_new_requests(self, running_requests: List[Request], running_filters: List[FilterTask]):
+    def __process_new_requests(self, running_requests: Collection[Request]):
         if self.__paused:
             return
-        self.__process_requests(running_requests, running_filters, immediate=True)
-
-    def __process_running_requests(self, running_requests: List[Request], running_filters: List[FilterTask]):
+        # immediate runs happen between ticks, so their phases are not mixed into tick phases
+        profiler = self.__profiler
+        run_start = time.perf_counter() if profiler else 0.0
+        with AbilityBagQueryScope():
+            self.__process_requests(running_requests, immediate=True, profiler=profiler, phase_durations=None)
+        if profiler:
+            profiler.record_immediate(time.perf_counter() - run_start)
+
+    def __process_running_requests(self, running_requests: Collection[Request], profiler: Optional[TickProfiler],
+                                   phase_durations: Optional[Dict[str, float]]):
         if len(running_requests) == 0:
             return
-        self.__process_requests(running_requests, running_filters, immediate=False)
+        with AbilityBagQueryScope():
+            self.__process_requests(running_requests, immediate=False, profiler=profiler, phase_durations=phase_durations)
 
-    def __process_requests(self, running_requests: List[Request], running_filters: List[FilterTask], immediate: bool):
+    def __process_requests(self, running_requests: Collection[Request], immediate: bool, profiler: Optional[TickProfiler],
+                           phase_durations: Optional[Dict[str, float]]):
         if len(running_requests) == 0:
             return
-        all_available_abilities = AbilityBag()
-        ability_filter = AbilityFilter().op_and_all(running_filters)
-        for request in running_requests:
-            request.set_ability_filter(ability_filter)
-            available_abilities = request.get_available_ability_bag()
-            assert available_abilities is not None, request
-            if not available_abilities.is_empty():
-                all_available_abilities.add_bag(available_abilities)
-        if all_available_abilities.is_empty():
-            logger.detail(f'all_available_abilities is empty')
-            return
-        reusable_abilities = all_available_abilities.get_bag_by_reusable()
-        if reusable_abilities.is_empty():
+        phase_start = time.perf_counter() if phase_durations is not None else 0.0
+        ability_filter = self.__tasks.get_combined_filter()
+        now = time.monotonic()
+        # single pass over request bags, keeping reusable abilities per player, unique by variant key
+        reusable_by_player: Dict[IPlayer, Dict[str, IAbility]] = dict()
+        with RequestProfilingScope(profiler):
+            for request in running_requests:
+                # the filter cascades through composite requests, so it is set only when it has changed
+                if request.get_ability_filter() is not ability_filter:
+                    request.set_ability_filter(ability_filter)
+                if profiler:
+                    request_start = time.perf_counter()
+                    available_abilities = request.get_available_ability_bag()
+                    profiler.record_request(request.__class__.__name__, time.perf_counter() - request_start)
+                else:
+                    available_abilities = request.get_available_ability_bag()
+                assert available_abilities is not None, request
+                for ability in available_abilities.get_abilities():
+                    if not ability.is_reusable(now):
+                        continue
+                    player_abilities = reusable_by_player.get(ability.player)
+                    if player_abilities is None:
+                        player_abilities = dict()
+                        reusable_by_player[ability.player] = player_abilities
+                    player_abilities[ability.ability_variant_key()] = ability
+        if phase_durations is not None:
+            phase_end = time.perf_counter()
+            phase_durations['bags'] = phase_end - phase_start
+            phase_start = phase_end
+        if not reusable_by_player:
             logger.detail(f'reusable_abilities is empty')
             return
-        abilities_by_player: Dict[IPlayer, AbilityBag] = reusable_abilities.get_map_by_player()
+        abilities_by_player = {player: AbilityBag(player_abilities.values()) for player, player_abilities in reusable_by_player.items()}
         abilities_to_cast: Dict[IPlayer, AbilityBag] = dict()
         for player, abilities in abilities_by_player.items():
             recently_cast_ability = player.get_last_cast_ability()
@@ -239,6 +252,10 @@ class Processor(Closeable):
                 logger.detail(f'{player}: max_priority_abilities: {max_priority_abilities}')
                 logger.detail(f'{player}: priority_in_range_abilities: {priority_in_range_abilities}')
                 logger.detail(f'{player}: top N preferred_abilities: {preferred_abilities}')
+        if phase_durations is not None:
+            phase_end = time.perf_counter()
+            phase_durations['selection'] = phase_end - phase_start
+            phase_start = phase_end
         # included in critical section to avoid races in immediate ability casting
         for player, abilities in abilities_to_cast.items():
             for ability in abilities.get_abilities():
@@ -250,12 +267,13 @@ class Processor(Closeable):
                     logger.warn(f'Failed to cast {ability} due to {e}')
                     traceback.print_exc()
                     break
+        if phase_durations is not None:
+            phase_durations['casting'] = time.perf_counter() - phase_start
 
     def apply_current_filters(self, abilities: AbilityBag) -> AbilityBag:
         with self.__lock:
-            running_filters = self.__tasks.prepare_running_filters()
-            filters = AbilityFilter().op_and_all(running_filters)
-            return abilities.get_bag_by_filter(filters)
+            self.__tasks.prepare_running_filters()
+            return abilities.get_bag_by_filter(self.__tasks.get_combined_filter())
 
     def run_auto(self, any_request: Task):
         if isinstance(any_request, Request):
@@ -278,8 +296,8 @@ class Processor(Closeable):
             try:
                 # call prepare_running_requests in order to move the new request from delayed list to running list
                 self.__tasks.prepare_running_requests()
-                running_filters = self.__tasks.prepare_running_filters()
-                self.__process_new_requests([request], running_filters)
+                self.__tasks.prepare_running_filters()
+                self.__process_new_requests([request])
             except Exception as e:
                 logger.error(f'exception occured when processing request {request}, {e}')
                 traceback.print_exc()
@@ -312,6 +330,19 @@ class Processor(Closeable):
     def is_paused(self) -> bool:
         return self.__paused
 
+    def enable_profiling(self, enabled: bool):
+        if enabled and not self.__profiler:
+            self.__profiler = TickProfiler(f'Processor {id(self)}', PROCESSOR_TICK, PROCESSOR_PROFILING_LOG_PERIOD)
+        elif not enabled:
+            self.__profiler = None
+
+    def get_profiler(self) -> Optional[TickProfiler]:
+        return self.__profiler
+
+    def get_profiling_report(self) -> Optional[str]:
+        profiler = self.__profiler
+        return profiler.get_report() if profiler else None
+
     def clear_processor(self):
         with self.__lock:
             self.__tasks.expire_requests_and_othertasks()
@@ -333,9 +364,19 @@ class Processor(Closeable):
 
 
 class ProcessorFactory:
-    def __init__(self, runtime: IRuntime):
+    def __init__(self, runtime: IRuntime, measure_locks=PROCESSOR_PROFILING):
         self.__runtime = runtime
-        self.__shared_lock = threading.Condition()
+        # timing every acquisition has a cost, so a plain lock is used unless contention is profiled
+        self.__shared_lock = MeasuredCondition('processor lock') if measure_locks else threading.Condition()
 
     def create_processor(self) -> Processor:
         return Processor(self.__runtime, self.__shared_lock)
+
+    # threads waiting for the processor lock, as a share of wall time; 0.0 when the lock is not measured
+    def get_lock_contention(self) -> float:
+        lock = self.__shared_lock
+        return lock.get_contention() if isinstance(lock, MeasuredCondition) else 0.0
+
+    def get_lock_report(self) -> str:
+        lock = self.__shared_lock
+        return lock.get_report() if isinstance(lock, MeasuredCondition) else ''
@@ -0,0 +1,125 @@
+import argparse
+import threading
+import time
+from typing import Callable, List, Optional
+
+from rka.components.cleanup import cleanup_manager
+from rka.eq2.master.game.engine.abilitybag import AbilityBag
+from rka.eq2.master.game.engine.processor import ProcessorFactory
+from rka.eq2.master.game.engine.request import Request
+from rka.eq2.master.game.engine.resolver import AbilityResolver
+from rka.util.benchmark import format_rate
+
+
+class _BenchmarkPlayer:
+    def __init__(self, name: str):
+        self.__name = name
+
+    def __str__(self):
+        return self.__name
+
+    def get_last_cast_ability(self) -> None:
+        return None
+
+
+class _BenchmarkCensus:
+    duration = 10.0
+    casting = 0.5
+    reuse = 5.0
+
+
+class _BenchmarkAbility:
+    def __init__(self, player: _BenchmarkPlayer, ability_id: int, cast_latency: float, on_cast: Callable[[], None]):
+        self.player = player
+        self.census = _BenchmarkCensus()
+        self.__key = f'{player}.{ability_id}'
+        self.__priority = ability_id % 5
+        self.__cast_latency = cast_latency
+        self.__on_cast = on_cast
+
+    def __str__(self):
+        return self.__key
+
+    def ability_variant_key(self) -> str:
+        return self.__key
+
+    def get_priority(self) -> int:
+        return self.__priority
+
+    def is_reusable(self, _now: Optional[float] = None) -> bool:
+        return True
+
+    def is_duration_expired(self, _now: Optional[float] = None) -> bool:
+        return True
+
+    def is_overriding(self, _ability) -> bool:
+        return True
+
+    def cast(self) -> bool:
+        # casting waits for the client to respond
+        time.sleep(self.__cast_latency)
+        self.__on_cast()
+        return True
+
+
+class _BenchmarkRequest(Request):
+    def __init__(self, abilities: List[_BenchmarkAbility]):
+        Request.__init__(self, abilities=[], resolver=AbilityResolver(), duration=-1.0, description='benchmark request')
+        self.__abilities = abilities
+
+    def get_available_ability_bag(self) -> AbilityBag:
+        return AbilityBag(self._filter_abilities(self.__abilities))
+
+
+def run_processors(characters: int, offzone: int, abilities_per_character: int, cast_latency: float, run_duration: float,
+                   report: Callable[[str], None] = print) -> float:
+    # like the runtime: the main processor casts for all zoned characters, each off-zone controller has its own processor;
+    # all processors share the lock of the factory
+    factory = ProcessorFactory(runtime=None, measure_locks=True)
+    casts = [0]
+    casts_lock = threading.Lock()
+
+    def on_cast():
+        with casts_lock:
+            casts[0] += 1
+
+    main_processor = factory.create_processor()
+    processors = [main_processor]
+    for character_id in range(characters):
+        player = _BenchmarkPlayer(f'character{character_id}')
+        abilities = [_BenchmarkAbility(player, ability_id, cast_latency, on_cast) for ability_id in range(abilities_per_character)]
+        if character_id < offzone:
+            processor = factory.create_processor()
+            processors.append(processor)
+        else:
+            processor = main_processor
+        processor.run_request(_BenchmarkRequest(abilities))
+    time.sleep(run_duration)
+    with casts_lock:
+        cast_count = casts[0]
+    contention = factory.get_lock_contention()
+    for processor in processors:
+        processor.close()
+    rate = cast_count / run_duration
+    report(f'{characters} characters, {offzone} off-zone processors: {format_rate(cast_count, run_duration, "casts")}, '
+           f'lock wait {contention * 100.0:.1f}% of wall time')
+    return rate
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Measure processor lock contention between the main processor and off-zone processors')
+    arg_parser.add_argument('--characters', type=int, default=12)
+    arg_parser.add_argument('--offzone', type=int, action='append', help='off-zone processors, default: 0, 1, 2, 4')
+    arg_parser.add_argument('--abilities', type=int, default=30, help='abilities per character')
+    arg_parser.add_argument('--cast-latency', type=float, default=0.05, help='seconds spent in cast()')
+    arg_parser.add_argument('--run', type=float, default=3.0, help='seconds per configuration')
+    args = arg_parser.parse_args()
+    try:
+        for offzone in args.offzone if args.offzone else [0, 1, 2, 4]:
+            run_processors(args.characters, offzone, args.abilities, args.cast_latency, args.run)
+    finally:
+        cleanup_manager.close_all()
+
+
+if __name__ == '__main__':
+    main()
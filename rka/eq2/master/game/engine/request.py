@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import datetime
 import time
 from typing import Dict, List, Optional, Set, Iterable, Callable, Tuple
 
@@ -11,6 +10,7 @@ from rka.eq2.master.game.engine import logger, ITargetRanking, ICombatantFilter
 from rka.eq2.master.game.engine.abilitybag import AbilityBag, EMPTY_BAG
 from rka.eq2.master.game.engine.resolver import Combine, TAbilities, AbilityResolver, ResolvedCombine, CommonCombineConditions, ICombineReducer
 from rka.eq2.master.game.engine.task import Task, IAbilityCastingObserver
+from rka.eq2.master.game.engine.tick_profiler import get_request_profiler
 from rka.eq2.master.game.interfaces import IAbility, IAbilityLocator, IPlayer, TAbilityFilter, AbilityVariantKey, AbilityRecord, IAbilityRecordFilter
 from rka.eq2.shared import Groups
 from rka.log_configs import LOG_REQUESTS
@@ -34,6 +34,9 @@ class Request(Task, IAbilityCastingObserver):
     def set_ability_filter_from(self, request: Request):
         self.set_ability_filter(request.__ability_filter)
 
+    def get_ability_filter(self) -> Optional[TAbilityFilter]:
+        return self.__ability_filter
+
     def _debug_filters(self, ability: IAbility):
         flt = self.__ability_filter
         logger.debug(f'filtered is empty, filter is: {flt}')
@@ -51,6 +54,8 @@ class Request(Task, IAbilityCastingObserver):
         return self.__ability_filter(ability)
 
     def _filter_abilities(self, abilities: Iterable[IAbility]) -> List[IAbility]:
+        if isinstance(self.__ability_filter, AbilityFilter):
+            return self.__ability_filter.apply(abilities)
         return list(filter(self.__ability_filter, abilities))
 
     def get_resolved_abilities_list(self) -> List[IAbility]:
@@ -79,6 +84,8 @@ class DynamicRequestProxy(Request, RequiresRuntime):
         if request:
             if isinstance(request, RequiresRuntime) and self.has_runtime():
                 request.set_runtime(self.get_runtime())
+            # processor sets the filter only when it changes, so the new request has to inherit it
+            request.set_ability_filter_from(self)
             self.set_duration(request.get_duration())
 
     def set_condition(self, condition: Callable[[], bool]):
@@ -264,6 +271,17 @@ class AbstractCompositeRequest(Request, RequiresRuntime):
         for request in self._requests:
             request.notify_casting(ability)
 
+    # children are measured separately when the processor profiles its requests
+    @staticmethod
+    def _get_child_ability_bag(request: Request) -> AbilityBag:
+        profiler = get_request_profiler()
+        if not profiler:
+            return request.get_available_ability_bag()
+        request_start = time.perf_counter()
+        available_abilities = request.get_available_ability_bag()
+        profiler.record_request(request.__class__.__name__, time.perf_counter() - request_start)
+        return available_abilities
+
 
 # aggregate request aligns all tasks and cascades all calls to aggregated requests
 class CompositeRequest(AbstractCompositeRequest, RequiresRuntime):
@@ -276,7 +294,7 @@ class CompositeRequest(AbstractCompositeRequest, RequiresRuntime):
         for request in self._requests:
             if request.is_expired():
                 continue
-            request_result = request.get_available_ability_bag()
+            request_result = self._get_child_ability_bag(request)
             if request_result.is_empty():
                 continue
             if result is None:
@@ -296,7 +314,7 @@ class CascadeRequest(AbstractCompositeRequest, RequiresRuntime):
         for request in self._requests:
             if request.is_expired():
                 continue
-            request_result = request.get_available_ability_bag()
+            request_result = self._get_child_ability_bag(request)
             if request_result.is_empty():
                 continue
             reusable_request_result = request_result.get_bag_by_reusable()
@@ -532,12 +550,12 @@ class RecastWhenDurationExpired(Request):
 class NonOverlappingDuration(Request):
     def __init__(self, abilities: TAbilities, resolver: AbilityResolver, overlap: float, duration: float):
         Request.__init__(self, abilities=abilities, resolver=resolver, duration=duration)
-        self.__overlap_dt = datetime.timedelta(seconds=overlap)
+        self.__overlap = overlap
 
     def get_available_ability_bag(self) -> AbilityBag:
         all_abilities = super().get_available_ability_bag()
-        now = datetime.datetime.now()
-        now_overlap = now + self.__overlap_dt
+        now = time.monotonic()
+        now_overlap = now + self.__overlap
         in_duration = all_abilities.get_bag_by_in_duration_or_casting(now=now_overlap)
         if not in_duration.is_empty():
             return EMPTY_BAG
@@ -559,7 +577,7 @@ class NonOverlappingDuration(Request):
 class NonOverlappingDurationReducer(ICombineReducer):
     def reduce(self, abilities: List[IAbility], limit: int) -> List[IAbility]:
         all_abilities = AbilityBag(abilities)
-        now = datetime.datetime.now()
+        now = time.monotonic()
         reusable = all_abilities.get_bag_by_reusable(now=now)
         # filter off players that do not have reusable ability
         players_with_reusable_abilities = reusable.get_all_players()
@@ -576,7 +594,7 @@ class NonOverlappingDurationReducer(ICombineReducer):
 class NonOverlappingDurationByGroup(Request):
     def __init__(self, abilities: TAbilities, resolver: AbilityResolver, overlap: float, duration: float):
         Request.__init__(self, abilities=abilities, resolver=resolver, duration=duration)
-        self.__overlap_dt = datetime.timedelta(seconds=overlap)
+        self.__overlap = overlap
 
     @staticmethod
     def __merge_main_group(groups: Set[Groups]) -> Set[Groups]:
@@ -589,8 +607,8 @@ class NonOverlappingDurationByGroup(Request):
         available_groups = {player.get_client_config_data().group_id for player in available_players}
         available_groups = NonOverlappingDurationByGroup.__merge_main_group(available_groups)
         # get abilities which are running, players and groups
-        now = datetime.datetime.now()
-        now_overlap = now + self.__overlap_dt
+        now = time.monotonic()
+        now_overlap = now + self.__overlap
         abilities_in_duration = available_abilities.get_bag_by_in_duration_or_casting(now=now_overlap)
         players_with_abilities_in_duration = abilities_in_duration.get_all_players()
         groups_with_abilities_in_duration = {player.get_client_config_data().group_id for player in players_with_abilities_in_duration}
@@ -818,7 +836,7 @@ class RequestAbilityUtil:
         return AbilityFilter().permitted_caster_state().apply(self.__abilities)
 
     def resolve_all_reusable(self) -> List[IAbility]:
-        now = datetime.datetime.now()
+        now = time.monotonic()
         return AbilityFilter().permitted_caster_state().reusable(now).apply(self.__abilities)
 
 
@@ -924,7 +942,7 @@ class RotationWithTargetRanking(RequestWithShortCache, RequiresRuntime):
     def __get_abilities_for_targets(self, target_names: List[str], all_permitted: List[IAbility], all_casters: Iterable[IPlayer]) -> List[IAbility]:
         if not target_names:
             return []
-        now = datetime.datetime.now()
+        now = time.monotonic()
         available_casters: Set[IPlayer] = {caster for caster in all_casters if not caster.is_busy()}
         ready_abilities_by_target: Dict[str, Set[AbilityVariantKey]] = dict()
         running_abilities_by_target: Dict[str, Set[AbilityVariantKey]] = dict()
@@ -1037,7 +1055,7 @@ class RotationWithTargetRanking(RequestWithShortCache, RequiresRuntime):
     # noinspection PyMethodMayBeStatic
     def __use_best_running_ability_if_none_is_ready(self,
                                                     available_casters: Set[IPlayer],
-                                                    now: datetime.datetime,
+                                                    now: float,
                                                     ready_abilities_by_caster: Dict[IPlayer, Set[AbilityVariantKey]],
                                                     ready_abilities_by_target: Dict[str, Set[AbilityVariantKey]],
                                                     running_abilities_by_caster: Dict[IPlayer, Set[AbilityVariantKey]],
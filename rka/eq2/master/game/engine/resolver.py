@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-import datetime
 import enum
+import time
 from enum import auto
 from typing import Union, List, Callable, Optional, Tuple, Iterable
 
@@ -231,17 +231,17 @@ class Combine:
 
 class CommonCombineConditions:
     @staticmethod
-    def is_running(ability: IAbility, now: datetime.datetime) -> VisitResult:
+    def is_running(ability: IAbility, now: float) -> VisitResult:
         running = not ability.is_duration_expired(now)
         return VisitResult.ACCEPT if running else VisitResult.REJECT
 
     @staticmethod
-    def is_reusable(ability: IAbility, now: datetime.datetime) -> VisitResult:
+    def is_reusable(ability: IAbility, now: float) -> VisitResult:
         running = ability.is_reusable(now)
         return VisitResult.ACCEPT if running else VisitResult.REJECT
 
     @staticmethod
-    def is_reusable_or_running(ability: IAbility, now: datetime.datetime) -> VisitResult:
+    def is_reusable_or_running(ability: IAbility, now: float) -> VisitResult:
         running = not ability.is_duration_expired(now)
         if running:
             return VisitResult.ACCEPT_AND_SKIP
@@ -249,7 +249,7 @@ class CommonCombineConditions:
         return VisitResult.ACCEPT if reusable else VisitResult.REJECT
 
     @staticmethod
-    def is_reusable_and_not_running(ability: IAbility, now: datetime.datetime) -> VisitResult:
+    def is_reusable_and_not_running(ability: IAbility, now: float) -> VisitResult:
         running = not ability.is_duration_expired(now)
         if running:
             return VisitResult.REJECT_ALL
@@ -283,9 +283,9 @@ class ResolvedCombine:
             return True
         return self.__predicate_ability_filter(ability)
 
-    def check_condition(self, condition: CombineVisitor, now: Optional[datetime.datetime] = None) -> bool:
-        if not now:
-            now = datetime.datetime.now()
+    def check_condition(self, condition: CombineVisitor, now: Optional[float] = None) -> bool:
+        if now is None:
+            now = time.monotonic()
         accepted_count = 0
         accept_final_result = False
         for item in self.__items:
@@ -330,9 +330,9 @@ class ResolvedCombine:
 
     # may return True, [] if condition returned ACCEPT_AND_SKIP
     # for example: condition is met, but no ability needs to be cast
-    def get_by_condition(self, condition: CombineVisitor, now: Optional[datetime.datetime] = None) -> Tuple[bool, List[IAbility]]:
-        if not now:
-            now = datetime.datetime.now()
+    def get_by_condition(self, condition: CombineVisitor, now: Optional[float] = None) -> Tuple[bool, List[IAbility]]:
+        if now is None:
+            now = time.monotonic()
         result = list()
         accepted_count = 0
         accept_final_result = False
@@ -386,6 +386,6 @@ class ResolvedCombine:
         return accept_final_result, result
 
 
-CombineVisitor = Callable[[IAbility, datetime.datetime], VisitResult]
+CombineVisitor = Callable[[IAbility, float], VisitResult]
 TAbilities = Union[IAbility, IAbilityLocator, Iterable[Union[IAbility, IAbilityLocator]]]
 TCombineItems = Union[IAbilityLocator, List[Union[IAbility, IAbilityLocator, Combine]]]
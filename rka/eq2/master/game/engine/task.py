@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import datetime
 import time
-from typing import Optional, Dict, Type, Callable, Tuple
+from typing import Optional, Dict, Type, Callable, Tuple, List
 
 from rka.eq2.master.game.engine import logger
 from rka.eq2.master.game.interfaces import IAbility, TAbilityFilter
@@ -42,6 +42,8 @@ class Task:
         self.__set_timers()
         self.__was_started = False
         self.__hash: Optional[int] = None
+        # notified when the delay or expiration may have changed, outside of the passage of time
+        self.__timers_listener: Optional[Callable[[Task], None]] = None
 
     def set_description(self, description: str):
         self.__description = description
@@ -76,6 +78,14 @@ class Task:
         self.__delay_until = datetime.datetime.now() + datetime.timedelta(seconds=self.__next_delay)
         self.__expires_at = datetime.datetime.now() + datetime.timedelta(seconds=self.__duration) + datetime.timedelta(seconds=self.__next_delay)
 
+    def set_timers_listener(self, listener: Optional[Callable[[Task], None]]):
+        self.__timers_listener = listener
+
+    def __notify_timers_changed(self):
+        listener = self.__timers_listener
+        if listener is not None:
+            listener(self)
+
     def get_duration(self) -> float:
         return self.__duration
 
@@ -91,6 +101,16 @@ class Task:
     def set_duration(self, duration: float):
         # this will apply when the duration is started next time
         self.__duration = duration
+        self.__notify_timers_changed()
+
+    def get_delay_until_ts(self) -> float:
+        return self.__delay_until.timestamp()
+
+    # None if the task does not expire by time
+    def get_expires_at_ts(self) -> Optional[float]:
+        if self.__duration < 0:
+            return None
+        return self.__expires_at.timestamp()
 
     def is_in_delay(self) -> bool:
         if self.__delay_until is None:
@@ -119,11 +139,13 @@ class Task:
         self.__was_started = True
         self.__set_timers()
         self.__set_start_flags()
+        self.__notify_timers_changed()
 
     # does not set new delay, clears next delay, but clears expiration and extends duration
     def restart(self):
         self.__set_start_flags()
         self.extend()
+        self.__notify_timers_changed()
 
     def extend(self, duration: Optional[float] = None):
         if self.is_expired() or self.is_in_delay():
@@ -138,9 +160,11 @@ class Task:
             self.__expires_at = new_expiration
             remaining_duration = new_expiration - now
             self._on_extend(remaining_duration.total_seconds())
+            self.__notify_timers_changed()
 
     def expire(self):
         self.__forced_expire = True
+        self.__notify_timers_changed()
 
     def notify_expired(self):
         logger.detail(f'notify_expired: {self}')
@@ -195,6 +219,12 @@ class FilterTask(Task, TAbilityFilter):
     def accept(self, ability: IAbility) -> bool:
         return self._filter_cb(ability)
 
+    def get_predicates(self) -> List[TAbilityFilter]:
+        get_predicates = getattr(self._filter_cb, 'get_predicates', None)
+        if get_predicates is not None:
+            return get_predicates()
+        return [self._filter_cb]
+
     def __call__(self, ability: IAbility) -> bool:
         return self._filter_cb(ability)
 
@@ -0,0 +1,82 @@
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from rka.eq2.master.game.engine.processor import TaskController
+from rka.eq2.master.game.engine.task import Task
+from rka.util.benchmark import LatencyRecorder
+
+
+class _BenchmarkTask(Task):
+    def __init__(self, description: str, duration: float, on_expired: Callable[[Task], None]):
+        Task.__init__(self, description=description, duration=duration)
+        self.__on_expired = on_expired
+
+    def _on_expire(self):
+        self.__on_expired(self)
+
+
+def run_ticks(idle_tasks: int, short_tasks: int, run_duration: float, tick: float, min_duration: float, max_duration: float,
+              report: Callable[[str], None] = print):
+    controller = TaskController(runtime=None)
+    rng = random.Random(idle_tasks)
+    expired: List[Task] = list()
+    short_lived: List[Task] = list()
+    next_task_id = [0]
+
+    def add_task(duration: float) -> Task:
+        task = _BenchmarkTask(f'benchmark task {idle_tasks}-{next_task_id[0]}', duration, expired.append)
+        next_task_id[0] += 1
+        # some tasks start with a delay
+        if next_task_id[0] % 4 == 0:
+            task.delay_next_start(rng.uniform(0.0, min_duration))
+        controller.add_othertask(task)
+        return task
+
+    # long running tasks only add to the number of tasks, the churn comes from short lived ones
+    for _ in range(idle_tasks):
+        add_task(run_duration * 10.0)
+    for _ in range(short_tasks):
+        short_lived.append(add_task(rng.uniform(min_duration, max_duration)))
+    # start all initial tasks before measuring, including the delayed ones
+    controller.prepare_running_tasks()
+    time.sleep(min_duration)
+    controller.prepare_running_tasks()
+    recorder = LatencyRecorder(['tick'])
+    restarted = 0
+    end_time = time.time() + run_duration
+    while time.time() < end_time:
+        start = time.perf_counter()
+        controller.prepare_running_tasks()
+        # replace expired tasks to keep the number of live tasks constant
+        for expired_task in expired:
+            short_lived[short_lived.index(expired_task)] = add_task(rng.uniform(min_duration, max_duration))
+        expired.clear()
+        # triggers restart a few tasks every tick
+        for _ in range(5):
+            controller.add_othertask(short_lived[rng.randrange(len(short_lived))])
+            restarted += 1
+        recorder.record('tick', time.perf_counter() - start)
+        time.sleep(tick)
+    p50, p99 = recorder.get_percentiles('tick', [50.0, 99.0])
+    report(f'{idle_tasks} idle + {short_tasks} short lived tasks: {recorder.get_count("tick")} ticks, {next_task_id[0] - idle_tasks - short_tasks} replaced, '
+           f'{restarted} restarted, tick p50 {p50 * 1000.0:.3f}ms, p99 {p99 * 1000.0:.3f}ms')
+    controller.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Measure TaskController tick cost with many short lived tasks')
+    arg_parser.add_argument('--idle-tasks', type=int, action='append', help='long running task counts, default: 0, 2k, 8k, 32k')
+    arg_parser.add_argument('--short-tasks', type=int, default=1000, help='short lived tasks, replaced when expired')
+    arg_parser.add_argument('--run', type=float, default=3.0, help='seconds per task count')
+    arg_parser.add_argument('--tick', type=float, default=0.01)
+    arg_parser.add_argument('--min-duration', type=float, default=0.2)
+    arg_parser.add_argument('--max-duration', type=float, default=2.0)
+    args = arg_parser.parse_args()
+    for idle_tasks in args.idle_tasks if args.idle_tasks else [0, 2000, 8000, 32000]:
+        run_ticks(idle_tasks, args.short_tasks, args.run, args.tick, args.min_duration, args.max_duration)
+
+
+if __name__ == '__main__':
+    main()
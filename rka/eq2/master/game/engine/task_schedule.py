@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import heapq
+import time
+from collections import deque
+from typing import Dict, List, Tuple, Optional, Deque, Generic, TypeVar, KeysView
+
+from rka.eq2.master.game.engine import logger
+from rka.eq2.master.game.engine.task import Task
+
+T = TypeVar('T', bound=Task)
+
+
+class _TimerHeap(Generic[T]):
+    # heap is rebuilt when stale entries outnumber current ones
+    MIN_HEAP_SIZE_TO_COMPACT = 64
+
+    def __init__(self):
+        # entries are (time, seq, task); seq avoids comparing tasks
+        self.__heap: List[Tuple[float, int, T]] = list()
+        # only the latest time of each task is current, other entries are stale and skipped
+        self.__current_times: Dict[T, float] = dict()
+        self.__next_seq = 0
+
+    def push(self, task: T, at_time: Optional[float]):
+        if at_time is None:
+            self.__current_times.pop(task, None)
+            return
+        if self.__current_times.get(task) == at_time:
+            return
+        self.__current_times[task] = at_time
+        heapq.heappush(self.__heap, (at_time, self.__next_seq, task))
+        self.__next_seq += 1
+        if len(self.__heap) >= _TimerHeap.MIN_HEAP_SIZE_TO_COMPACT and len(self.__heap) > 2 * len(self.__current_times):
+            self.__heap = [entry for entry in self.__heap if self.__current_times.get(entry[2]) == entry[0]]
+            heapq.heapify(self.__heap)
+
+    def remove(self, task: T):
+        self.__current_times.pop(task, None)
+
+    def pop_due(self, now: float) -> List[T]:
+        due_tasks: List[T] = list()
+        heap = self.__heap
+        while heap and heap[0][0] <= now:
+            at_time, _, task = heapq.heappop(heap)
+            if self.__current_times.get(task) != at_time:
+                continue
+            del self.__current_times[task]
+            due_tasks.append(task)
+        return due_tasks
+
+
+# running and delayed tasks of one kind; membership is hashed and timers are kept in heaps, so a tick only touches due tasks
+class TaskSchedule(Generic[T]):
+    def __init__(self):
+        # dicts keep insertion order, values are unused
+        self.__running: Dict[T, None] = dict()
+        self.__delayed: Dict[T, None] = dict()
+        self.__delay_heap: _TimerHeap[T] = _TimerHeap()
+        self.__expiry_heap: _TimerHeap[T] = _TimerHeap()
+        # tasks which override is_expired cannot be scheduled by time and are tested every tick
+        self.__polled: Dict[T, None] = dict()
+        # tasks whose timers changed, possibly in other threads; deque is thread safe
+        self.__changed_tasks: Deque[T] = deque()
+
+    @staticmethod
+    def __is_expiry_polled(task: Task) -> bool:
+        return type(task).is_expired is not Task.is_expired
+
+    def __on_timers_changed(self, task: T):
+        self.__changed_tasks.append(task)
+
+    def __set_running(self, task: T):
+        self.__running[task] = None
+        if TaskSchedule.__is_expiry_polled(task):
+            self.__polled[task] = None
+        else:
+            self.__expiry_heap.push(task, task.get_expires_at_ts())
+
+    def __remove_running(self, task: T):
+        del self.__running[task]
+        self.__polled.pop(task, None)
+        self.__expiry_heap.remove(task)
+        task.set_timers_listener(None)
+
+    def is_running(self, task: T) -> bool:
+        return task in self.__running
+
+    def is_delayed(self, task: T) -> bool:
+        return task in self.__delayed
+
+    def add_delayed(self, task: T):
+        self.__delayed[task] = None
+        self.__delay_heap.push(task, task.get_delay_until_ts())
+        task.set_timers_listener(self.__on_timers_changed)
+
+    def remove_delayed(self, task: T):
+        del self.__delayed[task]
+        self.__delay_heap.remove(task)
+
+    # live view in start order, it changes only in prepare()
+    def get_running(self) -> KeysView[T]:
+        return self.__running.keys()
+
+    def get_delayed(self) -> List[T]:
+        return list(self.__delayed)
+
+    def get_running_count(self) -> int:
+        return len(self.__running)
+
+    def get_delayed_count(self) -> int:
+        return len(self.__delayed)
+
+    def __update_changed_tasks(self):
+        changed_tasks = self.__changed_tasks
+        while changed_tasks:
+            task = changed_tasks.popleft()
+            if task in self.__delayed:
+                self.__delay_heap.push(task, task.get_delay_until_ts())
+            elif task in self.__running:
+                if task.is_in_delay():
+                    logger.warn(f'unexpected delay {task.get_delay()} found on {task}')
+                if task.is_expired():
+                    # forced expiration, or a new expiration time which has already passed
+                    self.__expiry_heap.push(task, time.time())
+                elif task not in self.__polled:
+                    self.__expiry_heap.push(task, task.get_expires_at_ts())
+
+    # returns True if running tasks changed
+    def prepare(self) -> bool:
+        self.__update_changed_tasks()
+        now = time.time()
+        changed = False
+        for ready_task in self.__delay_heap.pop_due(now):
+            if ready_task.is_in_delay():
+                self.__delay_heap.push(ready_task, ready_task.get_delay_until_ts())
+                continue
+            del self.__delayed[ready_task]
+            self.__set_running(ready_task)
+            changed = True
+            logger.debug(f'started: {ready_task.__class__.__name__} {ready_task}')
+            ready_task.notify_started()
+        expired_tasks = [task for task in self.__polled if task.is_expired()]
+        for due_task in self.__expiry_heap.pop_due(now):
+            if due_task.is_expired():
+                expired_tasks.append(due_task)
+            else:
+                # expiration was extended without notification, or the clocks differ slightly; check again later
+                expires_at = due_task.get_expires_at_ts()
+                if expires_at is not None:
+                    self.__expiry_heap.push(due_task, max(now + 0.001, expires_at))
+        for expired_task in expired_tasks:
+            if expired_task not in self.__running:
+                continue
+            self.__remove_running(expired_task)
+            changed = True
+            logger.debug(f'expired: {expired_task.__class__.__name__} {expired_task}')
+            expired_task.notify_expired()
+        return changed
@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import Dict, List, Tuple, Optional
+
+from rka.components.concurrency.timing_stats import TimingHistogram
+from rka.eq2.master.game.engine import logger
+
+# filtering: preparing running tasks and filters
+# bags: evaluating requests and collecting their reusable abilities
+# selection: choosing abilities by priority and preference
+# casting: casting the selected abilities and notifying tasks
+PHASES = ['filtering', 'bags', 'selection', 'casting']
+
+_request_scope = threading.local()
+
+
+class _RequestCost:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class TickProfiler:
+    def __init__(self, name: str, tick_duration: float, log_period: float):
+        self.__name = name
+        self.__tick_duration = tick_duration
+        self.__log_period = log_period
+        self.__lock = threading.Lock()
+        self.__phases: Dict[str, TimingHistogram] = {phase: TimingHistogram() for phase in PHASES}
+        self.__ticks = TimingHistogram()
+        self.__overruns = 0
+        # requests processed immediately by run_request, outside of ticks
+        self.__immediate = TimingHistogram()
+        # cumulative evaluation cost of get_available_ability_bag, by request class; costs of composite requests include their children
+        self.__request_costs: Dict[str, _RequestCost] = dict()
+        self.__last_log_time = time.time()
+
+    def record_request(self, request_class_name: str, duration: float):
+        with self.__lock:
+            cost = self.__request_costs.get(request_class_name)
+            if cost is None:
+                cost = _RequestCost()
+                self.__request_costs[request_class_name] = cost
+            cost.count += 1
+            cost.total += duration
+            if duration > cost.max:
+                cost.max = duration
+
+    # phases which did not run in the tick are recorded as zero, so that means are taken over all ticks
+    def record_tick(self, duration: float, phase_durations: Dict[str, float]):
+        with self.__lock:
+            self.__ticks.record(duration)
+            for phase, histogram in self.__phases.items():
+                histogram.record(phase_durations.get(phase, 0.0))
+            if duration > self.__tick_duration:
+                self.__overruns += 1
+        if self.__log_period > 0.0:
+            now = time.time()
+            if now - self.__last_log_time >= self.__log_period:
+                self.__last_log_time = now
+                logger.info(self.get_report())
+
+    def record_immediate(self, duration: float):
+        with self.__lock:
+            self.__immediate.record(duration)
+
+    def get_request_costs(self) -> Dict[str, float]:
+        with self.__lock:
+            return {request_class_name: cost.total for request_class_name, cost in self.__request_costs.items()}
+
+    def get_report(self, top_requests=10) -> str:
+        with self.__lock:
+            lines = [f'{self.__name}: {self.__ticks.get_count()} ticks, {self.__overruns} over {self.__tick_duration * 1000.0:.0f}ms, '
+                     f'mean {self.__ticks.get_mean() * 1000.0:.2f}ms, p99 {self.__ticks.get_percentile(99.0) * 1000.0:.2f}ms, '
+                     f'max {self.__ticks.get_max() * 1000.0:.2f}ms']
+            for phase, histogram in self.__phases.items():
+                lines.append(f'  {phase}: mean {histogram.get_mean() * 1000.0:.3f}ms, p99 {histogram.get_percentile(99.0) * 1000.0:.3f}ms, '
+                             f'max {histogram.get_max() * 1000.0:.3f}ms')
+            if self.__immediate.get_count():
+                lines.append(f'  immediate: {self.__immediate.get_count()} runs, mean {self.__immediate.get_mean() * 1000.0:.3f}ms, '
+                             f'max {self.__immediate.get_max() * 1000.0:.3f}ms')
+            costs: List[Tuple[str, _RequestCost]] = sorted(self.__request_costs.items(), key=lambda item: item[1].total, reverse=True)
+            for request_class_name, cost in costs[:top_requests]:
+                lines.append(f'  {request_class_name}: total {cost.total * 1000.0:.1f}ms, n={cost.count}, '
+                             f'mean {cost.total / cost.count * 1000.0:.3f}ms, max {cost.max * 1000.0:.3f}ms')
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self.__lock:
+            self.__phases = {phase: TimingHistogram() for phase in PHASES}
+            self.__ticks = TimingHistogram()
+            self.__overruns = 0
+            self.__immediate = TimingHistogram()
+            self.__request_costs.clear()
+
+
+# makes the profiler available to composite requests evaluated in the current thread, so that their children are measured too
+class RequestProfilingScope:
+    def __init__(self, profiler: Optional[TickProfiler]):
+        self.__profiler = profiler
+        self.__outer_profiler: Optional[TickProfiler] = None
+
+    def __enter__(self):
+        self.__outer_profiler = getattr(_request_scope, 'profiler', None)
+        _request_scope.profiler = self.__profiler
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _request_scope.profiler = self.__outer_profiler
+
+
+def get_request_profiler() -> Optional[TickProfiler]:
+    return getattr(_request_scope, 'profiler', None)
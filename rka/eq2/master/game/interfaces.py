@@ -75,6 +75,10 @@ class AbilityUniqueKey(AbilityKey):
         AbilityKey.__init__(self, ability, AbilityKey.UNIQUE)
 
 
+# time of ability readiness checks: datetime, a time.monotonic() value or None for now
+TAbilityTime = Union[datetime.datetime, float, None]
+
+
 class IAbility:
     @staticmethod
     def make_ability_shared_key(player_id: str, ability_shared_name: str) -> str:
@@ -158,31 +162,31 @@ class IAbility:
     def get_duration_secs(self) -> float:
         raise NotImplementedError()
 
-    def get_remaining_reuse_wait_td(self, now: Optional[datetime.datetime] = None) -> datetime.timedelta:
+    def get_remaining_reuse_wait_td(self, now: TAbilityTime = None) -> datetime.timedelta:
         raise NotImplementedError()
 
-    def get_remaining_duration_sec(self, now: Optional[datetime.datetime] = None) -> float:
+    def get_remaining_duration_sec(self, now: TAbilityTime = None) -> float:
         raise NotImplementedError()
 
-    def is_casting(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_casting(self, now: TAbilityTime = None) -> bool:
         raise NotImplementedError()
 
-    def is_recovering(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_recovering(self, now: TAbilityTime = None) -> bool:
         raise NotImplementedError()
 
-    def is_after_recovery(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_after_recovery(self, now: TAbilityTime = None) -> bool:
         raise NotImplementedError()
 
-    def is_reuse_expired(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_reuse_expired(self, now: TAbilityTime = None) -> bool:
         raise NotImplementedError()
 
-    def is_reusable(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_reusable(self, now: TAbilityTime = None) -> bool:
         raise NotImplementedError()
 
     def is_permanent(self) -> bool:
         raise NotImplementedError()
 
-    def is_duration_expired(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_duration_expired(self, now: TAbilityTime = None) -> bool:
         raise NotImplementedError()
 
     def can_affect_target(self, target: TValidTarget) -> bool:
@@ -194,7 +198,7 @@ class IAbility:
     def is_sustained_by(self, player: TValidPlayer) -> bool:
         raise NotImplementedError()
 
-    def is_reusable_and_duration_expired(self, now: Optional[datetime.datetime] = None) -> bool:
+    def is_reusable_and_duration_expired(self, now: TAbilityTime = None) -> bool:
         raise NotImplementedError()
 
     def is_permitted_in_caster_state(self) -> bool:
@@ -465,7 +469,13 @@ class IEffectsManager:
     def get_effects(self, apply_target: EffectTarget, effect_type: Optional[EffectType] = None) -> List[IEffect]:
         raise NotImplementedError()
 
-    def cancel_effects(self, effect_filter: Callable[[IEffect], bool]):
+    def cancel_effects(self, effect_filter: Optional[Callable[[IEffect], bool]] = None, source_ability: Optional[IAbility] = None,
+                       source_player: Optional[IPlayer] = None, sustain_target: Optional[EffectTarget] = None,
+                       scope_type: Optional[EffectScopeType] = None):
+        raise NotImplementedError()
+
+    # drop resolved effect values, when something they depend on changes outside of the effects
+    def clear_cache(self):
         raise NotImplementedError()
 
 
@@ -120,7 +120,7 @@ class CombatPhase(ICombatPhase):
         @classmethod
         def sync(cls, state_change_fn: Callable[[CombatPhase], None]):
             def wrapper(self, *_args, **_kwargs):
-                shared_worker.push_task(lambda: state_change_fn(self))
+                shared_worker.post_task(lambda: state_change_fn(self))
 
             return wrapper
 
@@ -51,11 +51,11 @@ class FollowLocationsScript(PlayerScriptTask):
 
     def _notify_waypoint_reached(self, location: Location):
         for observer in self.__movement_observers.copy():
-            shared_worker.push_task(lambda: observer.waypoint_reached(self.player, location))
+            shared_worker.post_task(lambda: observer.waypoint_reached(self.player, location))
 
     def _notify_movement_completed(self, last_location: Optional[Location], reached: bool):
         for observer in self.__movement_observers.copy():
-            shared_worker.push_task(lambda: observer.movement_completed(self.player, last_location, reached))
+            shared_worker.post_task(lambda: observer.movement_completed(self.player, last_location, reached))
 
     def add_movement_observer(self, movement_observer: IFollowLocationsObserver):
         self.__movement_observers.append(movement_observer)
@@ -128,4 +128,6 @@ class RemotePlayersFixGroupAssignment(PlayerScriptTask):
 
     def _run(self, runtime: IRuntime):
         for player in runtime.player_mgr.get_players(and_flags=ClientFlags.Remote, min_status=PlayerStatus.Offline):
-            player.get_client_config_data().restore_group()
+            if player.get_client_config_data().restore_group():
+                runtime.request_factory.clear_cache()
+                runtime.effects_mgr.clear_cache()
@@ -46,7 +46,7 @@ class _Decorators:
     @classmethod
     def sync(cls, trigger_script_fn: Callable):
         def wrapper(self, *args, **kwargs):
-            shared_worker.push_task(lambda: trigger_script_fn(self, *args, **kwargs))
+            shared_worker.post_task(lambda: trigger_script_fn(self, *args, **kwargs))
 
         return wrapper
 
@@ -60,7 +60,7 @@ class _Decorators:
                 if now - last_call[0] <= period:
                     return
                 last_call[0] = now
-                shared_worker.push_task(lambda: trigger_script_fn(self, *args, **kwargs))
+                shared_worker.post_task(lambda: trigger_script_fn(self, *args, **kwargs))
 
             return wrapper
 
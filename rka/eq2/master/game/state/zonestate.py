@@ -90,6 +90,7 @@ class ZoneState:
                     if player.get_client_config_data().join_to_group(main_player_grp):
                         # need to clear this cache, it relies on group setups
                         self.__runtime.request_factory.clear_cache()
+                        self.__runtime.effects_mgr.clear_cache()
         self.add_player_in_zone(player_name)
 
     def __remove_main_group_player(self, player_name: str):
@@ -101,6 +102,7 @@ class ZoneState:
                 if player:
                     if player.get_client_config_data().restore_group():
                         self.__runtime.request_factory.clear_cache()
+                        self.__runtime.effects_mgr.clear_cache()
 
     def __clear_main_group_players(self):
         with self.__lock:
@@ -110,6 +112,7 @@ class ZoneState:
                 if player:
                     if player.get_client_config_data().restore_group():
                         self.__runtime.request_factory.clear_cache()
+                        self.__runtime.effects_mgr.clear_cache()
             self.__player_names_in_main_group.clear()
 
     def __player_joined_main_group(self, event: PlayerInfoEvents.PLAYER_JOINED_GROUP):
@@ -0,0 +1,87 @@
+from typing import Optional, List, Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # importing the game interfaces pulls in modules which need the game host
+    from rka.eq2.master.game.interfaces import IAbility
+
+
+class _OfflinePlayerInfo:
+    def __init__(self, health: int):
+        self.health = health
+
+
+class _OfflinePlayer:
+    def __init__(self, client_id: str, player_name: str):
+        self.__client_id = client_id
+        self.__player_name = player_name
+        self.__player_info = _OfflinePlayerInfo(health=100000000)
+
+    def get_client_id(self) -> str:
+        return self.__client_id
+
+    def get_player_name(self) -> str:
+        return self.__player_name
+
+    def get_player_info(self) -> _OfflinePlayerInfo:
+        return self.__player_info
+
+
+class _OfflinePlayerManager:
+    def __init__(self, player: _OfflinePlayer):
+        self.__player = player
+
+    def get_player_by_name(self, player_name: str) -> Optional[_OfflinePlayer]:
+        return self.__player if player_name == self.__player.get_player_name() else None
+
+    def get_player_names(self) -> List[str]:
+        return [self.__player.get_player_name()]
+
+
+class _OfflineZoneState:
+    def __init__(self, zoned_player_names: List[str]):
+        self.__zoned_player_names = zoned_player_names
+
+    def get_players_in_zone(self) -> List[str]:
+        return list(self.__zoned_player_names)
+
+    def is_player_in_zone(self, player_name: str) -> bool:
+        return player_name in self.__zoned_player_names
+
+
+class _OfflineCensusCache:
+    # noinspection PyMethodMayBeStatic
+    def get_max_known_player_hitpoints(self) -> Optional[int]:
+        return 100000000
+
+
+class _OfflineAbilityRegistry:
+    # noinspection PyMethodMayBeStatic
+    def find_ability_map_for_player_name(self, _player_name: str) -> Dict[str, 'IAbility']:
+        return dict()
+
+    # noinspection PyMethodMayBeStatic
+    def get_ability_name_by_effect_name(self, _effect_name_lower: str) -> Optional[str]:
+        return None
+
+    # noinspection PyMethodMayBeStatic
+    def get_ability_locator_by_name(self, _ability_name_lower: str):
+        return None
+
+
+class _OfflinePlayerState:
+    def __init__(self, player_name: str):
+        self.__player_name = player_name
+
+    def get_main_player_name(self) -> Optional[str]:
+        return self.__player_name
+
+
+# the part of IRuntime used by DpsLogParser, for replaying logs without game clients, census or database
+class OfflineRuntime:
+    def __init__(self, client_id: str, player_name: str, zoned_player_names: Optional[List[str]] = None):
+        self.player = _OfflinePlayer(client_id, player_name)
+        self.player_mgr = _OfflinePlayerManager(self.player)
+        self.zonestate = _OfflineZoneState(zoned_player_names if zoned_player_names else [player_name])
+        self.census_cache = _OfflineCensusCache()
+        self.ability_reg = _OfflineAbilityRegistry()
+        self.playerstate = _OfflinePlayerState(player_name)
@@ -5,13 +5,12 @@ import os
 import tempfile
 import time
 from threading import RLock
-from typing import Dict, Generator, Iterable, Optional, List, FrozenSet, Set, Callable, Tuple
+from typing import Dict, Generator, Iterable, Optional, List, FrozenSet, Set, Callable, Tuple, TYPE_CHECKING
 
 from rka.components.events.event_system import EventSystem
 from rka.components.io.log_service import LogLevel
 from rka.eq2.master import IRuntime
 from rka.eq2.master.game.events.combat_parser import CombatParserEvents
-from rka.eq2.master.game.interfaces import IPlayer, IAbility
 from rka.eq2.master.parsing import CTConfirmRule
 from rka.eq2.master.parsing import logger, IDPSParser, CombatantType, ICombatantRecord, get_dps_str, AbilityCombatRecord, DpsMeasure, \
     SHORTTERM_MEASURE_DURATION, INSTANT_MEASURE_DURATION, CRITICAL_STONESKIN_HP_RATIO, ShortTermDpsMeasure, IDPSParserHook
@@ -20,6 +19,10 @@ from rka.eq2.parsing.combat_logparser import CombatLogParser, DamageType
 from rka.eq2.parsing.parsing_util import ParsingHelpers
 from rka.eq2.shared.flags import MutableFlags
 
+if TYPE_CHECKING:
+    # game interfaces import UI modules which need the game host; annotations only, so parsers can be replayed offline
+    from rka.eq2.master.game.interfaces import IPlayer, IAbility
+
 
 class IncomingRecords:
     def __init__(self, runtime: IRuntime, combatant_name: str, initial_combatant_type: CombatantType):
@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import Callable, Type
 
 from rka.components.events import EventType
-from rka.components.events.event_bus import EventBus, SpecificEventBus
+from rka.components.events.event_bus import EventBus, SpecificEventBus, EventBusStats, OverloadConfig
 from rka.components.events.event_system import BusThread, IEventBusPoster, IEventBusPosterFactory
 from rka.components.io.log_service import LogService
 from rka.eq2.master import IRuntime
@@ -13,8 +13,9 @@ logger = LogService(LOG_EVENTS)
 
 
 class RemoteSpecificEventBusProxy(SpecificEventBus[EventType]):
-    def __init__(self, runtime: IRuntime, worker: BusThread, client_id: str, event_type: Type[EventType]):
-        SpecificEventBus.__init__(self, client_id, worker, event_type)
+    def __init__(self, runtime: IRuntime, worker: BusThread, client_id: str, event_type: Type[EventType], stats: EventBusStats,
+                 overload_config: OverloadConfig):
+        SpecificEventBus.__init__(self, client_id, worker, event_type, stats, overload_config)
         self.__runtime = runtime
         self.__client_id = client_id
         self.__event_type = event_type
@@ -64,7 +65,7 @@ class RemoteEventBus(EventBus):
         logger.info(f'created remote event bus system for {client_id}')
 
     def _create_specific_event_bus(self, event_type: Type[EventType]) -> IEventBusPoster[EventType]:
-        return RemoteSpecificEventBusProxy(self.__runtime, self._get_worker(), self.__client_id, event_type)
+        return RemoteSpecificEventBusProxy(self.__runtime, self._get_worker(), self.__client_id, event_type, self._get_stats(), self._get_overload_config())
 
 
 class RemoteEventBusFactory(IEventBusPosterFactory):
@@ -19,7 +19,8 @@ from rka.components.ui.alerts import Alerts
 from rka.components.ui.overlay import Severity
 from rka.eq2.configs import configs_root
 from rka.eq2.configs.shared.game_constants import MONGODB_SERVICE_URI, MONGODB_CERTIFICATE_FILENAME, CENSUS_SERVICE_NAME, MONGODB_DATABASE_NAME
-from rka.eq2.configs.shared.rka_constants import LOG_PARSER_SKIPCHARS, MAX_OVERLAY_STATUS_SLOTS, LOCAL_ABILITY_INJECTOR_PATH, LOCAL_COMMAND_INJECTOR_PATH, STAY_IN_VOICE
+from rka.eq2.configs.shared.rka_constants import LOG_PARSER_SKIPCHARS, MAX_OVERLAY_STATUS_SLOTS, LOCAL_ABILITY_INJECTOR_PATH, LOCAL_COMMAND_INJECTOR_PATH, STAY_IN_VOICE, \
+    LOG_PARSER_GAME_TIMESTAMPS
 from rka.eq2.master import IRuntime
 from rka.eq2.master.game.player import PlayerStatus
 from rka.eq2.master.master_events import MasterEvents
@@ -223,7 +224,7 @@ class Runtime(IRuntime, Closeable, IActiveFileMonitorObserver):
         local_players = self.player_mgr.get_players(and_flags=ClientFlags.Local, min_status=PlayerStatus.Offline)
         for player in local_players:
             log_filename = self.host_config.get_log_filename(player.get_client_id())
-            log_reader = LogReaderFactory.create_file_logreader(log_filename)
+            log_reader = LogReaderFactory.create_file_logreader(log_filename, use_game_timestamps=LOG_PARSER_GAME_TIMESTAMPS)
             log_reader = TruncateLogHeader(log_reader, LOG_PARSER_SKIPCHARS)
             log_parser = DpsLogParser(self, player, log_reader, self.local_client_event_system)
             log_injector = LogReaderFactory.create_file_loginjector(log_filename)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple, Iterable
+from typing import Optional, Tuple, Iterable, List
 
 from rka.components.io.filemonitor import IFileMonitor
 from rka.components.io.log_service import LogService
@@ -16,6 +16,12 @@ class ILogReader:
     def read_log_with_timestamp(self) -> Optional[Tuple[Optional[str], float]]:
         raise NotImplementedError()
 
+    def read_logs_with_timestamps(self) -> Optional[List[Tuple[Optional[str], float]]]:
+        raise NotImplementedError()
+
+    def wait_for_logs(self, poll_time: float):
+        raise NotImplementedError()
+
     def wait_until_empty(self):
         raise NotImplementedError()
 
@@ -3,7 +3,7 @@ from __future__ import annotations
 import time
 import traceback
 from enum import auto
-from typing import Match, Optional, Tuple, Set
+from typing import Match, Optional, Tuple, Set, List, FrozenSet, Pattern, Callable
 
 import regex as re
 
@@ -48,6 +48,7 @@ class _CommonRE:
     drain_number = formatted_number
     power_number = formatted_number
     critical = r'(?:a (?:(?:Fabled|Legendary|Mythical) )?critical of )'
+    word_re = re.compile(r'\w+')
 
     @staticmethod
     def parse_int(text: str) -> int:
@@ -209,6 +210,32 @@ class CombatLogParser(LogParser):
         self.__compiled_stoneskin_re = CombatLogParser.compile_stoneskin_re()
         self.__compiled_interrupt_re = CombatLogParser.compile_interrupt_re()
         self.__compiled_ignored_logs_re = CombatLogParser.compile_ignored_logs_re()
+        # every line matched by the RE contains at least one of its keywords as a whole word. keep the order of testing.
+        self.__classifiers: List[Tuple[FrozenSet[str], Pattern, Optional[Callable[[Match, float], None]]]] = [
+            # all combat damage hits
+            (frozenset({'hit', 'hits', 'multi', 'flurry', 'flurries', 'aoe', 'try', 'tries', 'attempt', 'attempts'}),
+             self.__compiled_combat_hit_re, self.__parse_combat_hit_match),
+            # ability effects such as healing, warding, curing, regeneration, power
+            (frozenset({'absorbs', 'heals', 'repairs', 'refreshes', 'regenerates', 'relieves'}),
+             self.__compiled_ability_effect_re, self.__parse_ability_effect_match),
+            # power drain
+            (frozenset({'draining'}), self.__compiled_power_drain_re, self.__parse_power_drain_match),
+            # taunts and positions
+            (frozenset({'hate'}), self.__compiled_threat_re, self.__parse_threat_match),
+            # damage reductions/intercepts
+            (frozenset({'reduces'}), self.__compiled_damage_reduction_re, self.__parse_damage_reduction_match),
+            # new wards
+            (frozenset({'ward'}), self.__compiled_applied_ward_re, self.__parse_applied_ward_match),
+            # stoneskins triggering
+            (frozenset({'stoneskin'}), self.__compiled_stoneskin_re, self.__parse_stoneskin_match),
+            # dispels
+            (frozenset({'dispels'}), self.__compiled_effect_dispel_re, self.__parse_effect_dispel_match),
+            # interrupted casting
+            (frozenset({'interrupted'}), self.__compiled_interrupt_re, self.__parse_interrupt_match),
+            # ignored combat logs
+            (frozenset({'is', 'are', 'feel', 'feels', 'cannot', 'eligible', 'behind', 'An'}),
+             self.__compiled_ignored_logs_re, None),
+        ]
         self.__combat_ticker: RKAFuture = shared_scheduler.schedule(self.__update_combat_status, 3.0)
         self.__combat_ongoing = False
         self.__known_combatants: Set[str] = set()
@@ -482,55 +509,15 @@ class CombatLogParser(LogParser):
     def _preparse_log_line(self, log_line: str, timestamp: float) -> bool:
         # noinspection PyBroadException
         try:
-            # all combat damage hits
-            match = self.__compiled_combat_hit_re.match(log_line)
-            if match is not None:
-                self.__parse_combat_hit_match(match, timestamp)
-                return True
-            # ability effects such as healing, warding, curing, regeneration, power
-            match = self.__compiled_ability_effect_re.match(log_line)
-            if match is not None:
-                self.__parse_ability_effect_match(match, timestamp)
-                return True
-            # power drain
-            match = self.__compiled_power_drain_re.match(log_line)
-            if match is not None:
-                self.__parse_power_drain_match(match, timestamp)
-                return True
-            # taunts and positions
-            match = self.__compiled_threat_re.match(log_line)
-            if match is not None:
-                self.__parse_threat_match(match, timestamp)
-                return True
-            # damage reductions/intercepts
-            match = self.__compiled_damage_reduction_re.match(log_line)
-            if match is not None:
-                self.__parse_damage_reduction_match(match, timestamp)
-                return True
-            # new wards
-            match = self.__compiled_applied_ward_re.match(log_line)
-            if match is not None:
-                self.__parse_applied_ward_match(match, timestamp)
-                return True
-            # stoneskins triggering
-            match = self.__compiled_stoneskin_re.match(log_line)
-            if match is not None:
-                self.__parse_stoneskin_match(match, timestamp)
-                return True
-            # dispels
-            match = self.__compiled_effect_dispel_re.match(log_line)
-            if match is not None:
-                self.__parse_effect_dispel_match(match, timestamp)
-                return True
-            # interrupted casting
-            match = self.__compiled_interrupt_re.match(log_line)
-            if match is not None:
-                self.__parse_interrupt_match(match, timestamp)
-                return True
-            # ignored combat logs
-            match = self.__compiled_ignored_logs_re.match(log_line)
-            if match is not None:
-                return True
+            log_words = set(_CommonRE.word_re.findall(log_line))
+            for keywords, compiled_re, match_parser in self.__classifiers:
+                if keywords.isdisjoint(log_words):
+                    continue
+                match = compiled_re.match(log_line)
+                if match is not None:
+                    if match_parser is not None:
+                        match_parser(match, timestamp)
+                    return True
             # non-combat logs - open for all triggers
             if self._preparse_noncombat_log_line(log_line, timestamp):
                 return True
@@ -1,19 +1,23 @@
 import threading
 import time
 from collections import deque
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List
 
 import regex as re
 
 from rka.components.cleanup import Closeable
+from rka.components.io.filewatch import IFileChangeWatcher, FileChangeWatcherFactory
 from rka.eq2.parsing import ILogReader, ILogInjector, ILogReaderWriter, logger
 
 
 class FileLogReader(ILogReader, Closeable):
     ACTIVE_CHECK_TIME = 0.05
     INACTIVE_CHECK_TIME = 2.0
+    READ_BLOCK_SIZE = 64 * 1024
+    # game times further from read time come from injected or replayed lines, not from the running game
+    GAME_TIME_WINDOW = 5.0
 
-    def __init__(self, log_filename: str, encoding='utf-8', file_not_found_retry=600.0, io_error_retry=5.0):
+    def __init__(self, log_filename: str, encoding='utf-8', file_not_found_retry=600.0, io_error_retry=5.0, use_game_timestamps=False):
         Closeable.__init__(self, explicit_close=True)
         self.__log_filename = log_filename
         self.__name = log_filename[log_filename.rfind('\\') + 1:]
@@ -25,12 +29,19 @@ class FileLogReader(ILogReader, Closeable):
         self.__io_error_retry = io_error_retry
         self.__io_error_count = 0
         self.__encoding_error_count = 0
+        self.__use_game_timestamps = use_game_timestamps
+        self.__partial_line = ''
+        self.__pending_logs: deque = deque()
+        self.__last_timestamp = 0.0
+        self.__watcher: Optional[IFileChangeWatcher] = None
 
     def interrupt(self):
         with self.__wait_lock:
             self.__interrupted = True
             if self.__file:
                 self.__file.close()
+            if self.__watcher:
+                self.__watcher.interrupt()
             self.__wait_lock.notify_all()
 
     def __wait_until_interrupted(self, remaining_duration: float) -> bool:
@@ -41,17 +52,48 @@ class FileLogReader(ILogReader, Closeable):
                 remaining_duration -= time.time() - start
             return self.__interrupted
 
-    def read_log_with_timestamp(self) -> Optional[Tuple[Optional[str], float]]:
+    def __get_timestamp(self, log_line: str, read_time: float) -> float:
+        timestamp = read_time
+        if self.__use_game_timestamps:
+            game_time = LogUtil.get_game_time(log_line)
+            if game_time is not None and abs(timestamp - game_time) <= FileLogReader.GAME_TIME_WINDOW:
+                # read time is more precise, unless the reader fell behind the game by more than the same second
+                if timestamp < game_time:
+                    timestamp = game_time
+                elif timestamp >= game_time + 1.0:
+                    timestamp = game_time + 0.999
+        # dont let clock adjustments or lagged lines reorder time
+        if timestamp < self.__last_timestamp:
+            timestamp = self.__last_timestamp
+        self.__last_timestamp = timestamp
+        return timestamp
+
+    def __read_block(self) -> bool:
+        log_block = self.__file.read(FileLogReader.READ_BLOCK_SIZE)
+        if not log_block:
+            return False
+        read_time = time.time()
+        # universal newlines mode translates line ends to '\n'; other characters which str.splitlines() breaks on may occur in chat
+        log_pieces = (self.__partial_line + log_block).split('\n')
+        # last line may be still written by the game, it is empty if the block ends with a complete line
+        self.__partial_line = log_pieces.pop()
+        for log_piece in log_pieces:
+            log_line = log_piece + '\n'
+            self.__pending_logs.append((log_line, self.__get_timestamp(log_line, read_time)))
+        return bool(log_pieces)
+
+    def __read_pending_logs(self) -> bool:
         while not self.__interrupted:
             try:
                 if self.__file is None:
                     self.__file = open(self.__log_filename, mode='rt', encoding=self.__encoding)
                     self.__file.seek(0, 2)
-                log_line = self.__file.readline()
-                if not log_line:
-                    return None
+                    self.__partial_line = ''
+                    self.__start_watching()
+                if not self.__read_block():
+                    return False
                 self.__io_error_count = 0
-                return log_line, time.time()
+                return True
             except FileNotFoundError as e:
                 logger.info(f'file not found {self}: {e}')
                 if self.__wait_until_interrupted(self.__file_not_found_retry):
@@ -68,12 +110,41 @@ class FileLogReader(ILogReader, Closeable):
                 logger.warn(f'encoding error with log file in {self}: {e}')
                 self.__encoding_error_count += 1
                 self.__file.seek(0, whence=2)
+                self.__partial_line = ''
                 if self.__encoding_error_count > 5:
                     self.__file.close()
                     self.__file = None
                     self.__encoding = 'latin-1'
                 continue
-        return None
+        return False
+
+    def __start_watching(self):
+        with self.__wait_lock:
+            if self.__watcher is not None or self.__interrupted:
+                return
+            self.__watcher = FileChangeWatcherFactory.create_watcher(self.__log_filename)
+            logger.debug(f'watching file in {self}, event driven: {self.__watcher.is_event_driven()}')
+
+    def read_log_with_timestamp(self) -> Optional[Tuple[Optional[str], float]]:
+        if not self.__pending_logs and not self.__read_pending_logs():
+            return None
+        return self.__pending_logs.popleft()
+
+    def read_logs_with_timestamps(self) -> Optional[List[Tuple[Optional[str], float]]]:
+        if not self.__pending_logs and not self.__read_pending_logs():
+            return None
+        logs = list(self.__pending_logs)
+        self.__pending_logs.clear()
+        return logs
+
+    def wait_for_logs(self, poll_time: float):
+        if self.__pending_logs:
+            return
+        watcher = self.__watcher
+        if watcher is None:
+            self.__wait_until_interrupted(poll_time)
+            return
+        watcher.wait_for_change(poll_time)
 
     def wait_until_empty(self):
         return
@@ -90,6 +161,8 @@ class FileLogReader(ILogReader, Closeable):
         if self.__file:
             self.__file.close()
             self.__file = None
+        self.__partial_line = ''
+        self.__pending_logs.clear()
         with self.__wait_lock:
             self.__wait_lock.notify_all()
 
@@ -98,6 +171,9 @@ class FileLogReader(ILogReader, Closeable):
 
     def close(self):
         self.interrupt()
+        with self.__wait_lock:
+            if self.__watcher:
+                self.__watcher.close()
         Closeable.close(self)
 
 
@@ -140,6 +216,22 @@ class QueueLogReader(ILogReaderWriter):
             log = self.__log_queue.popleft()
             return log
 
+    def read_logs_with_timestamps(self) -> Optional[List[Tuple[Optional[str], float]]]:
+        with self.__queue_lock:
+            while not self.__log_queue and not self.__closed:
+                self.__queue_lock.notify_all()
+                self.__queue_lock.wait()
+            if self.__closed:
+                return None
+            logs = list(self.__log_queue)
+            self.__log_queue.clear()
+            return logs
+
+    def wait_for_logs(self, poll_time: float):
+        with self.__queue_lock:
+            if not self.__log_queue and not self.__closed:
+                self.__queue_lock.wait(poll_time)
+
     def write_log(self, log_line: Optional[str]):
         with self.__queue_lock:
             if self.__closed:
@@ -188,6 +280,17 @@ class TruncateLogHeader(ILogReader):
         log_line = log_line.strip()
         return log_line, timestamp
 
+    def read_logs_with_timestamps(self) -> Optional[List[Tuple[Optional[str], float]]]:
+        logs = self.__delegate.read_logs_with_timestamps()
+        if not logs:
+            return None
+        skip_chars = self.__skip_chars
+        return [(log_line[skip_chars:].strip() if log_line is not None and len(log_line) >= skip_chars else None, timestamp)
+                for log_line, timestamp in logs]
+
+    def wait_for_logs(self, poll_time: float):
+        self.__delegate.wait_for_logs(poll_time)
+
     def wait_until_empty(self):
         self.__delegate.wait_until_empty()
 
@@ -212,6 +315,12 @@ class LogReaderWriter(ILogReaderWriter):
     def read_log_with_timestamp(self) -> Optional[Tuple[Optional[str], float]]:
         return self.__reader.read_log_with_timestamp()
 
+    def read_logs_with_timestamps(self) -> Optional[List[Tuple[Optional[str], float]]]:
+        return self.__reader.read_logs_with_timestamps()
+
+    def wait_for_logs(self, poll_time: float):
+        self.__reader.wait_for_logs(poll_time)
+
     def wait_until_empty(self):
         self.__reader.wait_until_empty()
 
@@ -231,8 +340,8 @@ class LogReaderWriter(ILogReaderWriter):
 
 class LogReaderFactory:
     @staticmethod
-    def create_file_logreader(filename: str) -> ILogReader:
-        return FileLogReader(filename)
+    def create_file_logreader(filename: str, use_game_timestamps=False) -> ILogReader:
+        return FileLogReader(filename, use_game_timestamps=use_game_timestamps)
 
     @staticmethod
     def create_file_loginjector(filename: str) -> ILogInjector:
@@ -255,10 +364,27 @@ class LogUtil:
         loginjector.write_log(logline)
 
     @staticmethod
-    def inject_gamelog_from_file(loginjector: ILogInjector, logfile: str):
+    def get_game_time(logline: str) -> Optional[float]:
+        # game log lines start with "(1234567890)[Thu Jan  1  0:00:00 1970] ", which gives the time with 1s resolution
+        if len(logline) > 11 and logline[0] == '(' and logline[11] == ')':
+            try:
+                return float(logline[1:11])
+            except ValueError:
+                pass
+        return None
+
+    @staticmethod
+    def inject_gamelog_from_file(loginjector: ILogInjector, logfile: str, original_pace=False):
         f = open(logfile, mode='rt', encoding='utf-8')
+        previous_game_time = None
         for line in f:
             if not line:
                 continue
+            if original_pace:
+                game_time = LogUtil.get_game_time(line)
+                if game_time is not None:
+                    if previous_game_time is not None and game_time > previous_game_time:
+                        time.sleep(game_time - previous_game_time)
+                    previous_game_time = game_time
             LogUtil.inject_gamelog_from_text(loginjector, line)
         f.close()
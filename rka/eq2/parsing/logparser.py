@@ -1,8 +1,7 @@
 from __future__ import annotations
 
 import threading
-import time
-from typing import Dict, Match, Optional, Iterable
+from typing import Dict, Match, Optional, Iterable, List, Set, Tuple
 
 import regex as re
 
@@ -15,6 +14,139 @@ from rka.eq2.parsing import ILogReader, IMonitoringLogParser, logger
 from rka.eq2.shared.client_events import ClientEvents
 
 
+class RequiredWordExtractor:
+    WORD_RE = re.compile(r'\w+')
+    __QUANTIFIER_RE = re.compile(r'\*|\+|\?|\{\d*(?:,\d*)?\}')
+    __WORD_ESCAPES = set('dDwWsSbBAZzntrfvapPNgxuU0123456789')
+    __UNSUPPORTED_FLAGS = re.IGNORECASE | re.VERBOSE
+
+    @staticmethod
+    def __skip_class(pattern: str, i: int) -> int:
+        # i points at the opening '['
+        i += 1
+        if i < len(pattern) and pattern[i] == '^':
+            i += 1
+        if i < len(pattern) and pattern[i] == ']':
+            i += 1
+        while i < len(pattern) and pattern[i] != ']':
+            i += 2 if pattern[i] == '\\' else 1
+        return i + 1
+
+    @staticmethod
+    def __skip_group(pattern: str, i: int) -> int:
+        # i points at the opening '('
+        depth = 0
+        while i < len(pattern):
+            c = pattern[i]
+            if c == '\\':
+                i += 2
+                continue
+            if c == '[':
+                i = RequiredWordExtractor.__skip_class(pattern, i)
+                continue
+            if c == '(':
+                depth += 1
+            elif c == ')':
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        return i
+
+    @staticmethod
+    def __skip_escape_argument(pattern: str, i: int, escape: str) -> int:
+        # i points right after the escaped character
+        if escape in 'pPNg' and i < len(pattern) and pattern[i] == '{':
+            end = pattern.find('}', i)
+            return len(pattern) if end < 0 else end + 1
+        if escape in 'xuU0123456789':
+            while i < len(pattern) and pattern[i] in '0123456789abcdefABCDEF{}':
+                i += 1
+        return i
+
+    @staticmethod
+    def __literal_runs(pattern: str) -> Optional[List[Tuple[str, bool]]]:
+        # returns literal fragments which every match must contain, with a flag telling if the fragment starts the match
+        runs: List[Tuple[str, bool]] = list()
+        current = list()
+        current_at_start = True
+
+        def end_run():
+            nonlocal current, current_at_start
+            if current:
+                runs.append((''.join(current), current_at_start))
+            current = list()
+            current_at_start = False
+
+        i = 0
+        while i < len(pattern):
+            c = pattern[i]
+            literal: Optional[str] = None
+            if c == '\\':
+                if i + 1 >= len(pattern):
+                    return None
+                escape = pattern[i + 1]
+                i += 2
+                if escape.isalnum():
+                    if escape not in RequiredWordExtractor.__WORD_ESCAPES:
+                        return None
+                    i = RequiredWordExtractor.__skip_escape_argument(pattern, i, escape)
+                else:
+                    literal = escape
+            elif c == '|':
+                # top-level alternation, nothing is required
+                return None
+            elif c == '[':
+                i = RequiredWordExtractor.__skip_class(pattern, i)
+            elif c == '(':
+                i = RequiredWordExtractor.__skip_group(pattern, i)
+            elif c in '.^$)':
+                i += 1
+            elif c in '*+?{':
+                # stray quantifier or non-quantifier brace; dont try to interpret it
+                i += 1
+            else:
+                literal = c
+                i += 1
+            quantifier = RequiredWordExtractor.__QUANTIFIER_RE.match(pattern, i)
+            if quantifier:
+                i = quantifier.end()
+                # lazy or possessive modifier
+                if i < len(pattern) and pattern[i] in '?+':
+                    i += 1
+                if literal is not None and quantifier.group(0) == '+':
+                    current.append(literal)
+                end_run()
+            elif literal is not None:
+                current.append(literal)
+            else:
+                end_run()
+        end_run()
+        return runs
+
+    @staticmethod
+    def required_word(compiled_regex) -> Optional[str]:
+        # longest whole word which must be present in every text matched by the regex; None if it cant be determined
+        if compiled_regex.flags & RequiredWordExtractor.__UNSUPPORTED_FLAGS:
+            return None
+        runs = RequiredWordExtractor.__literal_runs(compiled_regex.pattern)
+        if not runs:
+            return None
+        best_word = None
+        for run, run_at_start in runs:
+            for word_match in RequiredWordExtractor.WORD_RE.finditer(run):
+                start, end = word_match.span()
+                # the word must be delimited within the literal itself, otherwise it could be a part of a longer word
+                if start == 0 and not run_at_start:
+                    continue
+                if end == len(run):
+                    continue
+                word = word_match.group(0)
+                if best_word is None or len(word) > len(best_word):
+                    best_word = word
+        return best_word
+
+
 class ParserSubscription:
     def __init__(self, parse_filter: str):
         self.parse_filter = parse_filter
@@ -25,6 +157,7 @@ class ParserSubscription:
         except re.error:
             logger.error(f'Error compiling: {parse_filter}')
             raise
+        self.required_word = RequiredWordExtractor.required_word(self.regex)
 
     def increment(self, parse_preparsed_logs: bool):
         if parse_preparsed_logs:
@@ -58,6 +191,71 @@ class ParserSubscription:
         return None
 
 
+# subscriptions are filed under a word required by their regex, so only those whose word occurs in a line need to be
+# tested against it. subscriptions without such word are always tested. not thread safe.
+class ParserSubscriptionIndex:
+    def __init__(self):
+        self.__subscriptions: Dict[str, ParserSubscription] = dict()
+        self.__order: Dict[str, int] = dict()
+        self.__next_order = 0
+        self.__by_word: Dict[str, List[ParserSubscription]] = dict()
+        self.__unindexed: List[ParserSubscription] = list()
+
+    def __contains__(self, parse_filter: str) -> bool:
+        return parse_filter in self.__subscriptions
+
+    def __getitem__(self, parse_filter: str) -> ParserSubscription:
+        return self.__subscriptions[parse_filter]
+
+    def __len__(self) -> int:
+        return len(self.__subscriptions)
+
+    def keys(self) -> Iterable[str]:
+        return self.__subscriptions.keys()
+
+    def values(self) -> Iterable[ParserSubscription]:
+        return self.__subscriptions.values()
+
+    def items(self) -> Iterable[Tuple[str, ParserSubscription]]:
+        return self.__subscriptions.items()
+
+    def add(self, subscription: ParserSubscription):
+        parse_filter = subscription.parse_filter
+        assert parse_filter not in self.__subscriptions
+        self.__subscriptions[parse_filter] = subscription
+        self.__order[parse_filter] = self.__next_order
+        self.__next_order += 1
+        if subscription.required_word is None:
+            self.__unindexed.append(subscription)
+        else:
+            self.__by_word.setdefault(subscription.required_word, list()).append(subscription)
+
+    def remove(self, parse_filter: str):
+        subscription = self.__subscriptions.pop(parse_filter)
+        del self.__order[parse_filter]
+        if subscription.required_word is None:
+            self.__unindexed.remove(subscription)
+        else:
+            bucket = self.__by_word[subscription.required_word]
+            bucket.remove(subscription)
+            if not bucket:
+                del self.__by_word[subscription.required_word]
+
+    def get_candidates(self, log_line: str) -> List[ParserSubscription]:
+        candidates = list(self.__unindexed)
+        if self.__by_word:
+            words: Set[str] = set(RequiredWordExtractor.WORD_RE.findall(log_line))
+            for word in words:
+                bucket = self.__by_word.get(word)
+                if bucket:
+                    candidates.extend(bucket)
+        if len(candidates) > 1:
+            # preserve the order of subscribing
+            order = self.__order
+            candidates.sort(key=lambda subscription: order[subscription.parse_filter])
+        return candidates
+
+
 class LogParser(Closeable, IMonitoringLogParser):
     ACTIVE_CHECK_TIME = 0.05
     INACTIVE_CHECK_TIME = 2.0
@@ -68,7 +266,7 @@ class LogParser(Closeable, IMonitoringLogParser):
         self.__event_system = event_system
         self.__keep_running = True
         self.__parse_filters_lock = threading.RLock()
-        self.__parse_filters: Dict[str, ParserSubscription] = dict()
+        self.__parse_filters = ParserSubscriptionIndex()
         self.__active = False
         self.__check_time = LogParser.INACTIVE_CHECK_TIME
         self.__monitor_manager = None
@@ -104,11 +302,12 @@ class LogParser(Closeable, IMonitoringLogParser):
         # for overriding
         return False
 
-    def __parse_log_line(self, log_line: str, timestamp: float) -> bool:
+    # can be overriden for instrumentation
+    def _parse_log_line(self, log_line: str, timestamp: float) -> bool:
         preparsed_log = self._preparse_log_line(log_line, timestamp)
         subscriptions_to_notify = list()
         with self.__parse_filters_lock:
-            for subscription in self.__parse_filters.values():
+            for subscription in self.__parse_filters.get_candidates(log_line):
                 match = subscription.match(log_line, preparsed_log)
                 if match:
                     if logger.get_level() <= LogLevel.DETAIL:
@@ -130,22 +329,25 @@ class LogParser(Closeable, IMonitoringLogParser):
 
     def __main_loop(self):
         while self.__keep_running:
-            log = self.__log_reader.read_log_with_timestamp()
-            if not log:
-                time.sleep(self.__check_time)
+            logs = self.__log_reader.read_logs_with_timestamps()
+            if not logs:
+                # returns as soon as new logs are written when the reader can watch for them, otherwise polls
+                self.__log_reader.wait_for_logs(self.__check_time)
                 continue
-            log_text, log_timestamp = log
             if not self.__active:
                 self.set_active(True)
-            if log_text:
-                self.__parse_log_line(log_text, log_timestamp)
+            for log_text, log_timestamp in logs:
+                if not self.__keep_running:
+                    break
+                if log_text:
+                    self._parse_log_line(log_text, log_timestamp)
         self.__log_reader.close()
 
     def subscribe(self, parse_filter: str, preparsed_logs=False) -> bool:
         with self.__parse_filters_lock:
             if parse_filter not in self.__parse_filters:
                 logger.info(f'Adding filter \'{parse_filter}\', {preparsed_logs} to {self}')
-                self.__parse_filters[parse_filter] = ParserSubscription(parse_filter)
+                self.__parse_filters.add(ParserSubscription(parse_filter))
             else:
                 logger.info(f'Incrementing filter \'{parse_filter}\', {preparsed_logs} to {self}')
             subscription = self.__parse_filters[parse_filter]
@@ -165,7 +367,7 @@ class LogParser(Closeable, IMonitoringLogParser):
                     logger.info(f'Decrementing filter \'{parse_filter}\', {preparsed_logs} from {self}')
                 else:
                     logger.info(f'Removing filter \'{parse_filter}\', {preparsed_logs} from {self}')
-                    del self.__parse_filters[parse_filter]
+                    self.__parse_filters.remove(parse_filter)
                 return True
             else:
                 logger.info(f'Cannot remove, filter not found \'{parse_filter}\', {preparsed_logs} from {self}')
@@ -177,7 +379,7 @@ class LogParser(Closeable, IMonitoringLogParser):
                 logger.info(f'Removing all filter \'{parse_filter}\', {preparsed_logs} from {self}')
                 subscription = self.__parse_filters[parse_filter]
                 subscription.clear_increments(preparsed_logs)
-                del self.__parse_filters[parse_filter]
+                self.__parse_filters.remove(parse_filter)
                 return True
             else:
                 logger.info(f'Cannot remove all, filter not found \'{parse_filter}\', {preparsed_logs} from {self}')
@@ -0,0 +1,153 @@
+import argparse
+import threading
+import time
+from typing import Type, Callable, List
+
+from rka.components.cleanup import cleanup_manager
+from rka.components.events.event_bus import EventBusFactory
+from rka.components.events.event_system import EventSystem
+from rka.eq2.configs.shared.rka_constants import LOG_PARSER_SKIPCHARS
+from rka.eq2.datafiles.parser_tests import get_testlog_filepath
+from rka.eq2.parsing import ILogReader, ILogReaderWriter
+from rka.eq2.parsing.combat_logparser import CombatLogParser
+from rka.eq2.parsing.log_io import LogReaderFactory, LogUtil, TruncateLogHeader
+from rka.eq2.parsing.logparser import LogParser
+from rka.eq2.parsing.parsing_util import ANY_PLAYER_G, ANY_NAMED_G
+from rka.util.benchmark import LatencyRecorder, PeakMemoryTracker, format_rate
+
+BENCHMARK_PARSER_ID = 'benchmark'
+BENCHMARK_PLAYER_NAME = 'Arvena'
+BENCHMARK_LOG_FILE = 'synthetic_raid.txt'
+END_OF_REPLAY = 'RKA benchmark replay finished'
+
+# queue: from injecting the line until the parser takes it
+# preparse: combat classification and DPS records
+# match: testing subscriptions and posting matches
+# total: from injecting the line until it is fully parsed
+STAGES = ['queue', 'preparse', 'match', 'total']
+
+
+def instrument_parser_class(parser_class: Type[LogParser]) -> Type[LogParser]:
+    class InstrumentedParser(parser_class):
+        # noinspection PyMissingConstructor
+        def __init__(self, recorder: LatencyRecorder, replay_finished: threading.Event, *args, **kwargs):
+            self.__recorder = recorder
+            self.__replay_finished = replay_finished
+            self.__preparse_duration = 0.0
+            self.parsed_lines = 0
+            self.matched_lines = 0
+            parser_class.__init__(self, *args, **kwargs)
+
+        def _preparse_log_line(self, log_line: str, timestamp: float) -> bool:
+            start = time.perf_counter()
+            result = parser_class._preparse_log_line(self, log_line, timestamp)
+            self.__preparse_duration = time.perf_counter() - start
+            return result
+
+        def _parse_log_line(self, log_line: str, timestamp: float) -> bool:
+            if log_line == END_OF_REPLAY:
+                self.__replay_finished.set()
+                return False
+            parse_start = time.time()
+            start = time.perf_counter()
+            self.__preparse_duration = 0.0
+            result = parser_class._parse_log_line(self, log_line, timestamp)
+            duration = time.perf_counter() - start
+            self.parsed_lines += 1
+            if result:
+                self.matched_lines += 1
+            self.__recorder.record_all([('queue', parse_start - timestamp),
+                                        ('preparse', self.__preparse_duration),
+                                        ('match', duration - self.__preparse_duration),
+                                        ('total', parse_start + duration - timestamp)])
+            return result
+
+    InstrumentedParser.__name__ = f'Instrumented{parser_class.__name__}'
+    return InstrumentedParser
+
+
+def create_benchmark_filters(count: int) -> List[str]:
+    filters = [
+        rf'({ANY_PLAYER_G}) tells the raid, "(.*)"',
+        rf'({ANY_PLAYER_G}) synergizes with the group\.$',
+        rf'\\aNPC \d+ ({ANY_NAMED_G}):.* shouts, "(.*)"',
+        r'You have entered (.*)\.',
+    ]
+    # typical trigger load, which does not match most of the time
+    for i in range(count):
+        filters.append(rf'({ANY_NAMED_G}) readies ability{i} toward ({ANY_PLAYER_G})')
+    return filters
+
+
+def create_parser(parser_type: str, recorder: LatencyRecorder, replay_finished: threading.Event,
+                  log_reader: ILogReader, event_system: EventSystem) -> LogParser:
+    if parser_type == 'log':
+        return instrument_parser_class(LogParser)(recorder, replay_finished, BENCHMARK_PARSER_ID, log_reader, event_system)
+    if parser_type == 'combat':
+        return instrument_parser_class(CombatLogParser)(recorder, replay_finished, BENCHMARK_PARSER_ID, BENCHMARK_PLAYER_NAME, log_reader, event_system)
+    if parser_type == 'dps':
+        # master package is imported only for this parser
+        from rka.eq2.master.parsing.dps_benchmark import OfflineRuntime
+        from rka.eq2.master.parsing.dps_logparser import DpsLogParser
+        runtime = OfflineRuntime(BENCHMARK_PARSER_ID, BENCHMARK_PLAYER_NAME)
+        return instrument_parser_class(DpsLogParser)(recorder, replay_finished, runtime, runtime.player, log_reader, event_system)
+    raise ValueError(parser_type)
+
+
+def run_replay(parser_type: str, log_filepath: str, repeat: int, original_pace: bool, filter_count: int, trace_memory: bool, timeout: float,
+               report: Callable[[str], None] = print) -> bool:
+    memory_tracker = PeakMemoryTracker(trace_memory)
+    memory_tracker.start()
+    recorder = LatencyRecorder(STAGES)
+    replay_finished = threading.Event()
+    event_system = EventSystem.get_system(BENCHMARK_PARSER_ID, EventBusFactory())
+    event_system.install_bus(BENCHMARK_PARSER_ID)
+    log_io: ILogReaderWriter = LogReaderFactory.create_queue_logreader()
+    log_reader = TruncateLogHeader(log_io, LOG_PARSER_SKIPCHARS)
+    parser = create_parser(parser_type, recorder, replay_finished, log_reader, event_system)
+    for parse_filter in create_benchmark_filters(filter_count):
+        parser.subscribe(parse_filter)
+    start = time.time()
+    for _ in range(repeat):
+        LogUtil.inject_gamelog_from_file(log_io, log_filepath, original_pace=original_pace)
+    LogUtil.inject_gamelog_from_text(log_io, END_OF_REPLAY)
+    injected = time.time()
+    completed = replay_finished.wait(timeout)
+    finished = time.time()
+    peak_memory = memory_tracker.stop()
+    # noinspection PyUnresolvedReferences
+    parsed_lines, matched_lines = parser.parsed_lines, parser.matched_lines
+    parser.close()
+    event_system.close()
+    if not completed:
+        report(f'FAILED: replay did not finish in {timeout:.0f}s, {parsed_lines} lines parsed')
+        return False
+    report(f'{parser.__class__.__name__}: {log_filepath} x{repeat}, {filter_count + 4} filters, original pace: {original_pace}')
+    report(f'injecting: {format_rate(parsed_lines, injected - start, "lines")}')
+    report(f'parsing: {format_rate(parsed_lines, finished - start, "lines")}, {matched_lines} lines matched filters')
+    report(recorder.get_report())
+    if peak_memory is not None:
+        report(f'peak traced memory: {peak_memory / 1024.0 / 1024.0:.2f} MB')
+    return True
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Replay a game log through log parsers and measure their throughput')
+    arg_parser.add_argument('--parser', choices=['log', 'combat', 'dps'], default='combat')
+    arg_parser.add_argument('--log', default=get_testlog_filepath(BENCHMARK_LOG_FILE), help='game log file to replay')
+    arg_parser.add_argument('--repeat', type=int, default=10, help='how many times to replay the log file')
+    arg_parser.add_argument('--original-pace', action='store_true', help='replay with timing from the game log instead of full speed')
+    arg_parser.add_argument('--filters', type=int, default=200, help='number of additional trigger-like subscriptions')
+    arg_parser.add_argument('--memory', action='store_true', help='trace peak memory (slows down parsing)')
+    arg_parser.add_argument('--timeout', type=float, default=600.0, help='seconds to wait for the replay to finish')
+    args = arg_parser.parse_args()
+    try:
+        completed = run_replay(args.parser, args.log, args.repeat, args.original_pace, args.filters, args.memory, args.timeout)
+    finally:
+        cleanup_manager.close_all()
+    if not completed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
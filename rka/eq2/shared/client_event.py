@@ -8,6 +8,8 @@ from rka.components.events import EventStub, Event
 
 
 class ClientEvent(Event):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         Event.__init__(self, **kwargs)
 
@@ -29,6 +31,8 @@ class ClientEvent(Event):
 
 
 class ParserEvent(ClientEvent):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         ClientEvent.__init__(self, **kwargs)
 
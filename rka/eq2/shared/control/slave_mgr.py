@@ -80,7 +80,7 @@ class SlaveManager(IActiveFileMonitorObserver):
             self.__delegated_observer.file_activated(deactivated_monitor, activated_monitor)
 
     def file_activated(self, deactivated_monitor: IFileMonitor, activated_monitor: IFileMonitor):
-        shared_worker.push_task(lambda: self.__file_activated_queued(deactivated_monitor, activated_monitor))
+        shared_worker.post_task(lambda: self.__file_activated_queued(deactivated_monitor, activated_monitor))
 
     def close(self):
         if self.__current_client is not None:
@@ -1,5 +1,6 @@
 from rka.components.concurrency.rkascheduler import RKAScheduler
 from rka.components.concurrency.workthread import RKAWorkerThread
 
+# callbacks of this scheduler rely on running one at a time, in order; keep it without an executor pool
 shared_scheduler = RKAScheduler('Common scheduler')
 shared_worker = RKAWorkerThread('Common worker thread', queue_limit=200)
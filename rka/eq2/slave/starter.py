@@ -7,7 +7,7 @@ from rka.components.events.event_system import EventSystem
 from rka.components.impl.factories import HotkeyServiceFactory, InjectorFactory
 from rka.components.network.network_config import NetworkConfig
 from rka.components.ui.hotkeys import IHotkeyService, HotkeyEventPumpType
-from rka.eq2.configs.shared.rka_constants import LOG_PARSER_SKIPCHARS, REMOTE_INJECTOR_PATH
+from rka.eq2.configs.shared.rka_constants import LOG_PARSER_SKIPCHARS, REMOTE_INJECTOR_PATH, LOG_PARSER_GAME_TIMESTAMPS
 from rka.eq2.parsing.combat_logparser import CombatLogParser
 from rka.eq2.parsing.log_io import LogReaderFactory, TruncateLogHeader
 from rka.eq2.parsing.parser_mgr import ParserManager
@@ -39,7 +39,7 @@ class SlaveRuntime:
         recent_client_id = host_config.get_recent_log_filenames_client()
         for client_id in host_config.client_ids:
             log_filename = host_config.get_log_filename(client_id)
-            log_reader = LogReaderFactory.create_file_logreader(log_filename)
+            log_reader = LogReaderFactory.create_file_logreader(log_filename, use_game_timestamps=LOG_PARSER_GAME_TIMESTAMPS)
             log_reader = TruncateLogHeader(log_reader, LOG_PARSER_SKIPCHARS)
             log_reader.clear_logs()
             player_name = host_config.player_names[client_id]
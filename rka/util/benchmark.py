@@ -0,0 +1,65 @@
+import threading
+import tracemalloc
+from typing import Dict, List, Iterable, Optional, Tuple
+
+
+class LatencyRecorder:
+    DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 100.0)
+
+    def __init__(self, stage_names: Iterable[str]):
+        self.__lock = threading.Lock()
+        self.__stage_names = list(stage_names)
+        self.__samples: Dict[str, List[float]] = {stage_name: list() for stage_name in self.__stage_names}
+
+    def record(self, stage_name: str, duration: float):
+        with self.__lock:
+            self.__samples[stage_name].append(duration)
+
+    def record_all(self, durations: Iterable[Tuple[str, float]]):
+        with self.__lock:
+            for stage_name, duration in durations:
+                self.__samples[stage_name].append(duration)
+
+    def get_count(self, stage_name: str) -> int:
+        with self.__lock:
+            return len(self.__samples[stage_name])
+
+    def get_percentiles(self, stage_name: str, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> List[float]:
+        with self.__lock:
+            samples = sorted(self.__samples[stage_name])
+        if not samples:
+            return [0.0 for _ in percentiles]
+        last_index = len(samples) - 1
+        return [samples[min(last_index, int(round(percentile / 100.0 * last_index)))] for percentile in percentiles]
+
+    def get_report(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> str:
+        percentiles = list(percentiles)
+        header = ', '.join([f'p{percentile:g}' for percentile in percentiles])
+        lines = [f'latency [us] ({header})']
+        for stage_name in self.__stage_names:
+            values = self.get_percentiles(stage_name, percentiles)
+            values_str = ', '.join([f'{value * 1000000.0:.1f}' for value in values])
+            lines.append(f'  {stage_name}: {values_str} (n={self.get_count(stage_name)})')
+        return '\n'.join(lines)
+
+
+class PeakMemoryTracker:
+    def __init__(self, enabled: bool):
+        self.__enabled = enabled
+
+    def start(self):
+        if self.__enabled:
+            tracemalloc.start()
+
+    def stop(self) -> Optional[int]:
+        if not self.__enabled:
+            return None
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+
+def format_rate(count: int, duration: float, unit: str) -> str:
+    if duration <= 0.0:
+        return f'{count} {unit} in 0s'
+    return f'{count} {unit} in {duration:.3f}s, {count / duration:.0f} {unit}/s'
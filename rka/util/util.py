@@ -12,6 +12,15 @@ def to_bool(obj) -> bool:
     assert False, f'unrecognized object type {obj}'
 
 
+# conversions between wall clock timestamps and time.monotonic() values, using the current offset of both clocks
+def monotonic_from_timestamp(timestamp: float) -> float:
+    return timestamp - time.time() + time.monotonic()
+
+
+def timestamp_from_monotonic(monotonic: float) -> float:
+    return monotonic - time.monotonic() + time.time()
+
+
 class NameEnum(Enum):
     def __init__(self, _: str):
         pass